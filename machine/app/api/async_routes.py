@@ -0,0 +1,221 @@
+import asyncio
+import functools
+from quart import Blueprint, Response, current_app, jsonify, request
+from ..models.petr4.src.utils import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+async_api_bp = Blueprint('async_api', __name__)
+
+
+def _registry():
+	return current_app.config['MODEL_REGISTRY']
+
+
+async def _offload(func, *args, **kwargs):
+	"""
+	Run blocking work (model loading, feature and model code) in the app's
+	CPU executor so the event loop keeps serving other requests.
+	"""
+	loop = asyncio.get_running_loop()
+	return await loop.run_in_executor(current_app.config['CPU_EXECUTOR'], functools.partial(func, *args, **kwargs))
+
+
+def _unknown_ticker(ticker):
+	return jsonify({
+			"error": "Unknown ticker",
+			"message": f"No model is registered for {ticker}",
+			"available_tickers": list(_registry().tickers)
+	}), 404
+
+
+def _retrain_disabled(ticker):
+	# Under the pre-forked server a retrain would only update one worker:
+	# train out of band instead, every worker reloads the new artifact
+	return jsonify({
+			"error": "Retraining disabled",
+			"message": f"Training on demand is disabled in this server; train the {ticker.upper()} model out of band"
+	}), 409
+
+
+@async_api_bp.route('/health', methods=['GET'])
+async def health_check():
+	try:
+			result = await _offload(_registry().health_check)
+			status_code = 200 if result.get('status') == 'success' else 503
+			return jsonify(result), status_code
+	except Exception as e:
+			logger.error("Health check error: %s", e)
+			return jsonify({
+					"error": "Health check failed",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/metrics', methods=['GET'])
+async def get_metrics():
+	"""
+	Latency histograms of this process in the text exposition format.
+	"""
+	return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@async_api_bp.route('/<ticker>/predict', methods=['GET'])
+async def get_prediction(ticker):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			result = await prediction_service.get_prediction_async(current_app.config['CPU_EXECUTOR'])
+			status_code = 200 if result.get('status') == 'success' else 400
+			return jsonify(result), status_code
+	except Exception as e:
+			logger.error("Prediction error: %s", e)
+			return jsonify({
+					"error": "Prediction failed",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/<ticker>/predict', methods=['POST'])
+async def predict_with_params(ticker):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			data = await request.get_json() or {}
+			if data.get('retrain', False) and not prediction_service.train_on_demand:
+					return _retrain_disabled(ticker)
+
+			retrain_job = None
+			if data.get('retrain', False):
+					retrain_job = prediction_service.start_retrain(data.get('period', '3y'))
+
+			# Served by the current model; a requested retrain runs in the background
+			result = await prediction_service.get_prediction_async(current_app.config['CPU_EXECUTOR'])
+			status_code = 200 if result.get('status') == 'success' else 400
+
+			if retrain_job:
+					result['retrain_info'] = {
+							"retrained": False,
+							"period_used": retrain_job['period'],
+							"job_id": retrain_job['job_id'],
+							"job_status": retrain_job['status']
+					}
+
+			return jsonify(result), status_code
+
+	except Exception as e:
+			logger.error("Prediction with params error: %s", e)
+			return jsonify({
+					"error": "Prediction with parameters failed",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/<ticker>/info', methods=['GET'])
+async def get_model_info(ticker):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			result = await _offload(prediction_service.get_model_info)
+			status_code = 200 if result.get('status') == 'success' else 400
+			return jsonify(result), status_code
+	except Exception as e:
+			logger.error("Model info error: %s", e)
+			return jsonify({
+					"error": "Failed to get model info",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/<ticker>/metrics', methods=['GET'])
+async def get_model_metrics(ticker):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			result = await _offload(prediction_service.get_model_metrics)
+			status_code = 200 if result.get('status') == 'success' else 400
+			return jsonify(result), status_code
+	except Exception as e:
+			logger.error("Model metrics error: %s", e)
+			return jsonify({
+					"error": "Failed to get model metrics",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/<ticker>/retrain', methods=['POST'])
+async def retrain_model(ticker):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			if not prediction_service.train_on_demand:
+					return _retrain_disabled(ticker)
+
+			data = await request.get_json() or {}
+
+			# Training runs on the service's own background executor
+			job = prediction_service.start_retrain(data.get('period', '3y'))
+			return jsonify({
+					"status": "accepted",
+					"message": "Model retraining scheduled",
+					"job": job,
+					"status_url": f"/{ticker.lower()}/retrain/{job['job_id']}"
+			}), 202
+
+	except Exception as e:
+			logger.error("Model retrain error: %s", e)
+			return jsonify({
+					"error": "Model retraining failed",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.route('/<ticker>/retrain/<job_id>', methods=['GET'])
+async def get_retrain_status(ticker, job_id):
+	if _registry().normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+
+	try:
+			prediction_service = await _offload(_registry().get, ticker)
+			job = prediction_service.get_retrain_status(job_id)
+			if job is None:
+					return jsonify({
+							"error": "Job not found",
+							"message": f"No retraining job with id {job_id}"
+					}), 404
+
+			return jsonify({"status": "success", "job": job}), 200
+
+	except Exception as e:
+			logger.error("Retrain status error: %s", e)
+			return jsonify({
+					"error": "Failed to get retraining status",
+					"message": str(e)
+			}), 500
+
+
+@async_api_bp.errorhandler(404)
+async def not_found(error):
+	return jsonify({
+			"error": "Endpoint not found",
+			"message": "The requested endpoint does not exist",
+	}), 404
+
+
+@async_api_bp.errorhandler(405)
+async def method_not_allowed(error):
+	return jsonify({
+			"error": "Method not allowed",
+			"message": "The HTTP method is not allowed for this endpoint"
+	}), 405
@@ -1,119 +1,303 @@
-from flask import Blueprint, jsonify, request
-from ..models.petr4.src.services.prediction_service import PredictionService
+import os
+import json
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from ..models.petr4.src.services.model_registry import create_registry_from_env
+from ..models.petr4.src.utils import metrics
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 api_bp = Blueprint('api', __name__)
 
-prediction_service = PredictionService()
+model_registry = create_registry_from_env()
+
+
+def _unknown_ticker(ticker):
+	return jsonify({
+			"error": "Unknown ticker",
+			"message": f"No model is registered for {ticker}",
+			"available_tickers": list(model_registry.tickers)
+	}), 404
+
+
+def _retrain_disabled(ticker):
+	# Under the pre-forked server a retrain would only update one worker:
+	# train out of band instead, every worker reloads the new artifact
+	return jsonify({
+			"error": "Retraining disabled",
+			"message": f"Training on demand is disabled in this server; train the {ticker.upper()} model out of band"
+	}), 409
 
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
 	try:
-			result = prediction_service.health_check()
+			result = model_registry.health_check()
 			status_code = 200 if result.get('status') == 'success' else 503
 			return jsonify(result), status_code
 	except Exception as e:
-			logger.error(f"Health check error: {e}")
+			logger.error("Health check error: %s", e)
 			return jsonify({
 					"error": "Health check failed",
 					"message": str(e)
 			}), 500
 
 
-@api_bp.route('/petr4/predict', methods=['GET'])
-def get_prediction():
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+	"""
+	Latency histograms of this process in the text exposition format.
+	"""
+	return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+# Upper bound on (ticker, date) rows accepted by /predict/batch
+MAX_BATCH_ROWS = int(os.environ.get('MAX_BATCH_ROWS', 1000))
+
+
+def _parse_batch_request(data):
+	"""
+	Normalize a batch body into [(ticker, [dates])].
+	
+	Accepts {"tickers": [...], "dates": [...]}, applying the dates to every
+	ticker, or {"requests": [{"ticker": ..., "dates": [...]}, ...]}.
+	"""
+	if 'requests' in data:
+			items = [(item.get('ticker'), item.get('dates') or []) for item in data['requests']]
+	else:
+			items = [(ticker, data.get('dates') or []) for ticker in data.get('tickers') or []]
+	
+	if not items:
+			raise ValueError("Provide 'tickers' or 'requests'")
+	
+	for ticker, dates in items:
+			if not ticker:
+					raise ValueError("Every request needs a 'ticker'")
+			for date in dates:
+					pd.Timestamp(date)
+	
+	rows = sum(max(1, len(dates)) for _, dates in items)
+	if rows > MAX_BATCH_ROWS:
+			raise ValueError(f"Batch has {rows} rows, the limit is {MAX_BATCH_ROWS}")
+	
+	return items
+
+
+@api_bp.route('/predict/batch', methods=['POST'])
+def predict_batch():
 	try:
+			items = _parse_batch_request(request.get_json() or {})
+	except Exception as e:
+			return jsonify({
+					"error": "Invalid batch request",
+					"message": str(e)
+			}), 400
+	
+	def generate():
+			# One line per (ticker, date); each ticker is predicted in a single call
+			for ticker, dates in items:
+					name = model_registry.normalize(ticker)
+					if name is None:
+							yield json.dumps({"ticker": ticker, "status": "error", "message": "Unknown ticker"}) + "\n"
+							continue
+					
+					try:
+							rows = model_registry.get(name).get_batch_predictions(dates)
+					except Exception as e:
+							logger.error("Batch prediction error for %s: %s", name, e)
+							yield json.dumps({"ticker": name, "status": "error", "message": str(e)}) + "\n"
+							continue
+					
+					for row in rows:
+							yield json.dumps({"ticker": name, **row}) + "\n"
+	
+	return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@api_bp.route('/<ticker>/predict', methods=['GET'])
+def get_prediction(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
+	try:
+			prediction_service = model_registry.get(ticker)
 			result = prediction_service.get_prediction()
 			status_code = 200 if result.get('status') == 'success' else 400
 			return jsonify(result), status_code
 	except Exception as e:
-			logger.error(f"Prediction error: {e}")
+			logger.error("Prediction error: %s", e)
 			return jsonify({
 					"error": "Prediction failed",
 					"message": str(e)
 			}), 500
 
 
-@api_bp.route('/petr4/predict', methods=['POST'])
-def predict_with_params():
+@api_bp.route('/<ticker>/predict', methods=['POST'])
+def predict_with_params(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
 	try:
+			prediction_service = model_registry.get(ticker)
 			data = request.get_json() or {}
+			if data.get('retrain', False) and not prediction_service.train_on_demand:
+					return _retrain_disabled(ticker)
 			
+			retrain_job = None
 			if data.get('retrain', False):
 					period = data.get('period', '3y')
-					retrain_result = prediction_service.retrain_model(period)
-					
-					if retrain_result.get('status') != 'success':
-							return jsonify(retrain_result), 400
+					retrain_job = prediction_service.start_retrain(period)
 			
+			# Served by the current model; a requested retrain runs in the background
 			result = prediction_service.get_prediction()
 			status_code = 200 if result.get('status') == 'success' else 400
 			
-			if data.get('retrain', False):
+			if retrain_job:
 					result['retrain_info'] = {
-							"retrained": True,
-							"period_used": data.get('period', '3y')
+							"retrained": False,
+							"period_used": retrain_job['period'],
+							"job_id": retrain_job['job_id'],
+							"job_status": retrain_job['status']
 					}
 			
 			return jsonify(result), status_code
 			
 	except Exception as e:
-			logger.error(f"Prediction with params error: {e}")
+			logger.error("Prediction with params error: %s", e)
 			return jsonify({
 					"error": "Prediction with parameters failed",
 					"message": str(e)
 			}), 500
 
 
-@api_bp.route('/petr4/info', methods=['GET'])
-def get_model_info():
+@api_bp.route('/<ticker>/info', methods=['GET'])
+def get_model_info(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
 	try:
+			prediction_service = model_registry.get(ticker)
 			result = prediction_service.get_model_info()
 			status_code = 200 if result.get('status') == 'success' else 400
 			return jsonify(result), status_code
 	except Exception as e:
-			logger.error(f"Model info error: {e}")
+			logger.error("Model info error: %s", e)
 			return jsonify({
 					"error": "Failed to get model info",
 					"message": str(e)
 			}), 500
 
 
-@api_bp.route('/petr4/metrics', methods=['GET'])
-def get_model_metrics():
+@api_bp.route('/<ticker>/metrics', methods=['GET'])
+def get_model_metrics(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
 	try:
+			prediction_service = model_registry.get(ticker)
 			result = prediction_service.get_model_metrics()
 			status_code = 200 if result.get('status') == 'success' else 400
 			return jsonify(result), status_code
 	except Exception as e:
-			logger.error(f"Model metrics error: {e}")
+			logger.error("Model metrics error: %s", e)
 			return jsonify({
 					"error": "Failed to get model metrics",
 					"message": str(e)
 			}), 500
 
 
-@api_bp.route('/petr4/retrain', methods=['POST'])
-def retrain_model():
+@api_bp.route('/<ticker>/backtest', methods=['POST'])
+def run_backtest(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
 	try:
-			data = request.get_json() or {}
-			period = data.get('period', '3y')
+			prediction_service = model_registry.get(ticker)
+			data = request.get_json(silent=True) or {}
 			
-			result = prediction_service.retrain_model(period)
+			result = prediction_service.run_backtest(
+					period=data.get('period', '6y'),
+					thresholds=data.get('thresholds'),
+					cost_bps=float(data.get('cost_bps', 0)),
+					strength=int(data.get('strength', 1)),
+					include_series=bool(data.get('include_series', True))
+			)
 			status_code = 200 if result.get('status') == 'success' else 400
 			return jsonify(result), status_code
 			
 	except Exception as e:
-			logger.error(f"Model retrain error: {e}")
+			logger.error("Backtest error: %s", e)
+			return jsonify({
+					"error": "Backtest failed",
+					"message": str(e)
+			}), 500
+
+
+@api_bp.route('/<ticker>/retrain', methods=['POST'])
+def retrain_model(ticker):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
+	try:
+			prediction_service = model_registry.get(ticker)
+			if not prediction_service.train_on_demand:
+					return _retrain_disabled(ticker)
+			
+			data = request.get_json() or {}
+			period = data.get('period', '3y')
+			
+			job = prediction_service.start_retrain(period)
+			return jsonify({
+					"status": "accepted",
+					"message": "Model retraining scheduled",
+					"job": job,
+					"status_url": f"/{ticker.lower()}/retrain/{job['job_id']}"
+			}), 202
+			
+	except Exception as e:
+			logger.error("Model retrain error: %s", e)
 			return jsonify({
 					"error": "Model retraining failed",
 					"message": str(e)
 			}), 500
 
+
+@api_bp.route('/<ticker>/retrain/<job_id>', methods=['GET'])
+def get_retrain_status(ticker, job_id):
+	if model_registry.normalize(ticker) is None:
+			return _unknown_ticker(ticker)
+	
+	try:
+			prediction_service = model_registry.get(ticker)
+			job = prediction_service.get_retrain_status(job_id)
+			if job is None:
+					return jsonify({
+							"error": "Job not found",
+							"message": f"No retraining job with id {job_id}"
+					}), 404
+			
+			return jsonify({"status": "success", "job": job}), 200
+			
+	except Exception as e:
+			logger.error("Retrain status error: %s", e)
+			return jsonify({
+					"error": "Failed to get retraining status",
+					"message": str(e)
+			}), 500
+
+@api_bp.route('/models', methods=['GET'])
+def get_registry_info():
+	try:
+			return jsonify({"status": "success", "registry": model_registry.get_info()}), 200
+	except Exception as e:
+			logger.error("Registry info error: %s", e)
+			return jsonify({
+					"error": "Failed to get registry info",
+					"message": str(e)
+			}), 500
+
+
 @api_bp.errorhandler(404)
 def not_found(error):
 	return jsonify({
@@ -0,0 +1,118 @@
+"""
+Async Application Entry Point
+Quart (asyncio) variant of the prediction API for ASGI servers.
+
+Serves the /health, /<ticker>/predict, /<ticker>/info, /<ticker>/metrics and
+/<ticker>/retrain contracts of the Flask app. Requests are coroutines, so a
+slow market data source holds no thread per request: downloads are awaited
+concurrently and CPU-bound work runs in a bounded executor.
+
+Install with the 'async' extra (poetry install -E async), then run the
+bundled hypercorn server with `serve-async`, or any ASGI server through
+the app factory; there is no module-level app:
+
+    hypercorn "app.asgi:create_async_app()" --bind 0.0.0.0:5000
+"""
+
+import os
+import sys
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from .logging_config import configure_logging
+configure_logging()
+
+try:
+    from quart import Quart
+    QUART_AVAILABLE = True
+except ImportError:
+    QUART_AVAILABLE = False
+
+from .models.petr4.src.services.model_registry import create_registry_from_env
+
+
+logger = logging.getLogger(__name__)
+
+
+def create_async_app(registry=None, cpu_workers=None):
+    """
+    Create and configure the Quart application.
+
+    Args:
+        registry (ModelRegistry): Models to serve, built from the environment by default
+        cpu_workers (int): Threads for feature and model work (ASYNC_CPU_WORKERS)
+
+    Returns:
+        Quart: Configured application
+    """
+    if not QUART_AVAILABLE:
+        raise RuntimeError("quart is required for the async API: poetry install -E async (or pip install quart)")
+
+    from .api.async_routes import async_api_bp
+
+    app = Quart(__name__)
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+    app.config['MODEL_REGISTRY'] = registry or create_registry_from_env()
+
+    cpu_workers = cpu_workers or int(os.environ.get('ASYNC_CPU_WORKERS', os.cpu_count() or 1))
+    app.config['CPU_EXECUTOR'] = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix='cpu')
+
+    app.register_blueprint(async_api_bp)
+
+    # Same CORS policy as the Flask app (all origins)
+    @app.after_request
+    async def add_cors_headers(response):
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    @app.after_serving
+    async def shutdown_executor():
+        app.config['CPU_EXECUTOR'].shutdown(wait=False, cancel_futures=True)
+
+    @app.route('/')
+    async def index():
+        """Root endpoint with service information."""
+        return {
+            "service": "PETR4 ML Prediction Server (async)",
+            "version": "1.0.0",
+            "status": "running",
+            "endpoints": {
+                "health": "/health",
+                "metrics": "/metrics",
+                "prediction": "/<ticker>/predict",
+                "model_info": "/<ticker>/info",
+                "model_metrics": "/<ticker>/metrics",
+                "retrain": "/<ticker>/retrain"
+            }
+        }
+
+    os.makedirs('data', exist_ok=True)
+    os.makedirs('logs', exist_ok=True)
+
+    logger.info("Async PETR4 ML Prediction Server initialized")
+    return app
+
+
+def main():
+    """
+    Main entry point for running the async server with hypercorn.
+    """
+    if not QUART_AVAILABLE:
+        raise SystemExit("quart and hypercorn are required for the async API: poetry install -E async (or pip install quart hypercorn)")
+
+    from hypercorn.config import Config
+    from hypercorn.asyncio import serve
+
+    config = Config()
+    config.bind = [f"{os.environ.get('HOST', '0.0.0.0')}:{int(os.environ.get('PORT', 5000))}"]
+
+    logger.info("Starting async PETR4 ML Prediction Server on %s", config.bind[0])
+    asyncio.run(serve(create_async_app(), config))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
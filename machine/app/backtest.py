@@ -0,0 +1,117 @@
+"""
+Backtest Command Line Interface
+Replays the recommendation rule of a trained model over historical data.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from dotenv import load_dotenv
+
+from .logging_config import configure_logging
+from .models.petr4.src.models.predictor import StockPredictor
+from .models.petr4.src.models.backtest import Backtester
+from .models.petr4.src.utils.market_data_provider import create_provider_from_env
+
+
+def parse_args(argv=None):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Backtest the BUY/SELL recommendations of a trained model")
+    parser.add_argument('--ticker', default='PETR4', help="Ticker to backtest")
+    parser.add_argument('--symbol', default=None, help="Market symbol, defaults to <ticker>.SA")
+    parser.add_argument('--period', default='6y', help="History period to replay")
+    parser.add_argument('--model-path', default=None, help="Model artifact, defaults to data/models/<ticker>_model.joblib")
+    parser.add_argument('--train', action='store_true', help="Train a model when no artifact is found")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="Cost per unit of position change, in basis points")
+    parser.add_argument('--strength', type=int, default=1, choices=[1, 2], help="Minimum signal strength traded")
+    parser.add_argument('--confidence', type=float, default=None, help="Override the model confidence")
+    parser.add_argument('--high-confidence', type=float, default=None)
+    parser.add_argument('--high-change', type=float, default=None)
+    parser.add_argument('--moderate-confidence', type=float, default=None)
+    parser.add_argument('--moderate-change', type=float, default=None)
+    parser.add_argument('--sweep-change', default=None,
+                        help="Comma separated moderate_change values to sweep, e.g. 0.25,0.5,1")
+    parser.add_argument('--output', default=None, help="Write the daily series to this CSV file")
+    return parser.parse_args(argv)
+
+
+def load_predictor(args):
+    """
+    Load the model artifact for the ticker, training one when allowed.
+    """
+    predictor = StockPredictor(args.ticker.upper(), args.symbol, provider=create_provider_from_env())
+    model_path = args.model_path or os.path.join('data', 'models', f'{args.ticker.lower()}_model.joblib')
+
+    if predictor.load_model(model_path):
+        return predictor
+
+    if not args.train:
+        raise SystemExit(f"No compatible model at {model_path}; pass --train to train one")
+
+    if predictor.train(period='3y') is None:
+        raise SystemExit("Training failed")
+    predictor.save_model(model_path)
+    return predictor
+
+
+def main(argv=None):
+    """
+    Main entry point for running a backtest.
+    """
+    load_dotenv()
+    args = parse_args(argv)
+
+    thresholds = {
+        name: getattr(args, name)
+        for name in ('high_confidence', 'high_change', 'moderate_confidence', 'moderate_change')
+        if getattr(args, name) is not None
+    }
+
+    # The pipeline logs its progress to stderr; stdout carries the JSON result
+    configure_logging()
+    predictor = load_predictor(args)
+    df = predictor.data_collector.collect_data(period=args.period)
+
+    started = time.perf_counter()
+    backtester = Backtester(predictor, df)
+    prepared = time.perf_counter()
+
+    if args.sweep_change:
+        rows = []
+        for value in [float(v) for v in args.sweep_change.split(',')]:
+            result = backtester.run(
+                thresholds=dict(thresholds, moderate_change=value),
+                confidence=args.confidence, cost_bps=args.cost_bps, strength=args.strength
+            )
+            rows.append({'moderate_change': value, **result['summary']})
+        output = {'ticker': predictor.ticker, 'period': args.period, 'sweep': rows}
+    else:
+        result = backtester.run(
+            thresholds=thresholds, confidence=args.confidence,
+            cost_bps=args.cost_bps, strength=args.strength
+        )
+        series = result.pop('series')
+        if args.output:
+            series.to_csv(args.output, index_label='date')
+        output = result
+
+    output['timings'] = {
+        'predict_seconds': round(prepared - started, 4),
+        'rules_seconds': round(time.perf_counter() - prepared, 4)
+    }
+    print(json.dumps(output, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
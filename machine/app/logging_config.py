@@ -0,0 +1,116 @@
+"""
+Logging Setup
+Asynchronous, leveled logging shared by every entry point.
+
+Records are put on an in-memory queue by the calling thread and written
+by a single listener thread, so request and training threads never wait
+on stream I/O and lines from concurrent threads never interleave.
+
+Environment:
+    LOG_LEVEL     Root level, e.g. INFO (default) or DEBUG
+    LOG_LEVELS    Per-module levels, comma separated logger=LEVEL pairs, e.g.
+                  app.models.petr4.src.models.predictor=DEBUG,werkzeug=WARNING
+    LOG_FORMAT    Record format, defaults to LOG_FORMAT below
+"""
+
+import os
+import sys
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s'
+
+_queue_handler = None
+_output_handlers = []
+_listener = None
+
+
+def parse_levels(spec):
+    """
+    Parse 'logger=LEVEL,...' into {logger: level}.
+
+    Raises:
+        ValueError: For a malformed pair or an unknown level name
+    """
+    levels = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition('=')
+        level = level.strip().upper()
+        if not sep or not name.strip() or not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid log level setting: {item.strip()!r}")
+        levels[name.strip()] = level
+    return levels
+
+
+def _start_listener():
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, *_output_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork: a worker gets its own queue and thread
+    if _listener is not None:
+        _start_listener()
+
+
+def stop_logging():
+    """
+    Flush the queued records and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(level=None, module_levels=None, stream=None):
+    """
+    Route every log record through a queue to one writer thread.
+
+    Calling it again only updates the levels.
+
+    Args:
+        level (str): Root level, defaults to LOG_LEVEL or INFO
+        module_levels (dict): Logger name -> level, defaults to LOG_LEVELS
+        stream (file): Output stream, defaults to stderr
+
+    Returns:
+        QueueListener: The running listener
+    """
+    global _queue_handler
+
+    root = logging.getLogger()
+    root.setLevel((level or os.environ.get('LOG_LEVEL', 'INFO')).upper())
+    if module_levels is None:
+        module_levels = parse_levels(os.environ.get('LOG_LEVELS'))
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    if _listener is not None:
+        return _listener
+
+    if _queue_handler is None:
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(logging.Formatter(os.environ.get('LOG_FORMAT', LOG_FORMAT)))
+        _output_handlers.append(output)
+
+        # Handlers installed before (e.g. by basicConfig) would write synchronously
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        _queue_handler = QueueHandler(queue.SimpleQueue())
+        root.addHandler(_queue_handler)
+
+        atexit.register(stop_logging)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+    _start_listener()
+    return _listener
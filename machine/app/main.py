@@ -7,14 +7,18 @@ import os
 import logging
 from flask import Flask
 from flask_cors import CORS
-from .api.routes import api_bp
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Configure logging before routes builds (and logs) the model registry
+from .logging_config import configure_logging
+configure_logging()
+
+# Imported after load_dotenv: routes builds the prediction service from the environment
+from .api.routes import api_bp
+
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
@@ -48,6 +52,7 @@ def create_app():
             "status": "running",
             "endpoints": {
                 "health": "/health",
+                "metrics": "/metrics",
                 "prediction": "/predict",
                 "model_info": "/model/info",
                 "model_metrics": "/model/metrics",
@@ -76,8 +81,8 @@ def main():
     # Create app
     app = create_app()
     
-    logger.info(f"Starting PETR4 ML Prediction Server on {host}:{port}")
-    logger.info(f"Debug mode: {debug}")
+    logger.info("Starting PETR4 ML Prediction Server on %s:%s", host, port)
+    logger.info("Debug mode: %s", debug)
     
     # Run server
     app.run(
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from .predictor import recommendation_signals, RECOMMENDATION_THRESHOLDS
+
+TRADING_DAYS = 252
+
+
+class Backtester:
+	"""
+	Replays the recommendation rule of ``predict()`` over historical bars.
+
+	The model is run once over the whole feature matrix when the backtester
+	is built. Each ``run`` then only applies the rule and the P&L arithmetic
+	as numpy array operations, so thresholds can be swept cheaply.
+
+	A BUY (SELL) signal on day t holds a long (short) position over the close
+	to close return of day t+1. Bars up to the model's training cut-off are
+	in-sample and are reported separately from the out-of-sample ones.
+	"""
+
+	def __init__(self, predictor, df):
+			"""
+			Args:
+					predictor (StockPredictor): Trained predictor
+					df (pd.DataFrame): Collected market data to replay
+			"""
+			if predictor.best_model is None:
+					raise ValueError("Model not trained. Execute train() first.")
+
+			features_df = predictor.feature_engineer.create_features(df, include_latest=True)
+			X = features_df.drop('target', axis=1)[predictor.feature_columns]
+
+			self.ticker = predictor.ticker
+			self.model_name = predictor.best_model_name
+			self.index = X.index
+			self.price = df[predictor.ticker].loc[X.index].to_numpy(dtype=float)
+			self.predicted = np.asarray(predictor.best_model.predict(predictor._transform(X)), dtype=float)
+			self.change_pct = (self.predicted - self.price) / self.price * 100
+			self.confidence = predictor._overall_confidence()
+
+			# Return earned by holding from this bar's close to the next one
+			self.next_return = np.append(self.price[1:] / self.price[:-1] - 1, np.nan)
+
+			# Artifacts from before the cut-off was recorded cannot be split
+			self.train_end_date = predictor.train_end_date
+			if self.train_end_date is not None:
+					self.in_sample = np.asarray(self.index <= pd.Timestamp(self.train_end_date))
+			else:
+					self.in_sample = np.zeros(len(self.index), dtype=bool)
+
+	def run(self, thresholds=None, confidence=None, cost_bps=0.0, strength=1):
+			"""
+			Backtest the rule with the given thresholds.
+
+			Args:
+					thresholds (dict): Overrides for RECOMMENDATION_THRESHOLDS
+					confidence (float): Model confidence, defaults to the predictor's
+					cost_bps (float): Cost per unit of position change, in basis points
+					strength (int): Minimum signal strength traded (1 moderate, 2 high)
+
+			Returns:
+					dict: 'summary', 'out_of_sample' (None when the training cut-off is
+							unknown) and 'series' (a DataFrame with position, daily P&L,
+							equity and drawdown per bar)
+			"""
+			confidence = self.confidence if confidence is None else confidence
+			side, level = recommendation_signals(self.change_pct, confidence, thresholds)
+			position = np.where(level >= strength, side, 0).astype(float)
+
+			# The last bar has no next close yet: it can signal but not earn
+			returns = np.nan_to_num(self.next_return)
+			turnover = np.abs(np.diff(position, prepend=0.0))
+			pnl = position * returns - turnover * cost_bps / 10000
+
+			series = pd.DataFrame({
+					'price': self.price,
+					'predicted': self.predicted,
+					'change_pct': self.change_pct,
+					'position': position,
+					'pnl': pnl,
+					'equity': np.cumprod(1 + pnl),
+					'in_sample': self.in_sample
+			}, index=self.index)
+			series['drawdown'] = series['equity'] / series['equity'].cummax() - 1
+
+			out_of_sample = None
+			if self.train_end_date is not None:
+					mask = ~self.in_sample[:-1]
+					out_of_sample = self._summarize(position[:-1][mask], pnl[:-1][mask], self.next_return[:-1][mask])
+			
+			return {
+					'ticker': self.ticker,
+					'model_name': self.model_name,
+					'thresholds': dict(RECOMMENDATION_THRESHOLDS, **(thresholds or {})),
+					'confidence': float(confidence),
+					'cost_bps': cost_bps,
+					'summary': self._summarize(position[:-1], pnl[:-1], self.next_return[:-1]),
+					'train_end_date': str(self.train_end_date) if self.train_end_date is not None else None,
+					'out_of_sample': out_of_sample,
+					'series': series
+			}
+
+	@staticmethod
+	def _summarize(position, pnl, returns):
+			if len(pnl) == 0:
+					return {'days': 0}
+
+			equity = np.cumprod(1 + pnl)
+			drawdown = equity / np.maximum.accumulate(equity) - 1
+			traded = position != 0
+			hits = np.sign(returns[traded]) == position[traded]
+			volatility = pnl.std()
+
+			return {
+					'days': int(len(pnl)),
+					'trades': int(np.count_nonzero(np.diff(position, prepend=0.0))),
+					'days_in_market': int(traded.sum()),
+					'total_return': float(equity[-1] - 1),
+					'buy_and_hold_return': float(np.prod(1 + returns) - 1),
+					'hit_rate': float(hits.mean()) if traded.any() else None,
+					'max_drawdown': float(drawdown.min()),
+					'sharpe': float(pnl.mean() / volatility * np.sqrt(TRADING_DAYS)) if volatility > 0 else None
+			}
@@ -1,3 +1,7 @@
+import os
+import uuid
+import logging
+import threading
 import numpy as np
 import pandas as pd
 from datetime import datetime
@@ -5,6 +9,10 @@ from collections import deque
 import joblib
 import warnings
 
+import sklearn
+
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.ensemble import RandomForestRegressor
@@ -15,18 +23,199 @@ import lightgbm as lgb
 
 from ..utils.data_collector import DataCollector
 from ..utils.feature_engineer import FeatureEngineer
+from ..utils.feature_matrix import FeatureMatrix
+from ..utils.incremental_features import IncrementalFeatureState
+from ..utils.intraday_pipeline import IntradayPipeline
+from ..utils.metrics import timed
 
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# Bump whenever the artifact layout written by save_model changes
+MODEL_FORMAT_VERSION = 1
+
+# Thresholds of the BUY/SELL recommendation rule: a signal needs both the
+# model confidence and the absolute expected change (%) above the level's values
+RECOMMENDATION_THRESHOLDS = {
+	'high_confidence': 0.7,
+	'high_change': 1.0,
+	'moderate_confidence': 0.5,
+	'moderate_change': 0.5
+}
+
+# Nominal coverage of the prediction intervals
+INTERVAL_LEVELS = {'68%': 0.68, '95%': 0.95}
+
+# (side, strength) -> (recommendation, risk level)
+RECOMMENDATIONS = {
+	(1, 2): ("BUY HIGH CONFIDENCE", "LOW"),
+	(-1, 2): ("SELL HIGH CONFIDENCE", "LOW"),
+	(1, 1): ("BUY MODERATE", "MEDIUM"),
+	(-1, 1): ("SELL MODERATE", "MEDIUM"),
+	(0, 0): ("NEUTRAL/WAIT", "HIGH")
+}
+
+
+def recommendation_signals(change_pct, confidence, thresholds=None):
+	"""
+	Recommendation rule, vectorized over arrays of predictions.
+	
+	Args:
+			change_pct (array-like): Expected change in percent
+			confidence (array-like): Model confidence in [0, 1]
+			thresholds (dict): Overrides for RECOMMENDATION_THRESHOLDS
+			
+	Returns:
+			tuple: (side, strength) arrays; side is 1 buy, -1 sell, 0 neutral and
+					strength is 2 high confidence, 1 moderate, 0 none
+	"""
+	rules = dict(RECOMMENDATION_THRESHOLDS, **(thresholds or {}))
+	change_pct = np.asarray(change_pct, dtype=float)
+	confidence = np.asarray(confidence, dtype=float)
+	magnitude = np.abs(change_pct)
+	
+	strength = np.select(
+			[
+					(confidence > rules['high_confidence']) & (magnitude > rules['high_change']),
+					(confidence > rules['moderate_confidence']) & (magnitude > rules['moderate_change'])
+			],
+			[2, 1],
+			default=0
+	)
+	side = np.where(strength > 0, np.where(change_pct > 0, 1, -1), 0)
+	return side, strength
+
+
+def _fill_split(train, test):
+	"""
+	Fill NaNs with the train-column means (0 when the mean is not finite) and
+	replace infinities with 0, as pandas fillna(mean).fillna(0) + replace did.
+	
+	Blocks that are already finite are returned as they are, without a copy.
+	"""
+	if np.isfinite(train).all() and np.isfinite(test).all():
+			return [np.ascontiguousarray(train), np.ascontiguousarray(test)]
+	
+	with warnings.catch_warnings():
+			warnings.simplefilter('ignore', RuntimeWarning)
+			means = np.nanmean(train, axis=0)
+	means[~np.isfinite(means)] = 0
+	
+	filled = []
+	for block in (train, test):
+			block = np.where(np.isnan(block), means, block)
+			block[np.isinf(block)] = 0
+			filled.append(np.ascontiguousarray(block))
+	return filled
+
+
+def _prepare_split(X_values, y_values, split, scaler_types):
+	"""
+	Preprocess one walk-forward split for every scaler used by the candidates.
+	
+	Returns:
+			dict: Contiguous train/test arrays per scaler type (None = unscaled),
+					plus 'copies', the number of feature blocks allocated for the split
+	"""
+	train_start, train_end, test_start, test_end = split
+	X_train, X_test = _fill_split(X_values[train_start:train_end], X_values[test_start:test_end])
+	
+	prepared = {
+			'X_train': {None: X_train},
+			'X_test': {None: X_test},
+			'y_train': np.ascontiguousarray(y_values[train_start:train_end]),
+			'y_test': np.ascontiguousarray(y_values[test_start:test_end]),
+			'copies': sum(not np.may_share_memory(block, X_values) for block in (X_train, X_test))
+	}
+	
+	for scaler_type in scaler_types:
+			if scaler_type:
+					scaler = RobustScaler() if scaler_type == 'robust' else StandardScaler()
+					prepared['X_train'][scaler_type] = np.ascontiguousarray(scaler.fit_transform(X_train))
+					prepared['X_test'][scaler_type] = np.ascontiguousarray(scaler.transform(X_test))
+					prepared['copies'] += 2
+	
+	return prepared
+
 
-class PETR4Predictor:
-	def __init__(self):
+def _fit_split(model, scaler_type, split_data):
+	"""
+	Fit and score a fresh copy of model on one preprocessed walk-forward split.
+	
+	Module-level so joblib can ship it to worker processes.
+	"""
+	try:
+			y_train_cv = split_data['y_train']
+			y_test_cv = split_data['y_test']
+			
+			model_cv = clone(model)
+			model_cv.fit(split_data['X_train'][scaler_type], y_train_cv)
+			
+			y_pred = model_cv.predict(split_data['X_test'][scaler_type])
+			
+			if len(y_test_cv) > 1:
+					actual_dir = np.sign(np.diff(y_test_cv))
+					pred_dir = np.sign(np.diff(y_pred))
+					dir_acc = np.mean(actual_dir == pred_dir) if len(actual_dir) > 0 else 0.5
+			else:
+					dir_acc = 0.5
+			
+			return {
+					'r2': r2_score(y_test_cv, y_pred),
+					'rmse': np.sqrt(mean_squared_error(y_test_cv, y_pred)),
+					'mae': mean_absolute_error(y_test_cv, y_pred),
+					'dir_acc': dir_acc,
+					'predictions': y_pred.tolist(),
+					'actuals': y_test_cv.tolist(),
+					'train_size': len(y_train_cv)
+			}
+			
+	except Exception as e:
+			return {'error': str(e)}
+
+
+class StockPredictor:
+	"""
+	Next-day close predictor for one ticker.
+	
+	Args:
+			ticker (str): Asset name used for the target columns (e.g. 'VALE3')
+			symbol (str): Market symbol, defaults to the B3 symbol '<ticker>.SA'
+			provider (MarketDataProvider): Market data source
+			n_jobs (int): Worker processes for walk-forward CV (-1 = all cores)
+			store (MarketDataStore): Bar store, so several predictors can share one
+			horizons (tuple): Forecast horizons in trading days; 1 is the main model
+					and every other horizon gets its own direct model
+			feature_dtype (str): dtype of the feature matrix the models are fed;
+					'float32' halves its memory
+	"""
+	
+	def __init__(self, ticker='PETR4', symbol=None, provider=None, n_jobs=-1, store=None,
+							 horizons=(1, 5, 21), feature_dtype='float64'):
+			self.ticker = ticker
+			self.symbol = symbol or f"{ticker}.SA"
 			self.scalers = {}
 			self.models = {}
 			self.feature_columns = None
 			self.data = None
 			self.best_model = None
 			self.best_model_name = None
+			self.training_date = None
+			self.model_version = None
+			self.train_end_date = None
+			self.data_quality = {}
+			
+			# Direct models for the longer horizons: horizon -> fitted estimator,
+			# and horizon -> MAE on the held-out test slice
+			self.horizons = tuple(sorted(set(horizons) | {1}))
+			self.horizon_models = {}
+			self.horizon_errors = {}
+			
+			# Split-conformal interval half-widths as a fraction of the prediction,
+			# e.g. {'68%': 0.012, '95%': 0.031}, and their coverage on the test slice
+			self.interval_quantiles = {}
+			self.interval_calibration = {}
 			
 			self.error_history = deque(maxlen=100)
 			self.prediction_history = deque(maxlen=50)
@@ -42,11 +231,29 @@ class PETR4Predictor:
 					'max_splits': 20        # Maximum splits
 			}
 			
-			self.data_collector = DataCollector()
-			self.feature_engineer = FeatureEngineer()
+			# Worker processes for walk-forward CV (-1 = all cores)
+			self.n_jobs = n_jobs
+			
+			# Training features live in one contiguous buffer of this dtype;
+			# matrix_stats records its size and the blocks copied per split
+			self.feature_dtype = np.dtype(feature_dtype)
+			self.matrix_stats = {}
+			
+			# Preprocessed walk-forward splits, shared by every candidate model
+			self._split_cache_key = None
+			self._split_cache = None
+			
+			self.data_collector = DataCollector(
+					provider=provider, store=store, target=self.ticker, target_symbol=self.symbol
+			)
+			self.feature_engineer = FeatureEngineer(target=self.ticker)
+			
+			# Latest-bar indicator state, so predict() does not rebuild every feature
+			self.feature_state = None
+			self._feature_state_lock = threading.Lock()
 	
 	def train(self, period, include_intraday=False):
-			print("=== PETR4 ENHANCED MODEL - TRAINING PIPELINE ===")
+			logger.info("Training %s model on %s of data", self.ticker, period)
 			
 			try:
 					df = self.data_collector.collect_data(period, include_intraday)
@@ -55,50 +262,227 @@ class PETR4Predictor:
 					features_df = self.feature_engineer.create_features(df)
 					
 					features_df = self.feature_engineer.select_features(features_df, max_features=30)
+					matrix = FeatureMatrix.from_frame(
+							features_df, columns=self.feature_engineer.feature_columns, dtype=self.feature_dtype
+					)
+					# The buffer replaces the float64 frame for the rest of training
+					target_df = features_df[['target']]
+					del features_df
 					
-					results = self._train_with_cv(features_df)
+					results = self._train_with_cv(target_df, matrix)
+					self._train_horizon_models(matrix, df)
+					self.data_quality = self.data_collector.validate_data(df)
 					
 					return {
 							'training_results': results,
 							'model_saved': results['final_metrics']['r2'] > 0.4,
-							'data_quality': self.data_collector.validate_data(df),
+							'data_quality': self.data_quality,
 							'feature_info': self.feature_engineer.get_feature_info()
 					}
 					
 			except Exception as e:
-					print(f"ERROR in training pipeline: {e}")
-					import traceback
-					traceback.print_exc()
+					logger.exception("Training pipeline failed for %s: %s", self.ticker, e)
 					return None
 	
-	def _train_with_cv(self, features_df):
-			print("4. Training with Advanced Cross Validation...")
-			
-			X = features_df.drop('target', axis=1)
-			y = features_df['target']
-			
-			if len(X.columns) == 0:
-					raise ValueError("CRITICAL ERROR: No features available for training!")
-			
-			if len(X) < 50:
-					raise ValueError("CRITICAL ERROR: Insufficient data for training!")
-			
-			print(f"  Validation OK: {len(X.columns)} features, {len(X)} records")
-			
-			n = len(features_df)
-			train_end = int(0.7 * n)
-			val_end = int(0.85 * n)
-			
-			X_train = X.iloc[:train_end]
-			y_train = y.iloc[:train_end]
-			X_val = X.iloc[train_end:val_end]
-			y_val = y.iloc[train_end:val_end]
-			X_test = X.iloc[val_end:]
-			y_test = y.iloc[val_end:]
-			
-			print(f"  Data: Train={len(X_train)} | Val={len(X_val)} | Test={len(X_test)}")
+	def _train_with_cv(self, features_df, matrix=None):
+			"""
+			Select the model by walk-forward CV and fit it on the training slice.
+			
+			Args:
+					features_df (pd.DataFrame): 'target' column, plus the feature
+							columns when no matrix is given
+					matrix (FeatureMatrix): Feature buffer aligned with features_df;
+							when given, the frame's feature columns are not read
+			"""
+			try:
+					y = features_df['target']
+					if matrix is None:
+							matrix = FeatureMatrix.from_frame(features_df.drop('target', axis=1), dtype=self.feature_dtype)
+					
+					if len(matrix.columns) == 0:
+							raise ValueError("CRITICAL ERROR: No features available for training!")
+					
+					if len(matrix) < 50:
+							raise ValueError("CRITICAL ERROR: Insufficient data for training!")
+					
+					logger.debug("Validation OK: %d features, %d records", len(matrix.columns), len(matrix))
+					
+					n = len(matrix)
+					train_end = int(0.7 * n)
+					val_end = int(0.85 * n)
+					
+					y_train = y.iloc[:train_end]
+					y_test = y.iloc[val_end:]
+					
+					logger.debug("Data: train=%d, val=%d, test=%d", train_end, val_end - train_end, n - val_end)
+					
+					models_config = self._candidate_models()
+					
+					cv_results = {}
+					
+					# Every (model, split) pair is fitted in one parallel batch
+					model_specs = {name: (config['model'], config['scaler']) for name, config in models_config.items()}
+					cv_stats = self._walk_forward_cv_grid(matrix.rows(0, train_end), y_train, model_specs)
+					
+					for name, config in models_config.items():
+							try:
+									cv_result = cv_stats[name]
+									if isinstance(cv_result, Exception):
+											raise cv_result
+									
+									cv_results[name] = {
+											'cv_stats': cv_result,
+											'config': config,
+											'final_score': cv_result['mean_r2'] - cv_result['std_r2']
+									}
+									
+									logger.info(
+											"%s: CV R² %.4f ± %.4f, adjusted score %.4f",
+											name, cv_result['mean_r2'], cv_result['std_r2'], cv_results[name]['final_score']
+									)
+									
+							except Exception as e:
+									logger.warning("%s failed walk-forward CV: %s", name, e)
+									cv_results[name] = {
+											'cv_stats': {'mean_r2': 0, 'std_r2': 1},
+											'config': config,
+											'final_score': -999
+									}
+					
+					valid_models = {k: v for k, v in cv_results.items() if v['final_score'] > -900}
+					
+					if not valid_models:
+							logger.error("No candidate model worked, using simple Ridge as fallback")
+							fallback_model = Ridge(alpha=1.0, random_state=42)
+							cv_results = {
+									'Ridge_Fallback': {
+											'cv_stats': {'mean_r2': 0.1, 'std_r2': 0.1},
+											'config': {'model': fallback_model, 'scaler': 'robust'},
+											'final_score': 0.05
+									}
+							}
+							valid_models = cv_results
+					
+					best_model_name = max(valid_models.keys(), key=lambda k: valid_models[k]['final_score'])
+					best_config = valid_models[best_model_name]['config']
+					
+					logger.info("Best model by CV: %s", best_model_name)
+					
+					# Views of the training buffer unless NaN/inf had to be filled
+					X_train_filled, X_test_filled = _fill_split(matrix.values[:train_end], matrix.values[val_end:])
+					
+					if best_config['scaler']:
+							logger.debug("Applying scaling: %s", best_config['scaler'])
+							scaler = RobustScaler() if best_config['scaler'] == 'robust' else StandardScaler()
+							
+							try:
+									X_train_scaled = scaler.fit_transform(X_train_filled)
+									X_test_scaled = scaler.transform(X_test_filled)
+									self.scalers['final'] = scaler
+									
+							except Exception as e:
+									logger.warning("Scaling failed, using data without scaling: %s", e)
+									X_train_scaled = X_train_filled
+									X_test_scaled = X_test_filled
+					else:
+							X_train_scaled = X_train_filled
+							X_test_scaled = X_test_filled
+					
+					self.matrix_stats['final_copies'] = sum(
+							not np.may_share_memory(block, matrix.values) for block in (X_train_scaled, X_test_scaled)
+					)
+					
+					logger.debug("Final shape: train=%s, test=%s", X_train_scaled.shape, X_test_scaled.shape)
+					
+					if X_train_scaled.shape[1] == 0:
+							raise ValueError("FATAL ERROR: No features after processing!")
+					
+					if X_train_scaled.shape[0] < 10:
+							raise ValueError("FATAL ERROR: Few records after processing!")
+
+					final_model = best_config['model']
+					
+					try:
+							final_model.fit(X_train_scaled, y_train.values)
+					except Exception as e:
+							logger.warning("Final %s fit failed, trying simple Ridge: %s", best_model_name, e)
+							final_model = Ridge(alpha=1.0)
+							final_model.fit(X_train_scaled, y_train.values)
+							best_model_name = "Ridge_Emergency"
+
+					try:
+							test_pred = final_model.predict(X_test_scaled)
+					except Exception as e:
+							logger.warning("Test prediction failed, using the test mean: %s", e)
+							test_pred = np.full(len(y_test), y_test.mean())
+					
+					final_r2 = r2_score(y_test, test_pred)
+					final_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
+					final_mae = mean_absolute_error(y_test, test_pred)
+
+					if len(y_test) > 1:
+							try:
+									actual_dir = np.sign(np.diff(y_test.values))
+									pred_dir = np.sign(np.diff(test_pred))
+									dir_acc = np.mean(actual_dir == pred_dir) if len(actual_dir) > 0 else 0.5
+							except:
+									dir_acc = 0.5
+					else:
+							dir_acc = 0.5
+					
+					self.best_model = final_model
+					self.best_model_name = best_model_name
+					self.feature_columns = list(matrix.columns)
+					self.training_date = datetime.now().isoformat()
+					self.model_version = uuid.uuid4().hex
+					self.train_end_date = matrix.index[train_end - 1]
+					
+					detailed = cv_results.get(best_model_name, {}).get('cv_stats', {}).get('detailed_results')
+					self._calibrate_intervals(detailed, y_test.values, test_pred)
+
+					try:
+							for i, (actual, pred) in enumerate(zip(y_test.values, test_pred)):
+									self._error_adaptive_learning(actual, pred, best_model_name)
+					except:
+							logger.warning("Error initializing the adaptive system")
+					
+					logger.info(
+							"Final %s model: R² %.4f, RMSE %.4f, MAE %.4f, directional accuracy %.4f",
+							best_model_name, final_r2, final_rmse, final_mae, dir_acc
+					)
+					
+					if best_model_name in cv_results:
+							logger.info("CV stability: ±%.4f", cv_results[best_model_name]['cv_stats']['std_r2'])
+					
+					return {
+							'best_model': final_model,
+							'best_model_name': best_model_name,
+							'cv_results': cv_results,
+							'final_metrics': {
+									'r2': final_r2,
+									'rmse': final_rmse,
+									'mae': final_mae,
+									'dir_acc': dir_acc
+							},
+							'predictions': {
+									'y_test': y_test,
+									'test_pred': test_pred,
+									'X_test': matrix.rows(val_end).to_frame()
+							}
+					}
+			finally:
+					# Scaled split arrays are only needed while models are compared
+					self._split_cache_key = None
+					self._split_cache = None
+	
+	def _candidate_models(self):
+			"""
+			Fresh, unfitted candidate estimators compared by walk-forward CV.
 			
-			models_config = {
+			Returns:
+					dict: Name -> {'model': estimator, 'scaler': None or 'robust'}
+			"""
+			return {
 					'XGBoost': {
 							'model': xgb.XGBRegressor(
 									n_estimators=50,
@@ -149,193 +533,92 @@ class PETR4Predictor:
 							'scaler': 'robust'
 					}
 			}
-			
-			cv_results = {}
-			
-			print("\n Executing Walk-Forward CV for each model:")
-			print("-" * 60)
-			
-			for name, config in models_config.items():
-					print(f"\\n{name}:")
-					
-					try:
-							cv_result = self._walk_forward_cv(
-									X_train, y_train, 
-									config['model'], 
-									config['scaler']
-							)
-							
-							cv_results[name] = {
-									'cv_stats': cv_result,
-									'config': config,
-									'final_score': cv_result['mean_r2'] - cv_result['std_r2']
-							}
-							
-							print(f"  CV R²: {cv_result['mean_r2']:.4f} ± {cv_result['std_r2']:.4f}")
-							print(f"  Adjusted Score: {cv_results[name]['final_score']:.4f}")
-							
-					except Exception as e:
-							print(f"  ERROR in {name}: {str(e)[:60]}")
-							cv_results[name] = {
-									'cv_stats': {'mean_r2': 0, 'std_r2': 1},
-									'config': config,
-									'final_score': -999
-							}
-			
-			valid_models = {k: v for k, v in cv_results.items() if v['final_score'] > -900}
-			
-			if not valid_models:
-					print("ERROR: No model worked. Using simple Ridge as fallback.")
-					fallback_model = Ridge(alpha=1.0, random_state=42)
-					cv_results = {
-							'Ridge_Fallback': {
-									'cv_stats': {'mean_r2': 0.1, 'std_r2': 0.1},
-									'config': {'model': fallback_model, 'scaler': 'robust'},
-									'final_score': 0.05
-							}
+	
+	def _calibrate_intervals(self, cv_details, y_test, test_pred):
+			"""
+			Conformal interval widths from the walk-forward residuals of the best
+			model, checked against the held-out test slice.
+			
+			Residuals are relative to the prediction, so the widths carry over to
+			other price levels. The finite-sample quantile ceil((n+1)*level)/n
+			gives at least the nominal coverage when residuals are exchangeable.
+			"""
+			self.interval_quantiles = {}
+			self.interval_calibration = {}
+			if not cv_details or not cv_details.get('predictions'):
+					return
+			
+			predictions = np.asarray(cv_details['predictions'], dtype=float)
+			actuals = np.asarray(cv_details['actuals'], dtype=float)
+			scores = np.abs(actuals - predictions) / np.abs(predictions)
+			scores = scores[np.isfinite(scores)]
+			n = len(scores)
+			if n == 0:
+					return
+			
+			test_scores = np.abs(np.asarray(y_test) - test_pred) / np.abs(test_pred)
+			
+			for label, level in INTERVAL_LEVELS.items():
+					quantile = float(np.quantile(scores, min(1.0, np.ceil((n + 1) * level) / n)))
+					self.interval_quantiles[label] = quantile
+					self.interval_calibration[label] = {
+							'nominal': level,
+							'half_width_pct': quantile * 100,
+							'test_coverage': float(np.mean(test_scores <= quantile)) if len(test_scores) else None
 					}
-					valid_models = cv_results
-			
-			best_model_name = max(valid_models.keys(), key=lambda k: valid_models[k]['final_score'])
-			best_config = valid_models[best_model_name]['config']
-			
-			print(f"\\nBest model by CV: {best_model_name}")
-			
-			print("  Preparing data for final training...")
-			
-			X_train_filled = X_train.fillna(X_train.mean())
-			X_val_filled = X_val.fillna(X_train.mean())
-			X_test_filled = X_test.fillna(X_train.mean())
 			
-			if X_train_filled.isnull().any().any():
-					print("    WARNING: Still have NAs. Filling with zero.")
-					X_train_filled = X_train_filled.fillna(0)
-					X_val_filled = X_val_filled.fillna(0)
-					X_test_filled = X_test_filled.fillna(0)
-
-			X_train_filled = X_train_filled.replace([np.inf, -np.inf], 0)
-			X_val_filled = X_val_filled.replace([np.inf, -np.inf], 0)
-			X_test_filled = X_test_filled.replace([np.inf, -np.inf], 0)
-			
-			if best_config['scaler']:
-					print(f"    Applying scaling: {best_config['scaler']}")
-					scaler = RobustScaler() if best_config['scaler'] == 'robust' else StandardScaler()
+			self.interval_calibration['calibration_size'] = n
+			self.interval_calibration['test_size'] = int(len(test_scores))
+	
+	def _train_horizon_models(self, matrix, df):
+			"""
+			Fit one direct model per extra horizon, reusing the final model's
+			features, estimator settings, scaler and 70/15/15 split.
+			
+			The target for horizon h is the close h bars ahead, so a whole
+			forecast path comes from one feature row, with no recursive rollout.
+			Rows and targets come from the matrix buffer and its index.
+			"""
+			self.horizon_models = {}
+			self.horizon_errors = {}
+			
+			n = len(matrix)
+			train_end, val_end = int(0.7 * n), int(0.85 * n)
+			
+			_, X_filled = _fill_split(matrix.values[:train_end], matrix.values)
+			X_scaled = self.scalers['final'].transform(X_filled) if 'final' in self.scalers else X_filled
+			
+			price = df[self.ticker]
+			for horizon in self.horizons:
+					y = price.shift(-horizon).reindex(matrix.index).values
+					train_rows = np.arange(train_end)[~np.isnan(y[:train_end])]
+					test_rows = np.arange(val_end, n)[~np.isnan(y[val_end:])]
 					
-					try:
-							X_train_scaled = scaler.fit_transform(X_train_filled)
-							X_test_scaled = scaler.transform(X_test_filled)
-							self.scalers['final'] = scaler
-							
-					except Exception as e:
-							print(f"    ERROR in scaling: {e}. Using data without scaling.")
-							X_train_scaled = X_train_filled.values
-							X_test_scaled = X_test_filled.values
-			else:
-					X_train_scaled = X_train_filled.values
-					X_test_scaled = X_test_filled.values
-			
-			print(f"    Final shape: Train={X_train_scaled.shape}, Test={X_test_scaled.shape}")
-			
-			if X_train_scaled.shape[1] == 0:
-					raise ValueError("FATAL ERROR: No features after processing!")
-			
-			if X_train_scaled.shape[0] < 10:
-					raise ValueError("FATAL ERROR: Few records after processing!")
-
-			print("  Training final model...")
-			final_model = best_config['model']
-			
-			try:
-					final_model.fit(X_train_scaled, y_train.values)
-					print("    Training completed successfully!")
-			except Exception as e:
-					print(f"    ERROR in training: {e}")
-					print("    Trying with simple Ridge...")
-					final_model = Ridge(alpha=1.0)
-					final_model.fit(X_train_scaled, y_train.values)
-					best_model_name = "Ridge_Emergency"
-
-			try:
-					test_pred = final_model.predict(X_test_scaled)
-			except Exception as e:
-					print(f"    ERROR in prediction: {e}")
-					test_pred = np.full(len(y_test), y_test.mean())
-			
-			final_r2 = r2_score(y_test, test_pred)
-			final_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-			final_mae = mean_absolute_error(y_test, test_pred)
-
-			if len(y_test) > 1:
-					try:
-							actual_dir = np.sign(np.diff(y_test.values))
-							pred_dir = np.sign(np.diff(test_pred))
-							dir_acc = np.mean(actual_dir == pred_dir) if len(actual_dir) > 0 else 0.5
-					except:
-							dir_acc = 0.5
-			else:
-					dir_acc = 0.5
-			
-			self.best_model = final_model
-			self.best_model_name = best_model_name
-			self.feature_columns = X.columns.tolist()
-
-			try:
-					for i, (actual, pred) in enumerate(zip(y_test.values, test_pred)):
-							self._error_adaptive_learning(actual, pred, best_model_name)
-			except:
-					print("    WARNING: Error initializing adaptive system")
-			
-			print(f"\n FINAL RESULTS:")
-			print(f"Model: {best_model_name}")
-			print(f"Final R²: {final_r2:.4f}")
-			print(f"RMSE: {final_rmse:.4f}")
-			print(f"MAE: {final_mae:.4f}")
-			print(f"Directional Accuracy: {dir_acc:.4f}")
-			
-			if best_model_name in cv_results:
-					cv_std = cv_results[best_model_name]['cv_stats']['std_r2']
-					print(f"CV Stability: ±{cv_std:.4f}")
-			
-			return {
-					'best_model': final_model,
-					'best_model_name': best_model_name,
-					'cv_results': cv_results,
-					'final_metrics': {
-							'r2': final_r2,
-							'rmse': final_rmse,
-							'mae': final_mae,
-							'dir_acc': dir_acc
-					},
-					'predictions': {
-							'y_test': y_test,
-							'test_pred': test_pred,
-							'X_test': X_test
-					}
-			}
+					if horizon == 1:
+							model = self.best_model
+					else:
+							logger.debug("Training %d-day horizon model", horizon)
+							model = clone(self.best_model)
+							model.fit(X_scaled[train_rows], y[train_rows])
+							self.horizon_models[horizon] = model
+					
+					if len(test_rows) > 0:
+							self.horizon_errors[horizon] = float(
+									mean_absolute_error(y[test_rows], model.predict(X_scaled[test_rows]))
+							)
 	
 	def _walk_forward_cv(self, X, y, model, scaler_type=None):
-			print("3. Executing Walk-Forward Cross Validation...")
-			
-			n_samples = len(X)
+			return self._walk_forward_cv_grid(X, y, {'model': (model, scaler_type)})['model']
+	
+	def _walk_forward_splits(self, n_samples):
+			"""
+			Walk-forward (train_start, train_end, test_start, test_end) windows.
+			"""
 			min_train = self.cv_config['min_train_size']
 			test_size = self.cv_config['test_size']
 			step_size = self.cv_config['step_size']
 			purged_gap = self.cv_config['purged_gap']
 			
-			if n_samples < min_train + test_size + purged_gap:
-					print(f"  WARNING: Insufficient data for WF-CV ({n_samples} < {min_train + test_size + purged_gap})")
-					return self._fallback_cv(X, y, model, scaler_type)
-			
-			cv_results = {
-					'r2_scores': [],
-					'rmse_scores': [],
-					'mae_scores': [],
-					'dir_acc_scores': [],
-					'predictions': [],
-					'actuals': [],
-					'train_sizes': []
-			}
-			
 			splits = []
 			for start in range(0, n_samples - min_train - test_size, step_size):
 					train_end = start + min_train
@@ -348,61 +631,128 @@ class PETR4Predictor:
 					if len(splits) >= self.cv_config['max_splits']:
 							break
 			
-			print(f"  Configured {len(splits)} walk-forward splits")
+			return splits
+	
+	def _walk_forward_cv_grid(self, X, y, model_specs):
+			"""
+			Walk-forward CV for several models at once.
+			
+			The whole (model, split) grid is dispatched to a joblib pool of n_jobs
+			workers; results come back in submission order, so the outcome does not
+			depend on the number of workers.
+			
+			Args:
+					X (pd.DataFrame): Training features
+					y (pd.Series): Training target
+					model_specs (dict): Name -> (estimator, scaler_type)
+					
+			Returns:
+					dict: Name -> CV summary (or the Exception raised by its fallback)
+			"""
+			n_samples = len(X)
+			min_required = self.cv_config['min_train_size'] + self.cv_config['test_size'] + self.cv_config['purged_gap']
+			
+			if n_samples < min_required:
+					logger.warning("Insufficient data for walk-forward CV (%d < %d), using the fallback", n_samples, min_required)
+					X = X.to_frame() if isinstance(X, FeatureMatrix) else X
+					return self._fallback_cv_all(X, y, model_specs)
+			
+			splits = self._walk_forward_splits(n_samples)
+			logger.info("Walk-forward CV: %d splits, %d models, n_jobs=%s", len(splits), len(model_specs), self.n_jobs)
+			
+			scaler_types = {scaler_type for _, scaler_type in model_specs.values()}
+			prepared = self._prepare_splits(X, y, splits, scaler_types)
+			
+			tasks = [
+					(name, i, model, scaler_type)
+					for name, (model, scaler_type) in model_specs.items()
+					for i in range(len(splits))
+			]
+			
+			outputs = Parallel(n_jobs=self.n_jobs)(
+					delayed(_fit_split)(model, scaler_type, prepared[i])
+					for name, i, model, scaler_type in tasks
+			)
+			
+			split_outputs = {name: [] for name in model_specs}
+			for (name, i, _, _), output in zip(tasks, outputs):
+					split_outputs[name].append((i, output))
+			
+			summaries = {}
+			for name, (model, scaler_type) in model_specs.items():
+					summary = self._summarize_cv(split_outputs[name], len(splits))
+					if summary is None:
+							summary = self._fallback_cv_all(X, y, {name: (model, scaler_type)})[name]
+					summaries[name] = summary
+			
+			return summaries
+	
+	def _prepare_splits(self, X, y, splits, scaler_types):
+			"""
+			Fill/scale every split once per (data, cv_config) and reuse the result.
+			
+			Scaled variants missing from the cache (a scaler type not requested
+			before) are added without recomputing the existing ones.
+			"""
+			matrix = FeatureMatrix.wrap(X, dtype=self.feature_dtype)
+			X_values = matrix.values
+			y_values = y.to_numpy(dtype=np.float64)
+			key = (
+					joblib.hash((X_values, y_values, matrix.columns)),
+					tuple(sorted(self.cv_config.items()))
+			)
+			
+			if self._split_cache_key != key:
+					self._split_cache = [_prepare_split(X_values, y_values, split, scaler_types) for split in splits]
+					self._split_cache_key = key
+			else:
+					missing = {t for t in scaler_types if t not in self._split_cache[0]['X_train']}
+					if missing:
+							for i, split in enumerate(splits):
+									extra = _prepare_split(X_values, y_values, split, missing)
+									self._split_cache[i]['X_train'].update(extra['X_train'])
+									self._split_cache[i]['X_test'].update(extra['X_test'])
+									self._split_cache[i]['copies'] += 2 * len(missing)
+			
+			self.matrix_stats.update({
+					'dtype': X_values.dtype.name,
+					'shape': list(X_values.shape),
+					'nbytes': int(X_values.nbytes),
+					'copies_per_split': [prepared['copies'] for prepared in self._split_cache]
+			})
+			return self._split_cache
+	
+	def _summarize_cv(self, split_outputs, n_splits):
+			cv_results = {
+					'r2_scores': [],
+					'rmse_scores': [],
+					'mae_scores': [],
+					'dir_acc_scores': [],
+					'predictions': [],
+					'actuals': [],
+					'train_sizes': []
+			}
 			
-			for i, (train_start, train_end, test_start, test_end) in enumerate(splits):
-					try:
-							X_train_cv = X.iloc[train_start:train_end]
-							y_train_cv = y.iloc[train_start:train_end]
-							X_test_cv = X.iloc[test_start:test_end]
-							y_test_cv = y.iloc[test_start:test_end]
-
-							X_train_filled = X_train_cv.fillna(X_train_cv.mean()).fillna(0)
-							X_test_filled = X_test_cv.fillna(X_train_cv.mean()).fillna(0)
-							
-							X_train_filled = X_train_filled.replace([np.inf, -np.inf], 0)
-							X_test_filled = X_test_filled.replace([np.inf, -np.inf], 0)
-							
-							if scaler_type:
-									scaler = RobustScaler() if scaler_type == 'robust' else StandardScaler()
-									X_train_scaled = scaler.fit_transform(X_train_filled)
-									X_test_scaled = scaler.transform(X_test_filled)
-							else:
-									X_train_scaled = X_train_filled.values
-									X_test_scaled = X_test_filled.values
-							
-							model_cv = self._clone_model(model)
-							model_cv.fit(X_train_scaled, y_train_cv.values)
-
-							y_pred = model_cv.predict(X_test_scaled)
-
-							r2 = r2_score(y_test_cv, y_pred)
-							rmse = np.sqrt(mean_squared_error(y_test_cv, y_pred))
-							mae = mean_absolute_error(y_test_cv, y_pred)
-							
-							if len(y_test_cv) > 1:
-									actual_dir = np.sign(np.diff(y_test_cv.values))
-									pred_dir = np.sign(np.diff(y_pred))
-									dir_acc = np.mean(actual_dir == pred_dir) if len(actual_dir) > 0 else 0.5
-							else:
-									dir_acc = 0.5
-							
-							cv_results['r2_scores'].append(r2)
-							cv_results['rmse_scores'].append(rmse)
-							cv_results['mae_scores'].append(mae)
-							cv_results['dir_acc_scores'].append(dir_acc)
-							cv_results['predictions'].extend(y_pred.tolist())
-							cv_results['actuals'].extend(y_test_cv.tolist())
-							cv_results['train_sizes'].append(len(X_train_cv))
-							
-							print(f"    Split {i+1}/{len(splits)}: R²={r2:.3f}, RMSE={rmse:.3f}, Dir={dir_acc:.3f}")
-							
-					except Exception as e:
-							print(f"    Split {i+1} ERROR: {str(e)[:50]}")
+			for i, output in split_outputs:
+					if 'error' in output:
+							logger.warning("Split %d failed: %s", i + 1, output['error'])
 							continue
+					
+					cv_results['r2_scores'].append(output['r2'])
+					cv_results['rmse_scores'].append(output['rmse'])
+					cv_results['mae_scores'].append(output['mae'])
+					cv_results['dir_acc_scores'].append(output['dir_acc'])
+					cv_results['predictions'].extend(output['predictions'])
+					cv_results['actuals'].extend(output['actuals'])
+					cv_results['train_sizes'].append(output['train_size'])
+					
+					logger.debug(
+							"Split %d/%d: R²=%.3f, RMSE=%.3f, Dir=%.3f",
+							i + 1, n_splits, output['r2'], output['rmse'], output['dir_acc']
+					)
 			
 			if len(cv_results['r2_scores']) == 0:
-					return self._fallback_cv(X, y, model, scaler_type)
+					return None
 			
 			results_summary = {
 					'mean_r2': np.mean(cv_results['r2_scores']),
@@ -414,14 +764,20 @@ class PETR4Predictor:
 					'detailed_results': cv_results
 			}
 			
-			print(f"  WF-CV Complete: R²={results_summary['mean_r2']:.4f}±{results_summary['std_r2']:.4f}")
+			logger.debug("Walk-forward CV complete: R²=%.4f±%.4f", results_summary['mean_r2'], results_summary['std_r2'])
 			
 			return results_summary
 	
+	def _fallback_cv_all(self, X, y, model_specs):
+			return {
+					name: self._fallback_cv(X, y, model, scaler_type)
+					for name, (model, scaler_type) in model_specs.items()
+			}
+	
 	def _fallback_cv(self, X, y, model, scaler_type=None):
 			from sklearn.model_selection import cross_val_score
 			
-			print("  Using TimeSeriesSplit fallback...")
+			logger.debug("Using TimeSeriesSplit fallback")
 			
 			try:
 					X_filled = X.fillna(X.mean())
@@ -448,7 +804,7 @@ class PETR4Predictor:
 					}
 					
 			except Exception as e:
-					print(f"  ERROR in fallback CV: {e}")
+					logger.warning("Fallback CV failed: %s", e)
 					return {
 							'mean_r2': 0,
 							'std_r2': 1,
@@ -458,17 +814,6 @@ class PETR4Predictor:
 							'mean_dir_acc': 0.5
 					}
 	
-	def _clone_model(self, model):
-			from copy import deepcopy
-			try:
-					return deepcopy(model)
-			except:
-					model_type = type(model)
-					if hasattr(model, 'get_params'):
-							return model_type(**model.get_params())
-					else:
-							return model_type()
-	
 	def _error_adaptive_learning(self, y_true, y_pred, model_name):
 			current_error = {
 					'mae': mean_absolute_error([y_true], [y_pred]),
@@ -507,34 +852,323 @@ class PETR4Predictor:
 			
 			return current_error
 	
-	def predict(self):
+	def save_model(self, path):
+			"""
+			Persist the trained model as a versioned joblib artifact.
+			
+			The artifact is written uncompressed so numpy payloads (tree arrays,
+			coefficients, scaler statistics) can be memory-mapped by load_model.
+			
+			Args:
+					path (str): Artifact file path
+					
+			Returns:
+					bool: True when the artifact was written
+			"""
 			if self.best_model is None:
 					raise ValueError("Model not trained. Execute train() first.")
 			
-			print("6. Generating prediction with confidence analysis...")
+			artifact = {
+					'format_version': MODEL_FORMAT_VERSION,
+					'library_versions': self._library_versions(),
+					'ticker': self.ticker,
+					'training_date': self.training_date,
+					'model_version': self.model_version,
+					'train_end_date': self.train_end_date,
+					'horizon_models': self.horizon_models,
+					'horizon_errors': self.horizon_errors,
+					'interval_quantiles': self.interval_quantiles,
+					'interval_calibration': self.interval_calibration,
+					'feature_dtype': self.feature_dtype.name,
+					'model_name': self.best_model_name,
+					'model': self.best_model,
+					'scaler': self.scalers.get('final'),
+					'feature_columns': self.feature_columns,
+					'cv_config': self.cv_config,
+					'performance_tracker': self.performance_tracker,
+					'adaptive_weights': self.adaptive_weights,
+					'error_history': list(self.error_history),
+					'data_quality': self.data_quality
+			}
 			
-			latest_df = self.data_collector.collect_data(period='1y')
-			features_df = self.feature_engineer.create_features(latest_df)
+			directory = os.path.dirname(path)
+			if directory:
+					os.makedirs(directory, exist_ok=True)
 			
-			X_latest = features_df.drop('target', axis=1).iloc[-1:][self.feature_columns]
+			# Write then rename, so readers never see a half-written artifact
+			tmp_path = f"{path}.{os.getpid()}.tmp"
+			joblib.dump(artifact, tmp_path)
+			os.replace(tmp_path, path)
 			
-			X_latest_filled = X_latest.fillna(X_latest.mean()).fillna(0)
-			X_latest_filled = X_latest_filled.replace([np.inf, -np.inf], 0)
+			logger.info("Model saved to %s", path)
+			return True
+	
+	def load_model(self, path):
+			"""
+			Load a model artifact written by save_model.
 			
-			if 'final' in self.scalers:
-					X_latest_scaled = self.scalers['final'].transform(X_latest_filled)
-			else:
-					X_latest_scaled = X_latest_filled.values
+			Numpy payloads are memory-mapped read-only instead of copied, so loading
+			is fast and the pages are shared between processes using the same file.
 			
+			Args:
+					path (str): Artifact file path
+					
+			Returns:
+					bool: True when a compatible artifact was loaded
+			"""
 			try:
-					prediction = self.best_model.predict(X_latest_scaled)[0]
+					artifact = joblib.load(path, mmap_mode='r')
 			except Exception as e:
-					print(f"ERROR in prediction: {e}")
-
-					current_price = latest_df['PETR4'].iloc[-1]
+					logger.error("Error loading model artifact %s: %s", path, e)
+					return False
+			
+			if not isinstance(artifact, dict) or artifact.get('format_version') != MODEL_FORMAT_VERSION:
+					logger.warning("Incompatible model artifact %s: unknown format version", path)
+					return False
+			
+			current_versions = self._library_versions()
+			for library, version in artifact.get('library_versions', {}).items():
+					if self._minor_version(version) != self._minor_version(current_versions.get(library)):
+							logger.warning(
+									"Incompatible model artifact %s: %s %s != %s", path, library, version, current_versions.get(library)
+							)
+							return False
+			
+			if artifact.get('ticker', 'PETR4') != self.ticker:
+					logger.warning(
+							"Incompatible model artifact %s: trained for %s, not %s", path, artifact.get('ticker'), self.ticker
+					)
+					return False
+			
+			self.best_model = artifact['model']
+			self.best_model_name = artifact['model_name']
+			self.scalers = {'final': artifact['scaler']} if artifact['scaler'] is not None else {}
+			self.feature_columns = artifact['feature_columns']
+			self.feature_engineer.feature_columns = artifact['feature_columns']
+			self.cv_config = artifact['cv_config']
+			self.performance_tracker = artifact['performance_tracker']
+			self.adaptive_weights = artifact['adaptive_weights']
+			self.error_history = deque(artifact['error_history'], maxlen=self.error_history.maxlen)
+			self.training_date = artifact['training_date']
+			self.model_version = artifact.get('model_version', artifact['training_date'])
+			self.train_end_date = artifact.get('train_end_date')
+			self.horizon_models = artifact.get('horizon_models', {})
+			self.horizon_errors = artifact.get('horizon_errors', {})
+			self.horizons = tuple(sorted({1} | set(self.horizon_models)))
+			self.interval_quantiles = artifact.get('interval_quantiles', {})
+			self.interval_calibration = artifact.get('interval_calibration', {})
+			self.feature_dtype = np.dtype(artifact.get('feature_dtype', 'float64'))
+			self.data_quality = artifact['data_quality']
+			
+			return True
+	
+	@staticmethod
+	def _library_versions():
+			return {
+					'numpy': np.__version__,
+					'scikit-learn': sklearn.__version__,
+					'xgboost': xgb.__version__,
+					'lightgbm': lgb.__version__
+			}
+	
+	@staticmethod
+	def _minor_version(version):
+			return '.'.join(str(version).split('.')[:2])
+	
+	def predict(self, latest_df=None):
+			if self.best_model is None:
+					raise ValueError("Model not trained. Execute train() first.")
+			
+			if latest_df is None:
+					latest_df = self.data_collector.collect_data(period='1y')
+			with timed('features'):
+					X_latest = self._latest_features(latest_df)
+			return self._predict_row(X_latest, latest_df[self.ticker].iloc[-1], latest_df.index[-1])
+	
+	def predict_from_state(self):
+			"""
+			Predict from the incremental feature state as it is now.
+			
+			Used with an intraday pipeline, which keeps the state on the running
+			session, so predictions refresh every bar without collecting data.
+			"""
+			if self.best_model is None:
+					raise ValueError("Model not trained. Execute train() first.")
+			
+			with self._feature_state_lock:
+					state = self.feature_state
+					if state is None or not state.supports(self.feature_columns):
+							raise ValueError("Feature state is not primed, start an intraday pipeline first")
+					X_latest = state.latest_frame(self.feature_columns)
+					current_price = state.prices[-1]
+					current_date = state.last_timestamp
+			
+			return self._predict_row(X_latest, current_price, current_date)
+	
+	def start_intraday_pipeline(self, df=None, on_update=None):
+			"""
+			Prime the feature state with daily history and return a pipeline that
+			moves it along with intraday bars.
+			
+			Args:
+					df (pd.DataFrame): Daily market data, collected when not given
+					on_update (callable): Called with the pipeline after every bar
+					
+			Returns:
+					IntradayPipeline: Feed it bars with push(), process() or run()
+			"""
+			if df is None:
+					df = self.data_collector.collect_data(period='1y')
+			
+			with self._feature_state_lock:
+					if self.feature_state is None or not self.feature_state.can_extend(df):
+							self.feature_state = IncrementalFeatureState(target=self.ticker)
+					self.feature_state.update_frame(df)
+					state = self.feature_state
+			
+			return IntradayPipeline(
+					state, df.iloc[-1].to_dict(), target=self.ticker,
+					lock=self._feature_state_lock, on_update=on_update
+			)
+	
+	def _predict_row(self, X_latest, current_price, current_date):
+			with timed('scaling'):
+					X_latest_scaled = self._transform(X_latest)
+			
+			try:
+					with timed('inference'):
+							prediction = self.best_model.predict(X_latest_scaled)[0]
+			except Exception as e:
+					logger.error("Prediction failed, using the current price: %s", e)
 					prediction = current_price * 1.001
 			
-			if self.best_model_name in self.performance_tracker:
+			result = self._describe_prediction(prediction, current_price, current_date)
+			with timed('forecast_path'):
+					result['forecast_path'] = self._forecast_path(X_latest_scaled, prediction, current_price, current_date)
+			return result
+	
+	def _forecast_path(self, X_scaled, next_day_prediction, current_price, current_date):
+			"""
+			Forecast for every horizon from the same scaled feature row.
+			
+			Step intervals use the horizon's test MAE: 68% = one MAE, 95% = two.
+			The next-day step uses the conformal widths when they were calibrated.
+			
+			Returns:
+					list: One dict per horizon with date, prediction and intervals
+			"""
+			path = []
+			for horizon in self.horizons:
+					if horizon == 1:
+							prediction = next_day_prediction
+					elif horizon in self.horizon_models:
+							prediction = self.horizon_models[horizon].predict(X_scaled)[0]
+					else:
+							continue
+					
+					error = self.horizon_errors.get(horizon, abs(prediction) * 0.025 * np.sqrt(horizon))
+					half_95, half_68 = 2 * error, error
+					if horizon == 1 and self.interval_quantiles:
+							half_95 = abs(prediction) * self.interval_quantiles['95%']
+							half_68 = abs(prediction) * self.interval_quantiles['68%']
+					path.append({
+							'horizon': horizon,
+							'date': (current_date + pd.offsets.BDay(horizon)).strftime('%Y-%m-%d'),
+							'prediction': prediction,
+							'change_percentage': (prediction - current_price) / current_price * 100,
+							'confidence_intervals': {
+									'95%': {'lower': prediction - half_95, 'upper': prediction + half_95},
+									'68%': {'lower': prediction - half_68, 'upper': prediction + half_68}
+							}
+					})
+			return path
+	
+	def predict_batch(self, dates, df=None):
+			"""
+			Predictions as of several dates with a single estimator call.
+			
+			Features are built once for the whole history and the rows for every
+			requested date are stacked, so the model predicts them in one call.
+			
+			Args:
+					dates (list): As-of dates; each uses the last bar on or before it
+					df (pd.DataFrame): Collected market data, fetched when not given
+					
+			Returns:
+					list: One result per date, in request order. Each is the predict()
+							result plus 'as_of', or {'as_of', 'error'} when the date has no
+							usable bar.
+			"""
+			if self.best_model is None:
+					raise ValueError("Model not trained. Execute train() first.")
+			
+			if df is None:
+					df = self.data_collector.collect_data(period='1y')
+			
+			features_df = self.feature_engineer.create_features(df, include_latest=True)
+			X_all = features_df.drop('target', axis=1)[self.feature_columns]
+			
+			positions = []
+			for date in dates:
+					position = X_all.index.searchsorted(pd.Timestamp(date), side='right') - 1
+					positions.append(position if position >= 0 else None)
+			
+			valid = sorted({position for position in positions if position is not None})
+			predictions = {}
+			if valid:
+					X_batch = X_all.iloc[valid]
+					predictions = dict(zip(valid, self.best_model.predict(self._transform(X_batch))))
+			
+			results = []
+			for date, position in zip(dates, positions):
+					if position is None:
+							results.append({'as_of': str(date), 'error': 'No market data on or before this date'})
+							continue
+					
+					bar_date = X_all.index[position]
+					result = self._describe_prediction(predictions[position], df[self.ticker].loc[bar_date], bar_date)
+					result['as_of'] = bar_date.strftime('%Y-%m-%d')
+					results.append(result)
+			
+			return results
+	
+	def _transform(self, X):
+			"""
+			Fill and scale feature rows the way training did.
+			
+			Rows are filled independently, so a row gets the same values whether it
+			is predicted alone or stacked with others.
+			"""
+			X_filled = X.fillna(0).replace([np.inf, -np.inf], 0).to_numpy(dtype=self.feature_dtype)
+			
+			if 'final' in self.scalers:
+					return self.scalers['final'].transform(X_filled)
+			return X_filled
+	
+	def _overall_confidence(self):
+			"""
+			Model confidence from its adaptive weight and recent direction accuracy.
+			"""
+			model_performance = self.adaptive_weights.get(self.best_model_name, 0.5)
+			
+			if len(self.error_history) > 5:
+					recent_direction_accuracy = np.mean([
+							1 - error['error']['direction_error'] 
+							for error in list(self.error_history)[-10:]
+					])
+			else:
+					recent_direction_accuracy = 0.5
+			
+			return (model_performance + recent_direction_accuracy) / 2
+	
+	def _describe_prediction(self, prediction, current_price, current_date):
+			"""
+			Confidence intervals, direction and recommendation for one prediction.
+			"""
+			if self.interval_quantiles:
+					confidence_95 = abs(prediction) * self.interval_quantiles['95%']
+					confidence_68 = abs(prediction) * self.interval_quantiles['68%']
+			elif self.best_model_name in self.performance_tracker:
 					tracker = self.performance_tracker[self.best_model_name]
 					if tracker['total_predictions'] > 0:
 							avg_error = tracker['total_mae'] / tracker['total_predictions']
@@ -552,8 +1186,6 @@ class PETR4Predictor:
 			lower_68 = prediction - confidence_68
 			upper_68 = prediction + confidence_68
 			
-			current_price = latest_df['PETR4'].iloc[-1]
-			current_date = latest_df.index[-1]
 			next_date = current_date + pd.Timedelta(days=1)
 			
 			while next_date.weekday() >= 5:
@@ -562,17 +1194,7 @@ class PETR4Predictor:
 			change_abs = prediction - current_price
 			change_pct = (change_abs / current_price) * 100
 			
-			model_performance = self.adaptive_weights.get(self.best_model_name, 0.5)
-			
-			if len(self.error_history) > 5:
-					recent_direction_accuracy = np.mean([
-							1 - error['error']['direction_error'] 
-							for error in list(self.error_history)[-10:]
-					])
-			else:
-					recent_direction_accuracy = 0.5
-			
-			overall_confidence = (model_performance + recent_direction_accuracy) / 2
+			overall_confidence = self._overall_confidence()
 			
 			if change_pct > 1.0:
 					movement = "UPWARD"
@@ -580,24 +1202,9 @@ class PETR4Predictor:
 					movement = "DOWNWARD"
 			else:
 					movement = "SIDEWAYS"
-
-			if overall_confidence > 0.7 and abs(change_pct) > 1.0:
-					if change_pct > 0:
-							recommendation = "BUY HIGH CONFIDENCE"
-							risk_level = "LOW"
-					else:
-							recommendation = "SELL HIGH CONFIDENCE"
-							risk_level = "LOW"
-			elif overall_confidence > 0.5 and abs(change_pct) > 0.5:
-					if change_pct > 0:
-							recommendation = "BUY MODERATE"
-							risk_level = "MEDIUM"
-					else:
-							recommendation = "SELL MODERATE"
-							risk_level = "MEDIUM"
-			else:
-					recommendation = "NEUTRAL/WAIT"
-					risk_level = "HIGH"
+			
+			side, strength = recommendation_signals(change_pct, overall_confidence)
+			recommendation, risk_level = RECOMMENDATIONS[(int(side), int(strength))]
 			
 			return {
 					'prediction': prediction,
@@ -617,6 +1224,25 @@ class PETR4Predictor:
 					'timestamp': datetime.now().isoformat()
 			}
 	
+	def _latest_features(self, df):
+			"""
+			Feature row for the most recent bar of df.
+			
+			Served from the incremental feature state, which only consumes the bars
+			it has not seen yet. Falls back to the batch path when the state cannot
+			produce every selected column.
+			"""
+			with self._feature_state_lock:
+					if self.feature_state is None or not self.feature_state.can_extend(df):
+							self.feature_state = IncrementalFeatureState(target=self.ticker)
+					self.feature_state.update_frame(df)
+					
+					if self.feature_state.supports(self.feature_columns):
+							return self.feature_state.latest_frame(self.feature_columns)
+			
+			features_df = self.feature_engineer.create_features(df, include_latest=True)
+			return features_df.drop('target', axis=1).iloc[-1:][self.feature_columns]
+	
 	def get_model_info(self):
 			if self.best_model is None:
 					return {"error": "Model not trained yet"}
@@ -633,12 +1259,19 @@ class PETR4Predictor:
 			
 			feature_info = self.feature_engineer.get_feature_info()
 			
-			data_quality = self.data_collector.validate_data(self.data) if self.data is not None else {}
+			data_quality = self.data_collector.validate_data(self.data) if self.data is not None else self.data_quality
 			
 			return {
+					'ticker': self.ticker,
+					'horizons': list(self.horizons),
+					'horizon_errors': self.horizon_errors,
+					'interval_quantiles': self.interval_quantiles,
+					'interval_calibration': self.interval_calibration,
+					'feature_dtype': self.feature_dtype.name,
+					'matrix_stats': self.matrix_stats,
 					'model_name': self.best_model_name,
 					'model_type': type(self.best_model).__name__,
-					'training_date': datetime.now().isoformat(),
+					'training_date': self.training_date or datetime.now().isoformat(),
 					'feature_count': len(self.feature_columns) if self.feature_columns else 0,
 					'feature_columns': self.feature_columns,
 					'performance_metrics': performance_info,
@@ -647,4 +1280,13 @@ class PETR4Predictor:
 					'feature_info': feature_info,
 					'data_quality': data_quality,
 					'cv_config': self.cv_config
-			}
\ No newline at end of file
+			}
+
+
+class PETR4Predictor(StockPredictor):
+	"""
+	StockPredictor for PETR4, the asset the service was originally built for.
+	"""
+	
+	def __init__(self, provider=None, n_jobs=-1, store=None):
+			super().__init__('PETR4', 'PETR4.SA', provider=provider, n_jobs=n_jobs, store=store)
@@ -0,0 +1,99 @@
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class DataSourceMonitor:
+	"""
+	Checks the market data source on a background thread and keeps the last
+	result, so health probes never wait on the network.
+
+	The refresher starts on the first ``snapshot()`` call, which keeps it in the
+	process that actually serves requests.
+	"""
+
+	def __init__(self, check, interval=60, stale_after=None):
+			"""
+			Args:
+					check (callable): Returns the latest price, or a falsy value when the
+							source has no data. Exceptions count as errors.
+					interval (float): Seconds between checks
+					stale_after (float): Age after which a result is reported as stale,
+							defaults to three intervals
+			"""
+			self.check = check
+			self.interval = interval
+			self.stale_after = stale_after if stale_after is not None else 3 * interval
+			self._lock = threading.Lock()
+			self._stop = threading.Event()
+			self._thread = None
+			self._status = 'pending'
+			self._error = None
+			self._checked_at = None
+			self._checked_monotonic = None
+			self._last_success_at = None
+
+	def start(self):
+			with self._lock:
+					if self._thread is not None and self._thread.is_alive():
+							return
+					self._stop.clear()
+					self._thread = threading.Thread(target=self._run, name='data-source-monitor', daemon=True)
+					self._thread.start()
+
+	def stop(self):
+			self._stop.set()
+
+	def _run(self):
+			while not self._stop.is_set():
+					self.refresh()
+					self._stop.wait(self.interval)
+
+	def refresh(self):
+			"""
+			Run one check and record its result.
+			"""
+			try:
+					status = 'available' if self.check() else 'unavailable'
+					error = None
+			except Exception as e:
+					logger.warning("Data source check failed: %s", e)
+					status, error = 'error', str(e)
+
+			now = datetime.now().isoformat()
+			with self._lock:
+					self._status = status
+					self._error = error
+					self._checked_at = now
+					self._checked_monotonic = time.monotonic()
+					if status == 'available':
+							self._last_success_at = now
+
+	def snapshot(self):
+			"""
+			Last recorded result, without running a check.
+
+			Returns:
+					dict: data_access status, cache age and timestamps
+			"""
+			self.start()
+			with self._lock:
+					age = None
+					status = self._status
+					if self._checked_monotonic is not None:
+							age = time.monotonic() - self._checked_monotonic
+							if age > self.stale_after:
+									status = 'stale'
+
+					result = {
+							"data_access": status,
+							"cache_age_seconds": round(age, 3) if age is not None else None,
+							"last_checked": self._checked_at,
+							"last_successful_fetch": self._last_success_at
+					}
+					if self._error:
+							result["error"] = self._error
+					return result
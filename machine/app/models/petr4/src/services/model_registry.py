@@ -0,0 +1,290 @@
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from .prediction_service import PredictionService
+from .data_source_monitor import DataSourceMonitor
+from ..utils.market_data_store import MarketDataStore
+from ..utils.market_data_provider import YFinanceProvider, create_provider_from_env
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICKERS = 'PETR4,VALE3,ITUB4,BBAS3'
+
+
+def parse_tickers(spec):
+	"""
+	Parse a ticker list such as 'PETR4,VALE3,XOM:XOM'.
+
+	Each entry is a ticker, optionally followed by ':<market symbol>'. Without a
+	symbol the B3 symbol '<ticker>.SA' is used.
+
+	Returns:
+			OrderedDict: Ticker -> market symbol
+	"""
+	tickers = OrderedDict()
+	for entry in spec.split(','):
+			entry = entry.strip()
+			if not entry:
+					continue
+			ticker, _, symbol = entry.partition(':')
+			ticker = ticker.strip().upper()
+			if not re.fullmatch(r'[A-Z0-9_]+', ticker):
+					raise ValueError(f"Invalid ticker: {ticker}")
+			tickers[ticker] = symbol.strip() or f"{ticker}.SA"
+	return tickers
+
+
+def create_registry_from_env():
+	"""
+	Build the registry configured by MODEL_REGISTRY_TICKERS, MODEL_REGISTRY_MEMORY_MB,
+	TRAIN_ON_DEMAND and the market data provider settings.
+	"""
+	return ModelRegistry(
+			provider=create_provider_from_env(),
+			tickers=parse_tickers(os.environ.get('MODEL_REGISTRY_TICKERS', DEFAULT_TICKERS)),
+			memory_budget_mb=float(os.environ.get('MODEL_REGISTRY_MEMORY_MB', 512)),
+			train_on_demand=os.environ.get('TRAIN_ON_DEMAND', 'true').lower() == 'true'
+	)
+
+
+class ModelRegistry:
+	"""
+	One PredictionService per ticker, created on first use.
+
+	Services share the market data provider, the bar store and the data source
+	monitor. Loaded models are kept in LRU order and the least recently used
+	ones are evicted once their artifacts add up to more than the memory
+	budget. The most recent model and models that are retraining are never
+	evicted. An evicted ticker is reloaded from its artifact on next use.
+	"""
+
+	def __init__(self, provider=None, tickers=None, model_dir=os.path.join('data', 'models'),
+							 memory_budget_mb=512, store=None, train_on_demand=True):
+			"""
+			Args:
+					provider (MarketDataProvider): Market data source shared by every model
+					tickers (dict): Ticker -> market symbol that may be served
+					model_dir (str): Directory holding '<ticker>_model.joblib' artifacts
+					memory_budget_mb (float): Budget for loaded models
+					store (MarketDataStore): Shared bar store, by default the provider's
+					train_on_demand (bool): Let a service train when its artifact is missing
+			"""
+			self.provider = provider or YFinanceProvider()
+			self.tickers = OrderedDict(tickers or parse_tickers(DEFAULT_TICKERS))
+			self.default_ticker = next(iter(self.tickers))
+			self.model_dir = model_dir
+			self.memory_budget = memory_budget_mb * 1024 * 1024
+			self.train_on_demand = train_on_demand
+
+			if store is None and self.provider.remote:
+					store = MarketDataStore(os.path.join('data', 'market', self.provider.name))
+			self.store = store
+
+			self.data_monitor = DataSourceMonitor(
+					lambda: self.provider.latest_price(self.tickers[self.default_ticker]),
+					interval=float(os.environ.get('HEALTH_CHECK_INTERVAL', 60))
+			)
+
+			self._lock = threading.Lock()
+			self._services = OrderedDict()
+			self._ticker_locks = {ticker: threading.Lock() for ticker in self.tickers}
+			self.stats = {'loads': 0, 'evictions': 0}
+
+	def normalize(self, ticker):
+			"""
+			Registered ticker for a (case-insensitive) name, or None.
+			"""
+			ticker = str(ticker).upper()
+			return ticker if ticker in self.tickers else None
+
+	def model_path(self, ticker):
+			return os.path.join(self.model_dir, f'{ticker.lower()}_model.joblib')
+
+	def get(self, ticker):
+			"""
+			PredictionService for a ticker, loading its model if needed.
+
+			Args:
+					ticker (str): Registered ticker, case-insensitive
+
+			Returns:
+					PredictionService: Service for the ticker
+
+			Raises:
+					KeyError: When the ticker is not registered
+			"""
+			name = self.normalize(ticker)
+			if name is None:
+					raise KeyError(ticker)
+
+			with self._lock:
+					service = self._services.get(name)
+					if service is not None:
+							self._services.move_to_end(name)
+							return service
+
+			# Loading reads the artifact from disk, keep it out of the registry lock
+			with self._ticker_locks[name]:
+					with self._lock:
+							service = self._services.get(name)
+					if service is None:
+							service = PredictionService(
+									provider=self.provider,
+									model_path=self.model_path(name),
+									ticker=name,
+									symbol=self.tickers[name],
+									store=self.store,
+									data_monitor=self.data_monitor,
+									train_on_demand=self.train_on_demand
+							)
+							logger.info("Registry loaded %s (%.1f MB)", name, service.memory_footprint() / 1e6)
+							with self._lock:
+									self.stats['loads'] += 1
+									self._services[name] = service
+
+			with self._lock:
+					self._services.move_to_end(name)
+					self._evict()
+			return service
+
+	def _evict(self):
+			"""
+			Drop least recently used services until the budget is met.
+			Called with the registry lock held.
+			"""
+			usage = sum(service.memory_footprint() for service in self._services.values())
+
+			for name in list(self._services)[:-1]:
+					if usage <= self.memory_budget:
+							break
+					service = self._services[name]
+					if service.is_busy():
+							continue
+					usage -= service.memory_footprint()
+					del self._services[name]
+					service.close()
+					self.stats['evictions'] += 1
+					logger.info("Registry evicted %s", name)
+
+	def preload(self, tickers=None, train_missing=True):
+			"""
+			Load models up front, e.g. in a server's master process before it
+			forks its workers, so they share the loaded models copy-on-write.
+
+			Only artifacts are read; no background thread is started, since
+			threads do not survive a fork.
+
+			Args:
+					tickers (list): Tickers to load, defaults to every registered one
+					train_missing (bool): Train (and save) models without an artifact
+
+			Returns:
+					list: Tickers with a model ready to serve, without the ones
+					evicted again because the set exceeds the memory budget
+			"""
+			loaded = []
+			for ticker in tickers or list(self.tickers):
+					service = self.get(ticker)
+					if not service.model_loaded and train_missing:
+							service.train_on_demand = True
+							service.ensure_model_trained()
+					service.train_on_demand = self.train_on_demand
+					if service.model_loaded:
+							loaded.append(service.ticker)
+
+			with self._lock:
+					# Models trained above were not counted by get() yet
+					self._evict()
+					ready = [name for name, service in self._services.items() if service.model_loaded]
+
+			evicted = [name for name in loaded if name not in ready]
+			if evicted:
+					logger.warning(
+							"Preloaded models exceed the %.0f MB memory budget (MODEL_REGISTRY_MEMORY_MB), evicted: %s",
+							self.memory_budget / 1024 / 1024, ', '.join(evicted)
+					)
+			return ready
+
+	def set_train_on_demand(self, enabled):
+			"""
+			Allow or forbid training for the loaded services and the ones created later.
+			"""
+			self.train_on_demand = enabled
+			with self._lock:
+					for service in self._services.values():
+							service.train_on_demand = enabled
+
+	def loaded_tickers(self):
+			with self._lock:
+					return list(self._services)
+
+	def memory_usage(self):
+			with self._lock:
+					return sum(service.memory_footprint() for service in self._services.values())
+
+	def get_info(self):
+			"""
+			Registered tickers and the models currently in memory.
+			"""
+			return {
+					"tickers": dict(self.tickers),
+					"loaded": self.loaded_tickers(),
+					"memory_used_mb": round(self.memory_usage() / 1024 / 1024, 2),
+					"memory_budget_mb": round(self.memory_budget / 1024 / 1024, 2),
+					"loads": self.stats['loads'],
+					"evictions": self.stats['evictions']
+			}
+
+	def health_check(self):
+			"""
+			Health of the data source and the default model.
+
+			Answered from the monitor's snapshot and the registry state only: a
+			probe never loads a model, reads an artifact or changes the LRU order.
+			"""
+			try:
+					data_source = self.data_monitor.snapshot()
+					data_access = data_source["data_access"]
+
+					with self._lock:
+							service = self._services.get(self.default_ticker)
+					if service is not None and service.model_loaded:
+							model_status = "loaded"
+					elif service is None and os.path.exists(self.model_path(self.default_ticker)):
+							# Loaded on the first request for the ticker
+							model_status = "not_resident"
+					else:
+							model_status = "not_loaded"
+
+					overall_health = "healthy" if (model_status != "not_loaded" and data_access == "available") else "degraded"
+
+					return {
+							"status": "success",
+							"timestamp": datetime.now().isoformat(),
+							"health": {
+									"overall": overall_health,
+									"model_status": model_status,
+									"default_model_resident": service is not None,
+									"data_access": data_access,
+									"data_source": data_source,
+									"service_uptime": "running"
+							},
+							"registry": self.get_info(),
+							"version": "0.0.1",
+							"service": "Hisui Python Server"
+					}
+
+			except Exception as e:
+					logger.error("Health check error: %s", e)
+					return {
+							"status": "error",
+							"timestamp": datetime.now().isoformat(),
+							"health": {
+									"overall": "unhealthy",
+									"error": str(e)
+							}
+					}
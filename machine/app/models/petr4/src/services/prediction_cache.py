@@ -0,0 +1,131 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class PredictionCache:
+	"""
+	Cache of formatted predictions keyed on (model version, last bar timestamp).
+
+	A prediction can only change when a new bar arrives or the model changes, so
+	the last result is served directly for ``ttl`` seconds. After that the
+	caller re-reads the market data and reuses the entry if the key is still
+	the same. Concurrent misses for the same model version are coalesced: one
+	caller computes and the others wait for its result.
+	"""
+
+	def __init__(self, ttl=60):
+			self.ttl = ttl
+			self._lock = threading.Lock()
+			self._key = None
+			self._value = None
+			self._expires_at = 0.0
+			self._inflight = {}
+			self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+	def get_fresh(self, model_version):
+			"""
+			Cached value for model_version if it is younger than the TTL.
+			"""
+			with self._lock:
+					if self._key is not None and self._key[0] == model_version and time.monotonic() < self._expires_at:
+							self.stats['hits'] += 1
+							return dict(self._value)
+			return None
+
+	def lookup(self, key):
+			"""
+			Cached value for an exact key, ignoring the TTL. A hit renews the TTL.
+			"""
+			with self._lock:
+					if self._key == key:
+							self._expires_at = time.monotonic() + self.ttl
+							self.stats['hits'] += 1
+							return dict(self._value)
+			return None
+
+	def store(self, key, value):
+			with self._lock:
+					self._key = key
+					self._value = dict(value)
+					self._expires_at = time.monotonic() + self.ttl
+
+	def invalidate(self):
+			with self._lock:
+					self._key = None
+					self._value = None
+
+	def get_or_compute(self, model_version, compute):
+			"""
+			Return the fresh cached value or run compute() once for all callers.
+
+			Args:
+					model_version (str): Version of the model serving the request
+					compute (callable): Produces the value; expected to call store()
+
+			Returns:
+					dict: Prediction (a copy, callers may modify it)
+			"""
+			cached = self.get_fresh(model_version)
+			if cached is not None:
+					return cached
+
+			with self._lock:
+					future = self._inflight.get(model_version)
+					leader = future is None
+					if leader:
+							future = Future()
+							self._inflight[model_version] = future
+							self.stats['misses'] += 1
+					else:
+							self.stats['coalesced'] += 1
+
+			if not leader:
+					return dict(future.result())
+
+			try:
+					value = compute()
+					future.set_result(value)
+					return dict(value)
+			except Exception as e:
+					future.set_exception(e)
+					raise
+			finally:
+					with self._lock:
+							self._inflight.pop(model_version, None)
+
+	async def get_or_compute_async(self, model_version, compute):
+			"""
+			get_or_compute for asyncio callers; compute is a coroutine function.
+
+			Shares the in-flight table with get_or_compute, so a miss is computed
+			once whether the callers are threads or coroutines.
+			"""
+			cached = self.get_fresh(model_version)
+			if cached is not None:
+					return cached
+
+			with self._lock:
+					future = self._inflight.get(model_version)
+					leader = future is None
+					if leader:
+							future = Future()
+							self._inflight[model_version] = future
+							self.stats['misses'] += 1
+					else:
+							self.stats['coalesced'] += 1
+
+			if not leader:
+					return dict(await asyncio.wrap_future(future))
+
+			try:
+					value = await compute()
+					future.set_result(value)
+					return dict(value)
+			except BaseException as e:
+					future.set_exception(e)
+					raise
+			finally:
+					with self._lock:
+							self._inflight.pop(model_version, None)
@@ -1,52 +1,169 @@
 import os
+import time
+import asyncio
+import uuid
 import logging
+import threading
 import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from ..models.predictor import PETR4Predictor
+from ..models.predictor import StockPredictor
+from ..models.backtest import Backtester
+from .prediction_cache import PredictionCache
+from .data_source_monitor import DataSourceMonitor
+from ..utils.metrics import timed
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class PredictionService:
 
-	def __init__(self):
-			self.predictor = PETR4Predictor()
+	def __init__(self, provider=None, model_path=None, ticker='PETR4', symbol=None, store=None, data_monitor=None,
+							 train_on_demand=True):
+			self.provider = provider
+			self.ticker = ticker
+			self.symbol = symbol
+			self.store = store
+			self.n_jobs = int(os.environ.get('TRAINING_N_JOBS', -1))
+			self.horizons = tuple(int(h) for h in os.environ.get('FORECAST_HORIZONS', '1,5,21').split(','))
+			self.feature_dtype = os.environ.get('FEATURE_DTYPE', 'float64')
+			self.predictor = self._new_predictor()
 			self.model_loaded = False
-			self.model_path = os.path.join('data', 'petr4_model.pkl')
+			self.model_path = model_path or os.path.join('data', 'models', f'{ticker.lower()}_model.joblib')
+			
+			# Pre-forked workers serve the artifact loaded by the master process
+			# and must not each start a training run when it is missing. Every
+			# service reloads the artifact when another process replaces it
+			self.train_on_demand = train_on_demand
+			self._artifact_mtime = None
+			self._reload_lock = threading.Lock()
+			
+			# Training runs off the request path: one job at a time, and the new
+			# predictor only replaces self.predictor after it trained successfully.
+			# The executor is created on first use, and again after close(), so a
+			# service evicted from the registry but still referenced keeps working
+			self._train_lock = threading.Lock()
+			self._jobs_lock = threading.Lock()
+			self._retrain_jobs = OrderedDict()
+			self._retrain_executor = None
+			self.max_job_history = 20
+			
+			# Last Backtester built, reused while model, period and data are unchanged
+			self._backtest_lock = threading.Lock()
+			self._backtester = None
+			self._backtester_key = None
+			
+			self.prediction_cache = PredictionCache(ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 60)))
+			# The check calls the provider directly: get_latest_price swallows
+			# errors, and the monitor reports the exception message
+			self.data_monitor = data_monitor or DataSourceMonitor(
+					lambda: self.predictor.data_collector.provider.latest_price(self.predictor.data_collector.target_symbol),
+					interval=float(os.environ.get('HEALTH_CHECK_INTERVAL', 60))
+			)
 			
 			self._load_existing_model()
 	
+	def _new_predictor(self):
+			return StockPredictor(
+					self.ticker, self.symbol, provider=self.provider, n_jobs=self.n_jobs, store=self.store,
+					horizons=self.horizons, feature_dtype=self.feature_dtype
+			)
+	
+	def _stat_artifact(self):
+			try:
+					return os.stat(self.model_path).st_mtime_ns
+			except OSError:
+					return None
+	
 	def _load_existing_model(self):
 			try:
 					if os.path.exists(self.model_path):
-							success = self.predictor.load_model(self.model_path)
+							started = time.perf_counter()
+							mtime = self._stat_artifact()
+							# A serving predictor is replaced, never loaded into
+							predictor = self._new_predictor() if self.model_loaded else self.predictor
+							success = predictor.load_model(self.model_path)
+							self._artifact_mtime = mtime
 							if success:
+									self.predictor = predictor
 									self.model_loaded = True
-									logger.info("Existing model loaded successfully")
+									logger.info("Existing model loaded successfully in %.3fs", time.perf_counter() - started)
 							else:
-									logger.warning("Failed to load existing model")
+									logger.warning("Existing model is incompatible, it will be retrained")
 					else:
 							logger.info("No existing model found")
 			except Exception as e:
-					logger.error(f"Error loading existing model: {e}")
+					logger.error("Error loading existing model: %s", e)
+	
+	def _save_model(self, predictor):
+			try:
+					predictor.save_model(self.model_path)
+			except Exception as e:
+					logger.error("Error saving model: %s", e)
+	
+	def _install_model(self, predictor):
+			"""
+			Save a freshly trained predictor and make it the one serving requests.
+			
+			The swap is a single reference assignment, so concurrent requests see
+			either the old or the new predictor, never a partially trained one.
+			"""
+			self._save_model(predictor)
+			self._artifact_mtime = self._stat_artifact()
+			self.predictor = predictor
+			self.model_loaded = True
+	
+	def artifact_changed(self):
+			"""
+			Whether the model file was replaced since this service loaded or wrote it,
+			e.g. by a training run in another worker or process.
+			"""
+			mtime = self._stat_artifact()
+			return mtime is not None and mtime != self._artifact_mtime
+	
+	def _reload_if_changed(self):
+			# One thread reloads; the others keep serving the current model meanwhile
+			if not self._reload_lock.acquire(blocking=False):
+					return
+			try:
+					if self.artifact_changed():
+							logger.info("Model artifact for %s changed, reloading", self.ticker)
+							self._load_existing_model()
+			finally:
+					self._reload_lock.release()
 	
 	def ensure_model_trained(self):
-			if not self.model_loaded:
+			if self.model_loaded:
+					self._reload_if_changed()
+					return True
+			
+			with self._train_lock:
+					if self.model_loaded:
+							return True
+					
+					if not self.train_on_demand:
+							# Another process may have written the artifact since
+							self._load_existing_model()
+							if not self.model_loaded:
+									logger.error("No model for %s and training on demand is disabled", self.ticker)
+							return self.model_loaded
+					
 					logger.info("Training new model...")
 					try:
-							results = self.predictor.train(period='3y')
+							predictor = self._new_predictor()
+							results = predictor.train(period='3y')
 							if results and results.get('model_saved', False):
-									self.model_loaded = True
+									self._install_model(predictor)
 									logger.info("Model trained and saved successfully")
 									return True
 							else:
 									logger.error("Model training failed or performance too low")
 									return False
 					except Exception as e:
-							logger.error(f"Error training model: {e}")
+							logger.error("Error training model: %s", e)
 							return False
-			return True
 	
 	def get_prediction(self):
 			try:
@@ -56,52 +173,181 @@ class PredictionService:
 									"message": "Unable to train model for predictions"
 							}
 					
-					prediction_result = self.predictor.predict()
+					predictor = self.predictor
+					with timed('prediction'):
+							return self.prediction_cache.get_or_compute(
+									predictor.model_version,
+									lambda: self._compute_prediction(predictor)
+							)
 					
-					formatted_result = {
-							"status": "success",
-							"timestamp": datetime.now().isoformat(),
-							"prediction": {
-									"current_price": round(prediction_result['current_price'], 2),
-									"predicted_price": round(prediction_result['prediction'], 2),
-									"change_absolute": round(prediction_result['change_absolute'], 2),
-									"change_percentage": round(prediction_result['change_percentage'], 2),
-									"movement_direction": prediction_result['movement_direction'],
-									"next_trading_date": prediction_result['next_date']
-							},
-							"confidence": {
-									"model_confidence": round(prediction_result['model_confidence'], 3),
-									"confidence_intervals": {
-											"95_percent": {
-													"lower": round(prediction_result['confidence_intervals']['95%']['lower'], 2),
-													"upper": round(prediction_result['confidence_intervals']['95%']['upper'], 2)
-											},
-											"68_percent": {
-													"lower": round(prediction_result['confidence_intervals']['68%']['lower'], 2),
-													"upper": round(prediction_result['confidence_intervals']['68%']['upper'], 2)
-											}
-									}
-							},
-							"recommendation": {
-									"action": prediction_result['recommendation'],
-									"risk_level": prediction_result['risk_level']
-							},
-							"model_info": {
-									"model_name": prediction_result['model_name'],
-									"prediction_timestamp": prediction_result['timestamp']
-							}
+			except Exception as e:
+					logger.error("Error getting prediction: %s", e)
+					return {
+							"error": "Prediction failed",
+							"message": str(e),
+							"timestamp": datetime.now().isoformat()
 					}
+	
+	async def get_prediction_async(self, executor=None):
+			"""
+			get_prediction for asyncio callers.
+			
+			Market data is awaited with concurrent downloads; loading or training
+			the model and the feature/model work run in ``executor`` (the loop's
+			default executor when None), so the event loop only waits.
+			"""
+			loop = asyncio.get_running_loop()
+			try:
+					needs_load = not self.model_loaded or self.artifact_changed()
+					if needs_load and not await loop.run_in_executor(executor, self.ensure_model_trained):
+							return {
+									"error": "Model training failed",
+									"message": "Unable to train model for predictions"
+							}
+					
+					predictor = self.predictor
+					
+					async def compute():
+							with timed('collect_data'):
+									latest_df = await predictor.data_collector.collect_data_async(period='1y')
+							return await loop.run_in_executor(executor, self._predict_latest, predictor, latest_df)
 					
-					return formatted_result
+					with timed('prediction'):
+							return await self.prediction_cache.get_or_compute_async(predictor.model_version, compute)
 					
 			except Exception as e:
-					logger.error(f"Error getting prediction: {e}")
+					logger.error("Error getting prediction: %s", e)
 					return {
 							"error": "Prediction failed",
 							"message": str(e),
 							"timestamp": datetime.now().isoformat()
 					}
 	
+	def _compute_prediction(self, predictor):
+			"""
+			Run the prediction pipeline, reusing the cached result when the model
+			version and the latest market bar did not change.
+			"""
+			with timed('collect_data'):
+					latest_df = predictor.data_collector.collect_data(period='1y')
+			return self._predict_latest(predictor, latest_df)
+	
+	def _predict_latest(self, predictor, latest_df):
+			cache_key = (predictor.model_version, latest_df.index[-1])
+			
+			cached = self.prediction_cache.lookup(cache_key)
+			if cached is not None:
+					return cached
+			
+			prediction_result = predictor.predict(latest_df)
+			
+			with timed('format'):
+					formatted_result = self._format_prediction(prediction_result)
+			
+			self.prediction_cache.store(cache_key, formatted_result)
+			return formatted_result
+	
+	@staticmethod
+	def _format_prediction(prediction_result):
+			formatted = {
+					"status": "success",
+					"timestamp": datetime.now().isoformat(),
+					"prediction": {
+							"current_price": round(prediction_result['current_price'], 2),
+							"predicted_price": round(prediction_result['prediction'], 2),
+							"change_absolute": round(prediction_result['change_absolute'], 2),
+							"change_percentage": round(prediction_result['change_percentage'], 2),
+							"movement_direction": prediction_result['movement_direction'],
+							"next_trading_date": prediction_result['next_date']
+					},
+					"confidence": {
+							"model_confidence": round(prediction_result['model_confidence'], 3),
+							"confidence_intervals": {
+									"95_percent": {
+											"lower": round(prediction_result['confidence_intervals']['95%']['lower'], 2),
+											"upper": round(prediction_result['confidence_intervals']['95%']['upper'], 2)
+									},
+									"68_percent": {
+											"lower": round(prediction_result['confidence_intervals']['68%']['lower'], 2),
+											"upper": round(prediction_result['confidence_intervals']['68%']['upper'], 2)
+									}
+							}
+					},
+					"recommendation": {
+							"action": prediction_result['recommendation'],
+							"risk_level": prediction_result['risk_level']
+					},
+					"model_info": {
+							"model_name": prediction_result['model_name'],
+							"prediction_timestamp": prediction_result['timestamp']
+					}
+			}
+			
+			if 'forecast_path' in prediction_result:
+					formatted["forecast_path"] = [
+							{
+									"horizon_days": step['horizon'],
+									"date": step['date'],
+									"predicted_price": round(step['prediction'], 2),
+									"change_percentage": round(step['change_percentage'], 2),
+									"confidence_intervals": {
+											"95_percent": {
+													"lower": round(step['confidence_intervals']['95%']['lower'], 2),
+													"upper": round(step['confidence_intervals']['95%']['upper'], 2)
+											},
+											"68_percent": {
+													"lower": round(step['confidence_intervals']['68%']['lower'], 2),
+													"upper": round(step['confidence_intervals']['68%']['upper'], 2)
+											}
+									}
+							}
+							for step in prediction_result['forecast_path']
+					]
+			
+			return formatted
+	
+	def get_batch_predictions(self, dates=None):
+			"""
+			Predictions for several as-of dates from one feature build and one
+			estimator call.
+			
+			Args:
+					dates (list): As-of dates (ISO strings); the latest bar when empty
+					
+			Returns:
+					list: One formatted prediction or error dict per date
+			"""
+			if not self.ensure_model_trained():
+					raise RuntimeError("Unable to train model for predictions")
+			
+			predictor = self.predictor
+			df = predictor.data_collector.collect_data(period=self._batch_period(dates))
+			dates = dates or [df.index[-1]]
+			
+			results = []
+			for result in predictor.predict_batch(dates, df):
+					if 'error' in result:
+							results.append({"status": "error", "as_of": result['as_of'], "message": result['error']})
+					else:
+							formatted = self._format_prediction(result)
+							formatted["as_of"] = result['as_of']
+							results.append(formatted)
+			return results
+	
+	@staticmethod
+	def _batch_period(dates):
+			"""
+			Shortest history period covering the oldest date plus indicator warm-up.
+			"""
+			if not dates:
+					return '1y'
+			
+			needed = pd.Timestamp.today().normalize() - min(pd.Timestamp(date) for date in dates) + pd.Timedelta(days=120)
+			for period, days in (('1y', 365), ('2y', 730), ('5y', 1826), ('10y', 3652)):
+					if needed.days <= days:
+							return period
+			return 'max'
+	
 	def get_model_info(self):
 			try:
 					if not self.model_loaded:
@@ -144,13 +390,78 @@ class PredictionService:
 					return formatted_info
 					
 			except Exception as e:
-					logger.error(f"Error getting model info: {e}")
+					logger.error("Error getting model info: %s", e)
 					return {
 							"error": "Failed to get model info",
 							"message": str(e),
 							"timestamp": datetime.now().isoformat()
 					}
 	
+	def run_backtest(self, period='6y', thresholds=None, cost_bps=0.0, strength=1, include_series=True):
+			"""
+			Backtest the recommendation rule over historical bars.
+			
+			Model predictions are computed once per (model, period, last bar); calls
+			that only change thresholds or costs reuse them.
+			
+			Args:
+					period (str): History period to replay
+					thresholds (dict): Overrides for the recommendation thresholds
+					cost_bps (float): Cost per unit of position change, in basis points
+					strength (int): Minimum signal strength traded (1 moderate, 2 high)
+					include_series (bool): Include the per-day equity and drawdown series
+					
+			Returns:
+					dict: Backtest summary, out-of-sample summary and series
+			"""
+			try:
+					if not self.ensure_model_trained():
+							return {
+									"error": "Model training failed",
+									"message": "Unable to train model for backtesting"
+							}
+					
+					predictor = self.predictor
+					df = predictor.data_collector.collect_data(period=period)
+					key = (predictor.model_version, period, df.index[-1])
+					
+					with self._backtest_lock:
+							if self._backtester_key != key:
+									self._backtester = Backtester(predictor, df)
+									self._backtester_key = key
+							backtester = self._backtester
+					
+					started = time.perf_counter()
+					result = backtester.run(thresholds=thresholds, cost_bps=cost_bps, strength=strength)
+					elapsed = time.perf_counter() - started
+					
+					series = result.pop('series')
+					result.update({
+							"status": "success",
+							"timestamp": datetime.now().isoformat(),
+							"period": period,
+							"start_date": series.index[0].strftime('%Y-%m-%d'),
+							"end_date": series.index[-1].strftime('%Y-%m-%d'),
+							"run_seconds": round(elapsed, 4)
+					})
+					if include_series:
+							result["series"] = {
+									"dates": series.index.strftime('%Y-%m-%d').tolist(),
+									"position": series['position'].astype(int).tolist(),
+									"pnl": series['pnl'].round(6).tolist(),
+									"equity": series['equity'].round(6).tolist(),
+									"drawdown": series['drawdown'].round(6).tolist()
+							}
+					return result
+					
+			except Exception as e:
+					logger.error("Error running backtest: %s", e)
+					return {
+							"error": "Backtest failed",
+							"message": str(e),
+							"timestamp": datetime.now().isoformat()
+					}
+	
 	def get_model_metrics(self):
 			try:
 					if not self.model_loaded:
@@ -197,6 +508,7 @@ class PredictionService:
 									"error_history_size": model_info.get('error_history_size', 0)
 							},
 							"cross_validation": model_info.get('cv_config', {}),
+							"interval_calibration": model_info.get('interval_calibration', {}),
 							"data_info": {
 									"feature_count": model_info.get('feature_count', 0),
 									"data_quality_score": model_info.get('data_quality', {}).get('quality_score', 0),
@@ -207,7 +519,7 @@ class PredictionService:
 					return formatted_metrics
 					
 			except Exception as e:
-					logger.error(f"Error getting model metrics: {e}")
+					logger.error("Error getting model metrics: %s", e)
 					return {
 							"error": "Failed to get model metrics",
 							"message": str(e),
@@ -226,16 +538,83 @@ class PredictionService:
 			else:
 					return "VERY_LOW"
 	
+	def start_retrain(self, period='3y'):
+			"""
+			Schedule a background retraining job.
+			
+			If a job is already queued or running it is returned instead of
+			starting another one.
+			
+			Returns:
+					dict: Job status (job_id, status, period, timestamps)
+			
+			Raises:
+					RuntimeError: If training on demand is disabled for this service
+			"""
+			if not self.train_on_demand:
+					raise RuntimeError(f"Training on demand is disabled for {self.ticker}")
+			
+			with self._jobs_lock:
+					for job in self._retrain_jobs.values():
+							if job['status'] in ('queued', 'running'):
+									return dict(job)
+					
+					job = {
+							"job_id": uuid.uuid4().hex,
+							"status": "queued",
+							"period": period,
+							"created_at": datetime.now().isoformat(),
+							"started_at": None,
+							"finished_at": None,
+							"result": None
+					}
+					self._retrain_jobs[job['job_id']] = job
+					
+					while len(self._retrain_jobs) > self.max_job_history:
+							self._retrain_jobs.popitem(last=False)
+					
+					if self._retrain_executor is None:
+							self._retrain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='retrain')
+					self._retrain_executor.submit(self._run_retrain_job, job['job_id'], period)
+			
+			logger.info("Retraining job %s queued with period: %s", job['job_id'], period)
+			return dict(job)
+	
+	def get_retrain_status(self, job_id):
+			with self._jobs_lock:
+					job = self._retrain_jobs.get(job_id)
+					return dict(job) if job else None
+	
+	def _update_job(self, job_id, **fields):
+			with self._jobs_lock:
+					if job_id in self._retrain_jobs:
+							self._retrain_jobs[job_id].update(fields)
+	
+	def _run_retrain_job(self, job_id, period):
+			self._update_job(job_id, status="running", started_at=datetime.now().isoformat())
+			
+			result = self.retrain_model(period)
+			
+			self._update_job(
+					job_id,
+					status="completed" if result.get('status') == 'success' else "failed",
+					finished_at=datetime.now().isoformat(),
+					result=result
+			)
+	
 	def retrain_model(self, period='3y'):
 			try:
-					logger.info(f"Starting model retraining with period: {period}")
+					logger.info("Starting model retraining with period: %s", period)
 					
-					self.predictor = PETR4Predictor()
+					predictor = self._new_predictor()
 					
-					results = self.predictor.train(period=period)
+					with self._train_lock:
+							results = predictor.train(period=period)
+							
+							if results and results.get('model_saved', False):
+									self._install_model(predictor)
 					
 					if results and results.get('model_saved', False):
-							self.model_loaded = True
 							logger.info("Model retrained successfully")
 							
 							return {
@@ -261,22 +640,48 @@ class PredictionService:
 							}
 							
 			except Exception as e:
-					logger.error(f"Error retraining model: {e}")
+					logger.error("Error retraining model: %s", e)
 					return {
 							"error": "Retraining failed",
 							"message": str(e),
 							"timestamp": datetime.now().isoformat()
 					}
 	
+	def memory_footprint(self):
+			"""
+			Approximate memory held by the loaded model, in bytes.
+			
+			The artifact size on disk is used as the estimate, since load_model
+			memory-maps its arrays.
+			"""
+			if not self.model_loaded or not os.path.exists(self.model_path):
+					return 0
+			return os.path.getsize(self.model_path)
+	
+	def is_busy(self):
+			"""
+			Whether a retrain job is queued or running.
+			"""
+			with self._jobs_lock:
+					return any(job['status'] in ('queued', 'running') for job in self._retrain_jobs.values())
+	
+	def close(self):
+			"""
+			Release the background workers owned by this service.
+			
+			A queued or running job still completes. A later start_retrain
+			creates a new executor.
+			"""
+			with self._jobs_lock:
+					executor, self._retrain_executor = self._retrain_executor, None
+			if executor is not None:
+					executor.shutdown(wait=False)
+	
 	def health_check(self):
 			try:
 					model_status = "loaded" if self.model_loaded else "not_loaded"
-					
-					try:
-							latest_price = self.predictor.data_collector.get_latest_price()
-							data_access = "available" if latest_price else "unavailable"
-					except:
-							data_access = "error"
+					data_source = self.data_monitor.snapshot()
+					data_access = data_source["data_access"]
 					
 					overall_health = "healthy" if (self.model_loaded and data_access == "available") else "degraded"
 					
@@ -287,6 +692,7 @@ class PredictionService:
 									"overall": overall_health,
 									"model_status": model_status,
 									"data_access": data_access,
+									"data_source": data_source,
 									"service_uptime": "running"
 							},
 							"version": "0.0.1",
@@ -294,7 +700,7 @@ class PredictionService:
 					}
 					
 			except Exception as e:
-					logger.error(f"Health check error: {e}")
+					logger.error("Health check error: %s", e)
 					return {
 							"status": "error",
 							"timestamp": datetime.now().isoformat(),
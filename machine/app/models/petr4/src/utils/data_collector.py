@@ -1,63 +1,143 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
-import yfinance as yf
 import warnings
 
+from .market_data_store import MarketDataStore
+from .market_data_provider import YFinanceProvider, period_start
+from .intraday_pipeline import DailyResampler, iter_provider_bars
+from .metrics import FETCH_SECONDS
+
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
 
-class DataCollector:	
-	def __init__(self):
-			self.symbols = {
-					'PETR4.SA': 'PETR4',
-					'PETR3.SA': 'PETR3',
-					'^BVSP': 'IBOV',
-					'BRL=X': 'USD_BRL',
-					'CL=F': 'OIL_WTI',
-					'BZ=F': 'BRENT',
-					'^GSPC': 'SP500',
-					'^VIX': 'VIX',
-					'VALE3.SA': 'VALE',
-					'XOM': 'EXXON',
-					'CVX': 'CHEVRON',
-					'GC=F': 'GOLD'
-			}
+
+class DataCollector:
 	
-	def collect_data(self, period='6y', include_intraday=False):
-			print("1. Collecting data with optimized strategy...")
+	# Market context collected alongside the target asset
+	CONTEXT_SYMBOLS = {
+			'PETR4.SA': 'PETR4',
+			'PETR3.SA': 'PETR3',
+			'^BVSP': 'IBOV',
+			'BRL=X': 'USD_BRL',
+			'CL=F': 'OIL_WTI',
+			'BZ=F': 'BRENT',
+			'^GSPC': 'SP500',
+			'^VIX': 'VIX',
+			'VALE3.SA': 'VALE',
+			'XOM': 'EXXON',
+			'CVX': 'CHEVRON',
+			'GC=F': 'GOLD'
+	}
+	
+	def __init__(self, provider=None, store=None, use_store=None, refresh_interval=900,
+							 max_workers=8, fetch_timeout=10, symbol_timeout=30,
+							 max_retries=2, retry_backoff=0.5, target='PETR4', target_symbol='PETR4.SA'):
+			# The target asset comes first and also gets its OHLCV columns
+			# (<target>_Volume, <target>_High, ...); the context symbol for the same
+			# market symbol, if any, is replaced by it
+			self.target = target
+			self.target_symbol = target_symbol
+			self.symbols = {target_symbol: target}
+			self.symbols.update({
+					symbol: name for symbol, name in self.CONTEXT_SYMBOLS.items()
+					if symbol != target_symbol and name != target
+			})
 			
-			data_dict = {}
+			self.provider = provider or YFinanceProvider()
+			
+			# Local bar store: history is read from disk and only newer bars are downloaded.
+			# Enabled by default for remote providers only, local ones are already on disk.
+			if use_store is None:
+					use_store = self.provider.remote
+			self.store = (store or MarketDataStore(os.path.join('data', 'market', self.provider.name))) if use_store else None
+			self.refresh_interval = refresh_interval
+			
+			# Fetch settings: symbols are downloaded concurrently by up to max_workers
+			# threads; each download attempt is bounded by fetch_timeout and a symbol
+			# gets at most symbol_timeout seconds including retries
+			self.max_workers = max_workers
+			self.fetch_timeout = fetch_timeout
+			self.symbol_timeout = symbol_timeout
+			self.max_retries = max_retries
+			self.retry_backoff = retry_backoff
+	
+	def collect_data(self, period='6y', include_intraday=False, parallel=True):
+			logger.debug("Collecting %s of data for %d symbols", period, len(self.symbols))
 			
 			# Collect daily data
+			fetched = self._fetch_all(period, include_intraday, parallel)
+			return self._assemble(fetched)
+	
+	async def collect_data_async(self, period='6y', include_intraday=False):
+			"""
+			collect_data for asyncio callers.
+			
+			Every symbol is downloaded in a worker thread (providers are blocking)
+			and the downloads are awaited concurrently, each bounded by
+			symbol_timeout, so the event loop is never blocked on the network.
+			
+			Returns:
+					pd.DataFrame: Same frame as collect_data
+			"""
+			logger.debug("Collecting %s of data for %d symbols asynchronously", period, len(self.symbols))
+			
+			async def fetch(symbol, name):
+					try:
+							return await asyncio.wait_for(
+									asyncio.to_thread(self._fetch_symbol, symbol, name, period, include_intraday),
+									timeout=self.symbol_timeout
+							)
+					except asyncio.TimeoutError:
+							return TimeoutError(f"timed out after {self.symbol_timeout}s")
+					except Exception as e:
+							return e
+			
+			names = list(self.symbols.values())
+			results = await asyncio.gather(*(fetch(symbol, name) for symbol, name in self.symbols.items()))
+			return self._assemble(dict(zip(names, results)))
+	
+	def _assemble(self, fetched):
+			"""
+			Align the fetched symbols into one cleaned DataFrame.
+			
+			Args:
+					fetched (dict): Symbol name -> DataFrame, or the Exception that stopped it
+			"""
+			data_dict = {}
+			
 			for symbol, name in self.symbols.items():
 					try:
-							print(f"  Collecting {name}...")
-							if include_intraday and name == 'PETR4':
-									data = self._get_intraday_data(symbol)
-							else:
-									data = yf.download(symbol, period=period, progress=False, interval='1d')
+							data = fetched[name]
+							if isinstance(data, Exception):
+									raise data
 							
 							if not data.empty and len(data) > 100:
 									data_dict[name] = data['Close']
 									
-									# OHLCV data for PETR4
-									if name == 'PETR4' and len(data.columns) > 1:
-											data_dict['PETR4_Volume'] = data['Volume']
-											data_dict['PETR4_High'] = data['High'] 
-											data_dict['PETR4_Low'] = data['Low']
-											data_dict['PETR4_Open'] = data['Open']
+									# OHLCV data for the target
+									if name == self.target and len(data.columns) > 1:
+											data_dict[f'{name}_Volume'] = data['Volume']
+											data_dict[f'{name}_High'] = data['High'] 
+											data_dict[f'{name}_Low'] = data['Low']
+											data_dict[f'{name}_Open'] = data['Open']
 									
-									print(f"    ✓ {name}: {len(data)} records")
+									logger.debug("Collected %s: %d records", name, len(data))
 							else:
-									print(f"    ✗ {name}: Insufficient data")
+									logger.warning("Insufficient data for %s: %d records", name, len(data))
 									
 					except Exception as e:
-							print(f"    ✗ {name}: Error - {str(e)[:30]}")
+							logger.warning("Could not collect %s: %s", name, e)
 			
-			if 'PETR4' not in data_dict:
-					raise ValueError("CRITICAL ERROR: PETR4 data not collected")
+			if self.target not in data_dict:
+					raise ValueError(f"CRITICAL ERROR: {self.target} data not collected")
 			
 			# Create DataFrame
-			base_index = data_dict['PETR4'].index
+			base_index = data_dict[self.target].index
 			df = pd.DataFrame(index=base_index)
 			
 			for name, data in data_dict.items():
@@ -67,56 +147,175 @@ class DataCollector:
 			df = df.dropna(thresh=len(df.columns)*0.6)
 			df = df.fillna(method='ffill').fillna(method='bfill').dropna()
 			
-			print(f"Final dataset: {len(df)} records, {len(df.columns)} assets")
+			logger.debug("Final dataset: %d records, %d assets", len(df), len(df.columns))
 			return df
 	
-	def _get_intraday_data(self, symbol, interval='30m'):
+	def _fetch_all(self, period, include_intraday, parallel):
+			"""
+			Fetch every symbol, concurrently when parallel is set.
+			
+			Returns:
+					dict: Symbol name -> DataFrame, or the Exception that stopped it
 			"""
-			Method for intraday data (placeholder - adapt for your source).
+			tasks = {name: symbol for symbol, name in self.symbols.items()}
+			
+			if not parallel or self.max_workers <= 1:
+					results = {}
+					for name, symbol in tasks.items():
+							try:
+									results[name] = self._fetch_symbol(symbol, name, period, include_intraday)
+							except Exception as e:
+									results[name] = e
+					return results
+			
+			workers = min(self.max_workers, len(tasks))
+			executor = ThreadPoolExecutor(max_workers=workers)
+			futures = {
+					name: executor.submit(self._fetch_symbol, symbol, name, period, include_intraday)
+					for name, symbol in tasks.items()
+			}
+			
+			# Symbols queue behind the pool, so the budget grows with the number of waves
+			waves = -(-len(tasks) // workers)
+			wait(futures.values(), timeout=self.symbol_timeout * waves)
+			executor.shutdown(wait=False, cancel_futures=True)
+			
+			results = {}
+			for name, future in futures.items():
+					if not future.done():
+							results[name] = TimeoutError(f"timed out after {self.symbol_timeout}s")
+					elif future.exception() is not None:
+							results[name] = future.exception()
+					else:
+							results[name] = future.result()
+			return results
+	
+	def _fetch_symbol(self, symbol, name, period, include_intraday):
+			with FETCH_SECONDS.time(name):
+					if include_intraday and name == self.target:
+							return self._get_intraday_data(symbol, period)
+					return self._get_daily_data(symbol, period)
+	
+	def _download(self, symbol, period=None, start=None, interval='1d'):
+			"""
+			Single download attempt for one symbol through the configured provider.
+			"""
+			return self.provider.history(
+					symbol, period=period, start=start, interval=interval, timeout=self.fetch_timeout
+			)
+	
+	def _download_with_retry(self, symbol, **kwargs):
+			"""
+			Download with exponential backoff between failed attempts.
+			"""
+			for attempt in range(self.max_retries + 1):
+					try:
+							return self._download(symbol, **kwargs)
+					except Exception:
+							if attempt == self.max_retries:
+									raise
+							time.sleep(self.retry_backoff * (2 ** attempt))
+	
+	def _get_daily_data(self, symbol, period):
+			"""
+			Get daily bars for a symbol, served from the local store when possible.
+			
+			Only the bars after the last stored date are downloaded. The stored last
+			bar is fetched again so a partial session gets its final values.
+			
+			Args:
+					symbol (str): Stock symbol
+					period (str): History period (e.g. '1y', '6mo', 'max')
+					
+			Returns:
+					pd.DataFrame: Daily OHLCV data for the requested period
+			"""
+			if self.store is None:
+					return self._download_with_retry(symbol, period=period)
+			
+			start = period_start(period)
+			stored = self.store.load(symbol)
+			
+			# Stores written before coverage was recorded are complete from their first bar
+			covered = self.store.covered_from(symbol)
+			if covered is None and stored is not None:
+					covered = stored.index.min()
+			required = start if start is not None else pd.Timestamp.min
+			
+			# Store does not reach back far enough: download the full period once.
+			# A symbol listed after the period start is covered by that download too.
+			if stored is None or covered > required + pd.Timedelta(days=7):
+					data = self._download_with_retry(symbol, period=period)
+					stored = self.store.upsert(symbol, data)
+					if data is not None and not data.empty:
+							self.store.mark_covered(symbol, start)
+			else:
+					age = self.store.age_seconds(symbol)
+					if age is None or age > self.refresh_interval:
+							last_date = stored.index.max()
+							try:
+									delta = self._download_with_retry(symbol, start=last_date)
+									logger.debug("Delta fetch %s: %d bars since %s", symbol, len(delta), last_date.date())
+									stored = self.store.upsert(symbol, delta)
+							except Exception as e:
+									# Stale history is still usable, keep serving it
+									logger.warning("Delta fetch failed for %s, serving stored bars: %s", symbol, e)
+			
+			if stored is None:
+					return pd.DataFrame()
+			
+			return stored[stored.index >= start] if start is not None else stored
+	
+	def _get_intraday_data(self, symbol, period='6y', interval='30m'):
+			"""
+			Daily history with the recent sessions rebuilt from intraday bars.
+			
+			The last days of intraday bars are streamed through a DailyResampler,
+			so the current (partial) session is included with its running OHLCV.
+			When no intraday bars can be fetched, plain daily history is returned.
 			
 			Args:
 					symbol (str): Stock symbol
-					interval (str): Data interval
+					period (str): Daily history period
+					interval (str): Intraday bar interval
 					
 			Returns:
-					pd.DataFrame: Intraday data
+					pd.DataFrame: Daily OHLCV data
 			"""
+			daily = self._get_daily_data(symbol, period)
+			
+			resampler = DailyResampler()
 			try:
-					# Example with hourly data from last 7 days
-					data = yf.download(symbol, period='7d', interval=interval, progress=False)
-					if not data.empty:
-							# Resample to daily if necessary
-							daily_data = data.resample('D').agg({
-									'Open': 'first',
-									'High': 'max',
-									'Low': 'min',
-									'Close': 'last',
-									'Volume': 'sum'
-							}).dropna()
-							return daily_data
-			except:
-					pass
-			
-			# Fallback to daily data
-			return yf.download(symbol, period='1y', progress=False)
+					for timestamp, bar in iter_provider_bars(
+									self.provider, symbol, interval=interval, period='7d', fetch=self._download_with_retry):
+							resampler.push(timestamp, bar)
+			except Exception as e:
+					logger.warning("Intraday data unavailable for %s, using daily bars: %s", symbol, e)
+					return daily
+			
+			sessions = resampler.to_frame()
+			if sessions.empty:
+					logger.warning("No intraday bars for %s, using daily bars", symbol)
+					return daily
+			
+			logger.debug("Intraday %s: %d sessions from %s bars", symbol, len(sessions), interval)
+			return pd.concat([daily[~daily.index.isin(sessions.index)], sessions]).sort_index()
 	
-	def get_latest_price(self, symbol='PETR4.SA'):
+	def get_latest_price(self, symbol=None):
 			"""
 			Get the latest price for a symbol.
 			
 			Args:
-					symbol (str): Stock symbol
+					symbol (str): Stock symbol, defaults to the target symbol
 					
 			Returns:
 					float: Latest price
 			"""
+			symbol = symbol or self.target_symbol
 			try:
-					ticker = yf.Ticker(symbol)
-					data = ticker.history(period='1d')
-					if not data.empty:
-							return data['Close'].iloc[-1]
+					return self.provider.latest_price(symbol)
 			except Exception as e:
-					print(f"Error getting latest price: {e}")
+					logger.error("Error getting latest price for %s: %s", symbol, e)
 			return None
 	
 	def validate_data(self, df):
@@ -137,13 +336,13 @@ class DataCollector:
 							'start': df.index.min(),
 							'end': df.index.max()
 					},
-					'petr4_available': 'PETR4' in df.columns,
+					'target_available': self.target in df.columns,
 					'quality_score': 0
 			}
 			
 			# Calculate quality score
 			score = 0
-			if validation['petr4_available']:
+			if validation['target_available']:
 					score += 40
 			if validation['total_records'] >= 252:  # At least 1 year
 					score += 30
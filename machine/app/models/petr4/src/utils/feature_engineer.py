@@ -1,174 +1,193 @@
 import numpy as np
 import pandas as pd
-from sklearn.feature_selection import SelectKBest, f_regression
+import joblib
+import logging
 import warnings
 
+from . import indicator_kernels as kernels
+from .feature_pipeline import FeaturePipeline, FeatureNode, MissingInput
+from .metrics import FEATURE_FAMILY_SECONDS
+
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+
+def _column(data, target=None, name=None, suffix=''):
+	column = name if name is not None else f'{target}{suffix}'
+	if column not in data.columns:
+			raise MissingInput(column)
+	return data[column]
+
+
+def _identity(series):
+	return series
+
+
+def _pct_change(series, periods=1):
+	return series.pct_change(periods)
+
+
+def _log_return(price, periods=1):
+	return np.log(price / price.shift(periods))
+
+
+def _ratio(numerator, denominator):
+	return numerator / denominator
+
+
+def _rolling_mean(series, window, min_periods):
+	return pd.Series(kernels.rolling_mean(series.to_numpy(), window, min_periods), index=series.index)
+
+
+def _rolling_std(series, window, min_periods):
+	return pd.Series(kernels.rolling_std(series.to_numpy(), window, min_periods), index=series.index)
+
+
+def _rolling_corr(series, other, window, min_periods):
+	return pd.Series(kernels.rolling_corr(series.to_numpy(), other.to_numpy(), window, min_periods), index=series.index)
+
+
+def _ema(series, span, min_periods):
+	return series.ewm(span=span, min_periods=min_periods).mean()
+
+
+def _macd(price, fast=12, slow=26):
+	return price.ewm(span=fast).mean() - price.ewm(span=slow).mean()
+
+
+def _rsi(price, window=14):
+	return pd.Series(kernels.rsi(price.to_numpy(), window), index=price.index)
+
+
+def _true_range(high, low, price):
+	return pd.Series(kernels.true_range(high.to_numpy(), low.to_numpy(), price.to_numpy()), index=price.index)
+
+
+def _roc(price, periods):
+	return pd.Series(kernels.roc(price.to_numpy(), periods), index=price.index)
+
+
+def _calendar(data, field):
+	return pd.Series(getattr(data.index, field), index=data.index)
+
+
+def _calendar_sin(values, period):
+	return np.sin(2 * np.pi * values / period)
+
 
 class FeatureEngineer:
 	
-	def __init__(self):
+	# Indicator parameters, shared with IncrementalFeatureState
+	RETURN_PERIODS = [1, 2, 3, 5, 10, 20]
+	MA_PERIODS = [5, 10, 20, 50]
+	VOLATILITY_PERIODS = [5, 10, 20]
+	ROC_PERIODS = [10, 20]
+	KEY_ASSETS = ['IBOV', 'USD_BRL', 'OIL_WTI', 'BRENT']
+	RSI_WINDOW = 14
+	ATR_WINDOW = 14
+	CORR_WINDOW = 20
+	VOLUME_WINDOW = 20
+	SELECTION_CACHE_SIZE = 8
+	
+	def __init__(self, target='PETR4', extra_nodes=()):
+			"""
+			Args:
+					target (str): Target column name
+					extra_nodes (list): FeatureNodes added to the default DAG, e.g.
+							ticker-specific features
+			"""
+			self.target = target
 			self.feature_columns = None
+			self._selection_cache = {}
+			self.pipeline = FeaturePipeline(self._feature_nodes()).extend(extra_nodes)
 	
-	def create_features(self, df):
-			print("2. Creating features with maximum robustness...")
-			
-			features_df = pd.DataFrame(index=df.index)
-			
-			if 'PETR4' not in df.columns:
-					raise ValueError("PETR4 column not found in data!")
-			
-			price = df['PETR4']
-			print(f"  Base data: {len(price)} records")
-			
-			print("  - Basic price features...")
-			
-			for p in [1, 2, 3, 5, 10, 20]:
-					try:
-							ret = price.pct_change(p)
-							if not ret.isnull().all():
-									features_df[f'return_{p}d'] = ret
-									
-									log_ret = np.log(price / price.shift(p))
-									if not log_ret.isnull().all():
-											features_df[f'log_return_{p}d'] = log_ret
-					except:
-							continue
-			
-			print("  - Moving averages...")
-			
-			for p in [5, 10, 20, 50]:
-					try:
-							sma = price.rolling(p, min_periods=max(1, p//2)).mean()
-							if not sma.isnull().all():
-									features_df[f'sma_{p}'] = sma
-									
-									ratio = price / sma
-									if not ratio.isnull().all():
-											features_df[f'price_sma_{p}_ratio'] = ratio
-							
-							ema = price.ewm(span=p, min_periods=max(1, p//4)).mean()
-							if not ema.isnull().all():
-									features_df[f'ema_{p}'] = ema
-									
-					except Exception as e:
-							print(f"    WARNING: Error in MA {p}: {str(e)[:30]}")
-							continue
-			
-			print("  - Volatility...")
-			
-			for p in [5, 10, 20]:
-					try:
-							vol = price.pct_change().rolling(p, min_periods=max(1, p//2)).std()
-							if not vol.isnull().all():
-									features_df[f'volatility_{p}'] = vol
-					except:
-							continue
-			
-			print("  - Technical indicators...")
-			
-			try:
-					rsi_14 = self._calculate_rsi(price, 14)
-					if not rsi_14.isnull().all():
-							features_df['rsi_14'] = rsi_14
-			except:
-					pass
-			
-			try:
-					ema_12 = price.ewm(span=12).mean()
-					ema_26 = price.ewm(span=26).mean()
-					macd = ema_12 - ema_26
-					if not macd.isnull().all():
-							features_df['macd'] = macd
-			except:
-					pass
-			
-			print("  - Correlations with other assets...")
-			
-			key_assets = ['IBOV', 'USD_BRL', 'OIL_WTI', 'BRENT']
-			
-			for asset in key_assets:
-					if asset in df.columns:
-							try:
-									asset_price = df[asset]
-									
-									asset_ret = asset_price.pct_change()
-									if not asset_ret.isnull().all():
-											features_df[f'{asset.lower()}_return'] = asset_ret
-									
-									petr4_ret = price.pct_change()
-									corr = petr4_ret.rolling(20, min_periods=10).corr(asset_ret)
-									if not corr.isnull().all():
-											features_df[f'{asset.lower()}_corr'] = corr
-											
-							except Exception as e:
-									print(f"    WARNING: Error in correlation {asset}: {str(e)[:30]}")
-									continue
-			
-			print("  - Temporal features...")
-			
-			try:
-					features_df['day_of_week'] = df.index.dayofweek
-					features_df['month'] = df.index.month
-					features_df['day_of_month'] = df.index.day
+	def _feature_nodes(self):
+			"""
+			Default feature DAG: shared intermediates (output=False) and the
+			feature columns, in the column order of the feature matrix. Each node
+			is tagged with its indicator family for the timing metrics.
+			"""
+			nodes = [
+					FeatureNode('price', _column, ('data', 'target'), output=False, family='returns'),
+					FeatureNode('returns', _pct_change, ('price',), {'periods': 1}, output=False, family='returns')
+			]
+			
+			for p in self.RETURN_PERIODS:
+					if p == 1:
+							nodes.append(FeatureNode('return_1d', _identity, ('returns',), family='returns'))
+					else:
+							nodes.append(FeatureNode(f'return_{p}d', _pct_change, ('price',), {'periods': p}, family='returns'))
+					nodes.append(FeatureNode(f'log_return_{p}d', _log_return, ('price',), {'periods': p}, family='returns'))
+			
+			for p in self.MA_PERIODS:
+					nodes.append(FeatureNode(f'sma_{p}', _rolling_mean, ('price',), {'window': p, 'min_periods': max(1, p//2)}, family='moving_average'))
+					nodes.append(FeatureNode(f'price_sma_{p}_ratio', _ratio, ('price', f'sma_{p}'), family='moving_average'))
+					nodes.append(FeatureNode(f'ema_{p}', _ema, ('price',), {'span': p, 'min_periods': max(1, p//4)}, family='moving_average'))
+			
+			for p in self.VOLATILITY_PERIODS:
+					nodes.append(FeatureNode(f'volatility_{p}', _rolling_std, ('returns',), {'window': p, 'min_periods': max(1, p//2)}, family='volatility'))
+			
+			nodes.append(FeatureNode('rsi_14', _rsi, ('price',), {'window': self.RSI_WINDOW}, family='momentum'))
+			nodes.append(FeatureNode('macd', _macd, ('price',), {'fast': 12, 'slow': 26}, family='momentum'))
+			
+			for asset in self.KEY_ASSETS:
+					name = asset.lower()
+					nodes.append(FeatureNode(f'{name}_price', _column, ('data',), {'name': asset}, output=False, family='market'))
+					nodes.append(FeatureNode(f'{name}_return', _pct_change, (f'{name}_price',), {'periods': 1}, family='market'))
+					nodes.append(FeatureNode(
+							f'{name}_corr', _rolling_corr, ('returns', f'{name}_return'),
+							{'window': self.CORR_WINDOW, 'min_periods': self.CORR_WINDOW // 2}, family='market'
+					))
+			
+			nodes.extend([
+					FeatureNode('day_of_week', _calendar, ('data',), {'field': 'dayofweek'}, family='calendar'),
+					FeatureNode('month', _calendar, ('data',), {'field': 'month'}, family='calendar'),
+					FeatureNode('day_of_month', _calendar, ('data',), {'field': 'day'}, family='calendar'),
+					FeatureNode('day_sin', _calendar_sin, ('day_of_week',), {'period': 7}, family='calendar'),
+					FeatureNode('month_sin', _calendar_sin, ('month',), {'period': 12}, family='calendar'),
 					
-					features_df['day_sin'] = np.sin(2 * np.pi * df.index.dayofweek / 7)
-					features_df['month_sin'] = np.sin(2 * np.pi * df.index.month / 12)
+					FeatureNode('volume', _column, ('data', 'target'), {'suffix': '_Volume'}, output=False, family='volume'),
+					FeatureNode('volume_ma_20', _rolling_mean, ('volume',), {'window': self.VOLUME_WINDOW, 'min_periods': self.VOLUME_WINDOW // 2}, family='volume'),
+					FeatureNode('volume_ratio', _ratio, ('volume', 'volume_ma_20'), family='volume'),
 					
-			except Exception as e:
-					print(f"    WARNING: Error in temporal features: {str(e)[:30]}")
-			
-			if 'PETR4_Volume' in df.columns:
-					print("  - Volume features...")
-					try:
-							volume = df['PETR4_Volume']
-							
-							vol_ma_20 = volume.rolling(20, min_periods=10).mean()
-							if not vol_ma_20.isnull().all():
-									features_df['volume_ma_20'] = vol_ma_20
-									
-									vol_ratio = volume / vol_ma_20
-									if not vol_ratio.isnull().all():
-											features_df['volume_ratio'] = vol_ratio
-											
-					except Exception as e:
-							print(f"    WARNING: Error in volume features: {str(e)[:30]}")
-			
-			if 'PETR4_High' in df.columns and 'PETR4_Low' in df.columns:
-					print("  - High/Low features...")
-					try:
-							high = df['PETR4_High']
-							low = df['PETR4_Low']
-							
-							tr1 = high - low
-							tr2 = np.abs(high - price.shift(1))
-							tr3 = np.abs(low - price.shift(1))
-							true_range = np.maximum(tr1, np.maximum(tr2, tr3))
-							
-							if not true_range.isnull().all():
-									features_df['true_range'] = true_range
-									
-									atr = true_range.rolling(14, min_periods=7).mean()
-									if not atr.isnull().all():
-											features_df['atr_14'] = atr
-											
-					except Exception as e:
-							print(f"    WARNING: Error in High/Low features: {str(e)[:30]}")
-			
-			print("  - Momentum features...")
+					FeatureNode('high', _column, ('data', 'target'), {'suffix': '_High'}, output=False, family='range'),
+					FeatureNode('low', _column, ('data', 'target'), {'suffix': '_Low'}, output=False, family='range'),
+					FeatureNode('true_range', _true_range, ('high', 'low', 'price'), family='range'),
+					FeatureNode('atr_14', _rolling_mean, ('true_range',), {'window': self.ATR_WINDOW, 'min_periods': self.ATR_WINDOW // 2}, family='range')
+			])
 			
-			try:
-					for p in [10, 20]:
-							roc = ((price - price.shift(p)) / price.shift(p)) * 100
-							if not roc.isnull().all():
-									features_df[f'roc_{p}'] = roc
-			except:
-					pass
+			for p in self.ROC_PERIODS:
+					nodes.append(FeatureNode(f'roc_{p}', _roc, ('price',), {'periods': p}, family='momentum'))
 			
-			features_df['target'] = price.shift(-1)
+			return nodes
+	
+	def create_features(self, df, include_latest=False):
+			"""
+			Build the feature matrix and next-day target.
+			
+			Args:
+					df (pd.DataFrame): Collected market data
+					include_latest (bool): Keep the most recent rows, whose target is
+							still unknown, so they can be used for prediction
+					
+			Returns:
+					pd.DataFrame: Features plus 'target' column
+			"""
+			if self.target not in df.columns:
+					raise ValueError(f"{self.target} column not found in data!")
+			
+			price = df[self.target]
+			logger.debug("Creating features from %d records", len(price))
+			
+			run = self.pipeline.run(df, self.target)
+			features_df = pd.DataFrame(run.features, index=df.index)
+			for family, seconds in run.family_timings().items():
+					FEATURE_FAMILY_SECONDS.observe(seconds, family)
+			if logger.isEnabledFor(logging.DEBUG):
+					logger.debug("%d feature nodes in %.1f ms", len(run.timings), sum(run.timings.values()) * 1000)
 			
-			print("  - Final cleaning...")
+			features_df['target'] = price.shift(-1)
 			
 			features_df = features_df.replace([np.inf, -np.inf], np.nan)
 			
@@ -180,10 +199,10 @@ class FeatureEngineer:
 					if valid_count >= 50: 
 							valid_features.append(col)
 					else:
-							print(f"    Removing {col}: only {valid_count} valid values")
+							logger.debug("Removing %s: only %d valid values", col, valid_count)
 			
 			if len(valid_features) == 0:
-					print("    CRITICAL: No valid features found! Creating emergency features...")
+					logger.error("No valid features found, creating emergency features")
 					
 					features_df = pd.DataFrame(index=df.index)
 					
@@ -207,66 +226,101 @@ class FeatureEngineer:
 			else:
 					features_df = features_df[valid_features + ['target']]
 			
-			features_final = features_df.dropna()
+			if include_latest:
+					features_final = features_df.dropna(subset=valid_features)
+			else:
+					features_final = features_df.dropna()
 			
-			print(f"  Final features: {len(valid_features)}")
-			print(f"  Final records: {len(features_final)}")
-			print(f"  Created features: {valid_features}")
+			logger.debug("Final features: %d, final records: %d", len(valid_features), len(features_final))
+			logger.debug("Created features: %s", valid_features)
 			
 			if len(features_final) < 50:
-					print("  WARNING: Few final records. Model may have low performance.")
+					logger.warning("Only %d feature records, the model may perform poorly", len(features_final))
 			
 			self.feature_columns = valid_features
 			return features_final
 	
 	def _calculate_rsi(self, prices, window=14):
 			try:
-					delta = prices.diff()
-					gain = delta.where(delta > 0, 0)
-					loss = -delta.where(delta < 0, 0)
-					
-					avg_gain = gain.rolling(window=window, min_periods=max(1, window//2)).mean()
-					avg_loss = loss.rolling(window=window, min_periods=max(1, window//2)).mean()
-					
-					rs = avg_gain / (avg_loss + 1e-10)
-					rsi = 100 - (100 / (1 + rs))
-					
-					return rsi
+					return _rsi(prices, window)
 			except:
 					return pd.Series([50] * len(prices), index=prices.index)
 	
-	def select_features(self, features_df, max_features=30):
-			print("  - Optimized feature selection...")
-			
-			X = features_df.drop('target', axis=1)
-			y = features_df['target']
-			
-			na_threshold = 0.1
-			X = X.dropna(thresh=int(len(X) * (1 - na_threshold)), axis=1)
-			
-			X = X.loc[:, X.var() > 1e-6]
-			
-			if len(X.columns) > max_features * 2:
-					corr_matrix = X.corr().abs()
-					upper_triangle = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(bool))
-					to_drop = [col for col in upper_triangle.columns if any(upper_triangle[col] > 0.9)]
-					X = X.drop(columns=to_drop)
-			
-			if len(X.columns) > max_features:
-					selector = SelectKBest(score_func=f_regression, k=max_features)
-					selector.fit(X, y)
-					selected_features = X.columns[selector.get_support()]
-					X = X[selected_features]
-			
-			# Reconstruct
-			final_df = X.copy()
-			final_df['target'] = y
-			final_df = final_df.dropna()
-			
-			print(f"    Selected features: {len(X.columns)}")
-			self.feature_columns = X.columns.tolist()
+	def select_features(self, features_df, max_features=30, corr_threshold=0.9):
+			"""
+			Drop sparse, constant and redundant features and keep the most relevant.
+			
+			Redundancy pruning is greedy and order-stable: a column is dropped when
+			its absolute correlation with an earlier *kept* column exceeds
+			corr_threshold. The remaining columns are ranked by the f_regression
+			score against the target (equivalent to the squared correlation) and
+			the top max_features are kept in their original order. Both steps work
+			on one standardized float32 matrix. The selection is cached by a hash
+			of the input frame.
+			
+			Args:
+					features_df (pd.DataFrame): Features plus 'target' column
+					max_features (int): Number of features to keep
+					corr_threshold (float): Absolute correlation above which a column
+							counts as redundant
+					
+			Returns:
+					pd.DataFrame: Selected features plus 'target', without NaN rows
+			"""
+			key = (
+					joblib.hash((features_df.values, list(features_df.columns), features_df.index.values)),
+					max_features, corr_threshold
+			)
+			selected = self._selection_cache.get(key)
+			if selected is None:
+					selected = self._select_columns(features_df, max_features, corr_threshold)
+					if len(self._selection_cache) >= self.SELECTION_CACHE_SIZE:
+							self._selection_cache.pop(next(iter(self._selection_cache)))
+					self._selection_cache[key] = selected
+			
+			final_df = features_df[selected + ['target']].dropna()
+			
+			logger.debug("Selected features: %d", len(selected))
+			self.feature_columns = list(selected)
 			return final_df
 	
+	def _select_columns(self, features_df, max_features, corr_threshold):
+			columns = features_df.columns.drop('target')
+			values = features_df[columns].to_numpy(dtype=np.float32)
+			target = features_df['target'].to_numpy(dtype=np.float32)
+			rows = np.isfinite(target)
+			values, target = values[rows], target[rows]
+			
+			# Columns with more than 10% missing values are dropped
+			missing = np.isnan(values)
+			counts = len(values) - missing.sum(axis=0)
+			usable = counts >= int(len(features_df) * 0.9)
+			
+			# Standardized columns: Z.T @ Z is the correlation matrix. Missing
+			# values sit at the column mean and so add nothing to the sums.
+			Z = values[:, usable]
+			Z = np.where(missing[:, usable], 0, Z - np.nanmean(Z, axis=0))
+			sum_squares = np.einsum('ij,ij->j', Z, Z, dtype=np.float64)
+			variable = sum_squares / np.maximum(counts[usable] - 1, 1) > 1e-6
+			
+			columns = columns[usable][variable]
+			Z = Z[:, variable] / np.sqrt(sum_squares[variable]).astype(np.float32)
+			
+			keep = np.ones(len(columns), dtype=bool)
+			if len(columns) > max_features * 2:
+					redundant = np.triu(np.abs(Z.T @ Z) > corr_threshold, k=1)
+					for i in np.flatnonzero(redundant.any(axis=1)):
+							if keep[i]:
+									keep &= ~redundant[i]
+			
+			if keep.sum() > max_features:
+					scores = np.abs(Z[:, keep].T @ (target - target.mean()))
+					top = np.zeros(len(scores), dtype=bool)
+					top[np.argsort(-scores, kind='stable')[:max_features]] = True
+					keep[np.flatnonzero(keep)[~top]] = False
+			
+			return columns[keep].tolist()
+	
 	def get_feature_info(self):
 			if self.feature_columns is None:
 					return {"error": "No features created yet"}
@@ -0,0 +1,163 @@
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MissingInput(KeyError):
+	"""
+	Raised by a node whose input column is not in the data. The node and
+	everything depending on it are skipped without a warning.
+	"""
+
+
+class FeatureNode:
+	"""
+	One step of the feature DAG.
+
+	``compute`` is called with the values of ``depends`` (in order) followed
+	by ``params`` as keyword arguments. The pipeline seeds two values every
+	node can depend on: 'data' (the collected DataFrame) and 'target' (the
+	target column name).
+	"""
+
+	def __init__(self, name, compute, depends=(), params=None, output=True, family=None):
+			"""
+			Args:
+					name (str): Node name, also the feature column name for outputs
+					compute (callable): Function producing the node's Series
+					depends (tuple): Names of the nodes whose values are inputs
+					params (dict): Keyword arguments, e.g. window sizes
+					output (bool): Whether the value is a feature column or only a
+							shared intermediate (returns, deltas, ...)
+					family (str): Indicator family the node is timed under,
+							defaults to the node name
+			"""
+			self.name = name
+			self.compute = compute
+			self.depends = tuple(depends)
+			self.params = dict(params or {})
+			self.output = output
+			self.family = family or name
+
+	def __repr__(self):
+			return f"FeatureNode({self.name!r}, depends={self.depends}, params={self.params})"
+
+
+class PipelineRun:
+	"""
+	Result of one FeaturePipeline.run: the features plus the node timings and
+	skip reasons of that run only, so concurrent runs never share state.
+	"""
+
+	def __init__(self, nodes):
+			self.nodes = nodes
+			self.features = {}
+			self.timings = {}
+			self.skipped = {}
+
+	def family_timings(self):
+			"""
+			Seconds per node family in this run.
+			"""
+			totals = {}
+			for name, seconds in self.timings.items():
+					family = self.nodes[name].family
+					totals[family] = totals.get(family, 0.0) + seconds
+			return totals
+
+
+class FeaturePipeline:
+	"""
+	Declarative feature DAG.
+
+	Nodes are evaluated on demand in dependency order and each value is
+	memoized for the run, so shared intermediates such as returns or the true
+	range are computed once. Output columns keep the order the nodes were
+	declared in. A node that fails is reported and skipped together with its
+	dependents, like a failed indicator family before. The pipeline itself is
+	read-only while running, so one instance can serve concurrent runs.
+	"""
+
+	SEEDS = ('data', 'target')
+
+	def __init__(self, nodes=()):
+			self.nodes = {}
+			self.extend(nodes)
+
+	def add(self, node):
+			"""
+			Register a node; its dependencies must already be registered.
+			"""
+			if node.name in self.nodes or node.name in self.SEEDS:
+					raise ValueError(f"Duplicate feature node: {node.name}")
+			for dependency in node.depends:
+					if dependency not in self.nodes and dependency not in self.SEEDS:
+							raise ValueError(f"Node {node.name} depends on unknown node {dependency}")
+			self.nodes[node.name] = node
+			return self
+
+	def extend(self, nodes):
+			for node in nodes:
+					self.add(node)
+			return self
+
+	def outputs(self):
+			"""
+			Names of the feature columns, in declaration order.
+			"""
+			return [name for name, node in self.nodes.items() if node.output]
+
+	def run(self, data, target, only=None):
+			"""
+			Evaluate the output nodes (and only what they depend on).
+
+			Args:
+					data (pd.DataFrame): Collected market data
+					target (str): Target column name
+					only (list): Output nodes to compute, defaults to all of them
+
+			Returns:
+					PipelineRun: ``features`` maps feature name -> Series, in
+							declaration order, without the nodes that were skipped or came
+							out entirely empty; ``timings`` and ``skipped`` describe the run
+			"""
+			values = {'data': data, 'target': target}
+			result = PipelineRun(self.nodes)
+
+			for name in (only if only is not None else self.outputs()):
+					value = self._evaluate(name, values, result)
+					if value is not None and not value.isnull().all():
+							result.features[name] = value
+			return result
+
+	def _evaluate(self, name, values, result):
+			if name in values:
+					return values[name]
+			if name in result.skipped:
+					return None
+
+			node = self.nodes[name]
+			inputs = []
+			for dependency in node.depends:
+					value = self._evaluate(dependency, values, result)
+					if value is None:
+							result.skipped[name] = f"missing {dependency}"
+							return None
+					inputs.append(value)
+
+			started = time.perf_counter()
+			try:
+					value = node.compute(*inputs, **node.params)
+			except MissingInput as e:
+					result.skipped[name] = f"missing column {e.args[0]}"
+					return None
+			except Exception as e:
+					logger.warning("Feature node %s failed: %s", name, e)
+					result.skipped[name] = str(e)
+					return None
+			finally:
+					result.timings[name] = time.perf_counter() - started
+
+			values[name] = value
+			return value
@@ -0,0 +1,312 @@
+import math
+import copy
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from .feature_engineer import FeatureEngineer
+
+
+class _RollingWindow:
+	"""
+	Fixed-size window keeping running sums of the valid (non-NaN) values,
+	mirroring pandas ``rolling(window, min_periods)`` semantics.
+	"""
+
+	def __init__(self, window, min_periods):
+			self.window = window
+			self.min_periods = min_periods
+			self.values = deque()
+			self.count = 0
+			self.total = 0.0
+			self.total_sq = 0.0
+
+	def push(self, value):
+			self.values.append(value)
+			if not math.isnan(value):
+					self.count += 1
+					self.total += value
+					self.total_sq += value * value
+
+			if len(self.values) > self.window:
+					old = self.values.popleft()
+					if not math.isnan(old):
+							self.count -= 1
+							self.total -= old
+							self.total_sq -= old * old
+
+	def mean(self):
+			if self.count < self.min_periods or self.count == 0:
+					return np.nan
+			return self.total / self.count
+
+	def std(self):
+			if self.count < self.min_periods or self.count < 2:
+					return np.nan
+			var = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+			return math.sqrt(var) if var > 0 else 0.0
+
+
+class _RollingCorrelation:
+	"""
+	Rolling Pearson correlation from running co-moments over the bars where
+	both series are valid, as ``Series.rolling(...).corr(other)`` does.
+	"""
+
+	def __init__(self, window, min_periods):
+			self.window = window
+			self.min_periods = min_periods
+			self.pairs = deque()
+			self.n = 0
+			self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+
+	def _apply(self, x, y, sign):
+			self.n += sign
+			self.sx += sign * x
+			self.sy += sign * y
+			self.sxx += sign * x * x
+			self.syy += sign * y * y
+			self.sxy += sign * x * y
+
+	def push(self, x, y):
+			valid = not (math.isnan(x) or math.isnan(y))
+			self.pairs.append((x, y, valid))
+			if valid:
+					self._apply(x, y, 1)
+
+			if len(self.pairs) > self.window:
+					old_x, old_y, old_valid = self.pairs.popleft()
+					if old_valid:
+							self._apply(old_x, old_y, -1)
+
+	def value(self):
+			if self.n < self.min_periods or self.n < 2:
+					return np.nan
+			cov = self.sxy - self.sx * self.sy / self.n
+			var_x = self.sxx - self.sx * self.sx / self.n
+			var_y = self.syy - self.sy * self.sy / self.n
+			denominator = math.sqrt(var_x * var_y) if var_x > 0 and var_y > 0 else 0.0
+			return cov / denominator if denominator > 0 else np.nan
+
+
+class _EWMean:
+	"""
+	Exponentially weighted mean with ``adjust=True``, using the same online
+	recurrence as pandas ``ewm(span).mean()``.
+	"""
+
+	def __init__(self, span, min_periods=0):
+			self.decay = 1 - 2 / (span + 1)
+			self.min_periods = max(1, min_periods)
+			self.count = 0
+			self.average = np.nan
+			self.old_weight = 1.0
+
+	def push(self, value):
+			if math.isnan(value):
+					if self.count > 0:
+							self.old_weight *= self.decay
+					return
+
+			if self.count == 0:
+					self.average = value
+					self.old_weight = 1.0
+			else:
+					self.old_weight *= self.decay
+					if self.average != value:
+							self.average = (self.old_weight * self.average + value) / (self.old_weight + 1)
+					self.old_weight += 1
+			self.count += 1
+
+	def value(self):
+			return self.average if self.count >= self.min_periods else np.nan
+
+
+class IncrementalFeatureState:
+	"""
+	Running state of FeatureEngineer's indicators for the latest bar.
+
+	Each new bar updates rolling sums, EMA accumulators, RSI gain/loss windows
+	and correlation co-moments in O(number of windows), so the newest feature
+	vector is available without rebuilding the whole history. Values match
+	``FeatureEngineer.create_features`` on the same data.
+	"""
+
+	def __init__(self, target='PETR4'):
+			self.target = target
+			fe = FeatureEngineer
+
+			self.last_timestamp = None
+			self.bars = 0
+			self._features = {}
+			self._previous = None
+			self._last_row = None
+
+			self.max_lag = max(fe.RETURN_PERIODS + fe.ROC_PERIODS)
+			self.prices = deque(maxlen=self.max_lag + 1)
+			self.asset_prices = {asset: np.float64(np.nan) for asset in fe.KEY_ASSETS}
+
+			self.sma = {p: _RollingWindow(p, max(1, p // 2)) for p in fe.MA_PERIODS}
+			self.ema = {p: _EWMean(p, max(1, p // 4)) for p in fe.MA_PERIODS}
+			self.macd_fast = _EWMean(12)
+			self.macd_slow = _EWMean(26)
+			self.volatility = {p: _RollingWindow(p, max(1, p // 2)) for p in fe.VOLATILITY_PERIODS}
+
+			rsi_min = max(1, fe.RSI_WINDOW // 2)
+			self.rsi_gain = _RollingWindow(fe.RSI_WINDOW, rsi_min)
+			self.rsi_loss = _RollingWindow(fe.RSI_WINDOW, rsi_min)
+
+			self.correlations = {
+					asset: _RollingCorrelation(fe.CORR_WINDOW, fe.CORR_WINDOW // 2) for asset in fe.KEY_ASSETS
+			}
+			self.volume_ma = _RollingWindow(fe.VOLUME_WINDOW, fe.VOLUME_WINDOW // 2)
+			self.atr = _RollingWindow(fe.ATR_WINDOW, fe.ATR_WINDOW // 2)
+
+	def supports(self, feature_columns):
+			"""
+			Whether every requested column is produced incrementally.
+			"""
+			return all(col in self._features for col in feature_columns)
+
+	def can_extend(self, df):
+			"""
+			Whether df continues the bars already consumed by this state.
+			"""
+			return self.last_timestamp is None or self.last_timestamp in df.index
+
+	def update_frame(self, df):
+			"""
+			Consume every bar in df newer than the last one seen.
+
+			The last consumed bar may be revised (e.g. a partial session that got
+			its closing values), in which case it is replayed.
+			"""
+			if self.last_timestamp is not None:
+					df = df[df.index >= self.last_timestamp]
+
+			rows = list(df.iterrows())
+			for i, (timestamp, row) in enumerate(rows):
+					if timestamp == self.last_timestamp and row.to_dict() == self._last_row:
+							continue
+					self.update(timestamp, row, revisable=(i == len(rows) - 1))
+			return self
+
+	def update(self, timestamp, row, revisable=True):
+			"""
+			Consume one bar.
+
+			Args:
+					timestamp (pd.Timestamp): Bar date
+					row (Mapping): Column -> value, same columns as DataCollector output
+					revisable (bool): Keep a snapshot so this bar can be replaced later
+			"""
+			if self.last_timestamp is not None:
+					if timestamp == self.last_timestamp:
+							if self._previous is None:
+									raise ValueError(f"Bar {timestamp} can no longer be revised")
+							self.__dict__.update(copy.deepcopy(self._previous))
+					elif timestamp < self.last_timestamp:
+							raise ValueError(f"Bar {timestamp} is older than {self.last_timestamp}")
+
+			self._previous = None
+			if revisable:
+					self._previous = copy.deepcopy({k: v for k, v in self.__dict__.items() if k != '_previous'})
+
+			with np.errstate(divide='ignore', invalid='ignore'):
+					self._apply(timestamp, row)
+			self.last_timestamp = timestamp
+			self._last_row = dict(row)
+			self.bars += 1
+
+	def _apply(self, timestamp, row):
+			fe = FeatureEngineer
+			price = np.float64(row[self.target])
+			prev_price = self.prices[-1] if self.prices else np.float64(np.nan)
+			self.prices.append(price)
+			features = {}
+
+			def price_ago(p):
+					return self.prices[-1 - p] if len(self.prices) > p else np.float64(np.nan)
+
+			for p in fe.RETURN_PERIODS:
+					old = price_ago(p)
+					features[f'return_{p}d'] = price / old - 1
+					features[f'log_return_{p}d'] = np.log(price / old)
+
+			for p in fe.MA_PERIODS:
+					self.sma[p].push(price)
+					self.ema[p].push(price)
+					sma = self.sma[p].mean()
+					features[f'sma_{p}'] = sma
+					features[f'price_sma_{p}_ratio'] = price / sma
+					features[f'ema_{p}'] = self.ema[p].value()
+
+			ret = price / prev_price - 1
+			for p in fe.VOLATILITY_PERIODS:
+					self.volatility[p].push(ret)
+					features[f'volatility_{p}'] = self.volatility[p].std()
+
+			delta = price - prev_price
+			self.rsi_gain.push(delta if delta > 0 else 0.0)
+			self.rsi_loss.push(-delta if delta < 0 else 0.0)
+			rs = self.rsi_gain.mean() / (self.rsi_loss.mean() + 1e-10)
+			features['rsi_14'] = 100 - (100 / (1 + rs))
+
+			self.macd_fast.push(price)
+			self.macd_slow.push(price)
+			features['macd'] = self.macd_fast.value() - self.macd_slow.value()
+
+			for asset in fe.KEY_ASSETS:
+					if asset not in row:
+							continue
+					asset_price = np.float64(row[asset])
+					asset_ret = asset_price / self.asset_prices[asset] - 1
+					self.asset_prices[asset] = asset_price
+					self.correlations[asset].push(ret, asset_ret)
+					features[f'{asset.lower()}_return'] = asset_ret
+					features[f'{asset.lower()}_corr'] = self.correlations[asset].value()
+
+			features['day_of_week'] = timestamp.dayofweek
+			features['month'] = timestamp.month
+			features['day_of_month'] = timestamp.day
+			features['day_sin'] = np.sin(2 * np.pi * timestamp.dayofweek / 7)
+			features['month_sin'] = np.sin(2 * np.pi * timestamp.month / 12)
+
+			volume_col = f'{self.target}_Volume'
+			if volume_col in row:
+					volume = np.float64(row[volume_col])
+					self.volume_ma.push(volume)
+					volume_ma = self.volume_ma.mean()
+					features['volume_ma_20'] = volume_ma
+					features['volume_ratio'] = volume / volume_ma if volume_ma else np.nan
+
+			high_col, low_col = f'{self.target}_High', f'{self.target}_Low'
+			if high_col in row and low_col in row:
+					high, low = float(row[high_col]), float(row[low_col])
+					true_range = max(high - low, abs(high - prev_price), abs(low - prev_price))
+					if math.isnan(prev_price):
+							true_range = np.nan
+					self.atr.push(true_range)
+					features['true_range'] = true_range
+					features['atr_14'] = self.atr.mean()
+
+			for p in fe.ROC_PERIODS:
+					old = price_ago(p)
+					features[f'roc_{p}'] = ((price - old) / old) * 100
+
+			self._features = {
+					name: (np.nan if np.isinf(value) else value) for name, value in features.items()
+			}
+
+	def latest_features(self):
+			return dict(self._features)
+
+	def latest_frame(self, feature_columns):
+			"""
+			Latest feature vector as a one-row DataFrame in feature_columns order.
+			"""
+			return pd.DataFrame(
+					[[self._features[col] for col in feature_columns]],
+					index=[self.last_timestamp],
+					columns=feature_columns
+			)
@@ -0,0 +1,253 @@
+"""
+Rolling indicator kernels on contiguous float64 arrays.
+
+Every kernel follows pandas ``rolling(window, min_periods)`` semantics: NaN
+values are left out of a window and a window with fewer than min_periods
+valid values is NaN. With numba installed the kernels are compiled
+single-pass loops over running sums; otherwise the same loops are replaced
+by vectorized numpy code built on cumulative sums, which allocates a few
+arrays of the input length instead of one Series per pandas step.
+"""
+import numpy as np
+
+try:
+	from numba import njit
+	NUMBA_AVAILABLE = True
+except ImportError:
+	NUMBA_AVAILABLE = False
+
+
+def _as_array(values):
+	return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# Single-pass loops. Compiled when numba is installed; plain Python otherwise,
+# where they only serve as the reference for the numpy versions.
+
+def _rolling_moments_loop(values, window, min_periods, out_std):
+	n = len(values)
+	out = np.empty(n)
+	count = 0
+	total = 0.0
+	total_sq = 0.0
+	for i in range(n):
+			value = values[i]
+			if value == value:
+					count += 1
+					total += value
+					total_sq += value * value
+			if i >= window:
+					old = values[i - window]
+					if old == old:
+							count -= 1
+							total -= old
+							total_sq -= old * old
+
+			if out_std:
+					if count < min_periods or count < 2:
+							out[i] = np.nan
+					else:
+							var = (total_sq - total * total / count) / (count - 1)
+							out[i] = np.sqrt(var) if var > 0 else 0.0
+			elif count < min_periods or count == 0:
+					out[i] = np.nan
+			else:
+					out[i] = total / count
+	return out
+
+
+def _rolling_corr_loop(x, y, window, min_periods):
+	n = len(x)
+	out = np.empty(n)
+	count = 0
+	sx = sy = sxx = syy = sxy = 0.0
+	for i in range(n):
+			if x[i] == x[i] and y[i] == y[i]:
+					count += 1
+					sx += x[i]
+					sy += y[i]
+					sxx += x[i] * x[i]
+					syy += y[i] * y[i]
+					sxy += x[i] * y[i]
+			if i >= window:
+					j = i - window
+					if x[j] == x[j] and y[j] == y[j]:
+							count -= 1
+							sx -= x[j]
+							sy -= y[j]
+							sxx -= x[j] * x[j]
+							syy -= y[j] * y[j]
+							sxy -= x[j] * y[j]
+
+			if count < min_periods or count < 2:
+					out[i] = np.nan
+			else:
+					var_x = sxx - sx * sx / count
+					var_y = syy - sy * sy / count
+					if var_x <= 0 or var_y <= 0:
+							out[i] = np.nan
+					else:
+							out[i] = (sxy - sx * sy / count) / np.sqrt(var_x * var_y)
+	return out
+
+
+def _rsi_loop(prices, window, min_periods):
+	# delta.where(...) turns every NaN delta, the first one included, into a
+	# zero gain and loss, so each bar counts towards min_periods
+	n = len(prices)
+	out = np.empty(n)
+	gains = 0.0
+	losses = 0.0
+	for i in range(n):
+			delta = prices[i] - prices[i - 1] if i > 0 else 0.0
+			if delta > 0:
+					gains += delta
+			elif delta < 0:
+					losses -= delta
+			if i >= window:
+					j = i - window
+					old = prices[j] - prices[j - 1] if j > 0 else 0.0
+					if old > 0:
+							gains -= old
+					elif old < 0:
+							losses += old
+			
+			count = min(i + 1, window)
+			if count < min_periods:
+					out[i] = np.nan
+			else:
+					rs = (gains / count) / (losses / count + 1e-10)
+					out[i] = 100 - 100 / (1 + rs)
+	return out
+
+
+if NUMBA_AVAILABLE:
+	_rolling_moments_jit = njit(cache=True)(_rolling_moments_loop)
+	_rolling_corr_jit = njit(cache=True)(_rolling_corr_loop)
+	_rsi_jit = njit(cache=True)(_rsi_loop)
+
+
+# Vectorized fallbacks
+
+def _window_sum(values, window):
+	total = np.cumsum(values)
+	total[window:] = total[window:] - total[:-window]
+	return total
+
+
+def _numpy_rolling_moments(values, window, min_periods, out_std):
+	valid = ~np.isnan(values)
+	count = _window_sum(valid.astype(np.float64), window)
+
+	# Centering on the series mean keeps the cumulative sums small
+	centered = np.where(valid, values - (values[valid].mean() if valid.any() else 0.0), 0.0)
+	total = _window_sum(centered, window)
+
+	with np.errstate(divide='ignore', invalid='ignore'):
+			if not out_std:
+					out = total / count + (values[valid].mean() if valid.any() else 0.0)
+					out[(count < min_periods) | (count == 0)] = np.nan
+					return out
+
+			total_sq = _window_sum(centered * centered, window)
+			var = (total_sq - total * total / count) / (count - 1)
+			out = np.sqrt(np.maximum(var, 0.0))
+	out[(count < min_periods) | (count < 2)] = np.nan
+	return out
+
+
+def _numpy_rolling_corr(x, y, window, min_periods):
+	valid = ~(np.isnan(x) | np.isnan(y))
+	count = _window_sum(valid.astype(np.float64), window)
+	dx = np.where(valid, x - (x[valid].mean() if valid.any() else 0.0), 0.0)
+	dy = np.where(valid, y - (y[valid].mean() if valid.any() else 0.0), 0.0)
+
+	sx = _window_sum(dx, window)
+	sy = _window_sum(dy, window)
+	with np.errstate(divide='ignore', invalid='ignore'):
+			var_x = _window_sum(dx * dx, window) - sx * sx / count
+			var_y = _window_sum(dy * dy, window) - sy * sy / count
+			out = (_window_sum(dx * dy, window) - sx * sy / count) / np.sqrt(var_x * var_y)
+	out[(count < min_periods) | (count < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+	return out
+
+
+def _numpy_rsi(prices, window, min_periods):
+	delta = np.zeros_like(prices)
+	np.subtract(prices[1:], prices[:-1], out=delta[1:])
+	delta[np.isnan(delta)] = 0.0
+	
+	gains = _numpy_rolling_moments(np.maximum(delta, 0.0), window, min_periods, False)
+	losses = _numpy_rolling_moments(np.maximum(-delta, 0.0), window, min_periods, False)
+	return 100 - 100 / (1 + gains / (losses + 1e-10))
+
+
+# Public kernels
+
+def rolling_mean(values, window, min_periods):
+	"""
+	Rolling mean, as ``Series.rolling(window, min_periods).mean()``.
+	"""
+	values = _as_array(values)
+	if NUMBA_AVAILABLE:
+			return _rolling_moments_jit(values, window, min_periods, False)
+	return _numpy_rolling_moments(values, window, min_periods, False)
+
+
+def rolling_std(values, window, min_periods):
+	"""
+	Rolling sample standard deviation, as ``rolling(...).std()``.
+	"""
+	values = _as_array(values)
+	if NUMBA_AVAILABLE:
+			return _rolling_moments_jit(values, window, min_periods, True)
+	return _numpy_rolling_moments(values, window, min_periods, True)
+
+
+def rolling_corr(x, y, window, min_periods):
+	"""
+	Rolling Pearson correlation over the bars where both series are valid,
+	as ``x.rolling(...).corr(y)``.
+	"""
+	x, y = _as_array(x), _as_array(y)
+	if NUMBA_AVAILABLE:
+			return _rolling_corr_jit(x, y, window, min_periods)
+	return _numpy_rolling_corr(x, y, window, min_periods)
+
+
+def rsi(prices, window=14):
+	"""
+	RSI from rolling mean gains and losses, as FeatureEngineer has always
+	computed it (simple averages, min_periods of half the window).
+	"""
+	prices = _as_array(prices)
+	min_periods = max(1, window // 2)
+	if NUMBA_AVAILABLE:
+			return _rsi_jit(prices, window, min_periods)
+	return _numpy_rsi(prices, window, min_periods)
+
+
+def true_range(high, low, close):
+	"""
+	max(high - low, |high - previous close|, |low - previous close|).
+	"""
+	high, low, close = _as_array(high), _as_array(low), _as_array(close)
+	previous = np.empty_like(close)
+	previous[0] = np.nan
+	previous[1:] = close[:-1]
+
+	out = high - low
+	np.maximum(out, np.abs(high - previous), out=out)
+	np.maximum(out, np.abs(low - previous), out=out)
+	return out
+
+
+def roc(prices, periods):
+	"""
+	Rate of change in percent over the given number of bars.
+	"""
+	prices = _as_array(prices)
+	out = np.full_like(prices, np.nan)
+	with np.errstate(divide='ignore', invalid='ignore'):
+			out[periods:] = (prices[periods:] - prices[:-periods]) / prices[:-periods] * 100
+	return out
@@ -0,0 +1,228 @@
+import time
+import pandas as pd
+
+from .market_data_provider import OHLCV_COLUMNS
+
+
+def iter_provider_bars(provider, symbol, interval='30m', period='7d', start=None, fetch=None):
+	"""
+	Ingest intraday bars from a provider one at a time.
+
+	Args:
+			provider (MarketDataProvider): Bar source (e.g. ReplayProvider for files)
+			symbol (str): Market symbol
+			interval (str): Bar interval
+			period (str): History period, used when start is not given
+			start (pd.Timestamp): Only bars from this timestamp on
+			fetch (callable): Download function with the provider.history signature,
+					e.g. DataCollector._download_with_retry; defaults to provider.history
+
+	Yields:
+			tuple: (timestamp, {'Open', 'High', 'Low', 'Close', 'Volume'})
+	"""
+	fetch = fetch or provider.history
+	data = fetch(symbol, period=period, start=start, interval=interval)
+	if data is None or data.empty:
+			return
+
+	columns = [col for col in OHLCV_COLUMNS if col in data.columns]
+	for timestamp, values in zip(data.index, data[columns].itertuples(index=False, name=None)):
+			yield timestamp, dict(zip(columns, values))
+
+
+def poll_provider_bars(provider, symbol, interval='30m', poll_seconds=60, stop_event=None, fetch=None):
+	"""
+	Live ingestion: poll the provider and yield each bar once as it appears.
+
+	The newest bar of a poll may still be forming, so it is yielded again on
+	the next poll when its values changed; the resampler handles the revision.
+
+	Args:
+			poll_seconds (float): Delay between polls
+			stop_event (threading.Event): Stops the generator when set
+
+	Yields:
+			tuple: (timestamp, bar) as iter_provider_bars
+	"""
+	last_timestamp, last_bar = None, None
+	while stop_event is None or not stop_event.is_set():
+			for timestamp, bar in iter_provider_bars(provider, symbol, interval, period='1d', start=last_timestamp, fetch=fetch):
+					if last_timestamp is not None and timestamp < last_timestamp:
+							continue
+					if timestamp == last_timestamp and bar == last_bar:
+							continue
+					last_timestamp, last_bar = timestamp, bar
+					yield timestamp, bar
+
+			if stop_event is not None:
+					stop_event.wait(poll_seconds)
+			else:
+					time.sleep(poll_seconds)
+
+
+class DailyResampler:
+	"""
+	Running daily OHLCV aggregate of intraday bars.
+
+	Keeps the open, high, low, close and volume of the current session and
+	updates them in O(1) per new bar. The session is closed (and kept in
+	``completed``) once a bar of a later date arrives. Live sources revise the
+	bar that is still forming: pushing a timestamp again replaces that bar and
+	the session aggregate is rebuilt from its bars.
+	"""
+
+	def __init__(self):
+			self.session = None
+			self.completed = {}
+			self._bars = {}
+			self._last_timestamp = None
+			self._aggregate = None
+
+	def push(self, timestamp, bar):
+			"""
+			Add one intraday bar.
+
+			Args:
+					timestamp (pd.Timestamp): Bar start
+					bar (dict): Open, High, Low, Close, Volume
+
+			Returns:
+					tuple: (session date, daily bar so far, closed) where closed is the
+							finished previous (date, daily bar), or None
+			"""
+			timestamp = pd.Timestamp(timestamp)
+			session = timestamp.normalize()
+			closed = None
+
+			if self.session is not None and session < self.session:
+					raise ValueError(f"Bar {timestamp} belongs to a session before {self.session.date()}")
+
+			if session != self.session:
+					if self.session is not None:
+							closed = (self.session, self.current())
+							self.completed[self.session] = closed[1]
+					self.session = session
+					self._bars = {}
+					self._last_timestamp = None
+					self._aggregate = None
+
+			revision = timestamp in self._bars or (self._last_timestamp is not None and timestamp < self._last_timestamp)
+			self._bars[timestamp] = dict(bar)
+
+			if revision:
+					self._rebuild()
+			elif self._aggregate is None:
+					self._aggregate = {col: bar[col] for col in ('Open', 'High', 'Low', 'Close', 'Volume')}
+			else:
+					aggregate = self._aggregate
+					aggregate['High'] = max(aggregate['High'], bar['High'])
+					aggregate['Low'] = min(aggregate['Low'], bar['Low'])
+					aggregate['Close'] = bar['Close']
+					aggregate['Volume'] += bar['Volume']
+			self._last_timestamp = max(self._last_timestamp or timestamp, timestamp)
+
+			return session, self.current(), closed
+
+	def _rebuild(self):
+			bars = [self._bars[ts] for ts in sorted(self._bars)]
+			self._aggregate = {
+					'Open': bars[0]['Open'],
+					'High': max(bar['High'] for bar in bars),
+					'Low': min(bar['Low'] for bar in bars),
+					'Close': bars[-1]['Close'],
+					'Volume': sum(bar['Volume'] for bar in bars)
+			}
+
+	def current(self):
+			"""
+			Daily bar of the current session from the bars pushed so far.
+			"""
+			return dict(self._aggregate) if self._aggregate is not None else None
+
+	def to_frame(self):
+			"""
+			Completed sessions plus the current one as a daily OHLCV DataFrame.
+			"""
+			sessions = dict(self.completed)
+			if self.session is not None:
+					sessions[self.session] = self.current()
+			if not sessions:
+					return pd.DataFrame(columns=OHLCV_COLUMNS)
+			return pd.DataFrame.from_dict(sessions, orient='index')[OHLCV_COLUMNS].sort_index().astype('float64')
+
+
+class IntradayPipeline:
+	"""
+	Feeds intraday bars into an IncrementalFeatureState.
+
+	Stages: an ingester (any iterable of (timestamp, bar), e.g.
+	iter_provider_bars), the DailyResampler, and a hook that writes the
+	session's running OHLCV into the feature state as a revisable daily bar.
+	Context columns (IBOV, FX, ...) keep their last daily values, as the daily
+	collector forward-fills them, so only the target's indicators move intraday.
+	"""
+
+	def __init__(self, state, last_row, target='PETR4', lock=None, on_update=None):
+			"""
+			Args:
+					state (IncrementalFeatureState): State primed with the daily history
+					last_row (Mapping): Last daily row consumed by the state
+					target (str): Target column name
+					lock (threading.Lock): Held while the state is updated
+					on_update (callable): Called with the pipeline after every bar
+			"""
+			self.state = state
+			self.target = target
+			self.lock = lock
+			self.on_update = on_update
+			self.resampler = DailyResampler()
+			self.row = dict(last_row)
+			self.bars_processed = 0
+
+	def _daily_row(self, daily_bar):
+			row = dict(self.row)
+			row[self.target] = daily_bar['Close']
+			row[f'{self.target}_Open'] = daily_bar['Open']
+			row[f'{self.target}_High'] = daily_bar['High']
+			row[f'{self.target}_Low'] = daily_bar['Low']
+			row[f'{self.target}_Volume'] = daily_bar['Volume']
+			return {name: value for name, value in row.items() if name in self.row}
+
+	def push(self, timestamp, bar):
+			"""
+			Process one intraday bar through the resampler and the feature state.
+
+			Returns:
+					pd.Timestamp: Session date the state now reflects
+			"""
+			session, daily_bar, _ = self.resampler.push(timestamp, bar)
+			row = self._daily_row(daily_bar)
+
+			if self.lock is not None:
+					with self.lock:
+							self.state.update(session, row, revisable=True)
+			else:
+					self.state.update(session, row, revisable=True)
+
+			self.bars_processed += 1
+			if self.on_update is not None:
+					self.on_update(self)
+			return session
+
+	def process(self, bars):
+			"""
+			Generator stage: consume bars lazily and yield the updated session date.
+			"""
+			for timestamp, bar in bars:
+					yield self.push(timestamp, bar)
+
+	def run(self, bars):
+			"""
+			Consume every bar from the source.
+
+			Returns:
+					int: Number of bars processed
+			"""
+			for _ in self.process(bars):
+					pass
+			return self.bars_processed
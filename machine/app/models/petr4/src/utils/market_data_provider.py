@@ -0,0 +1,248 @@
+import os
+import re
+import zlib
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def normalize_bars(data):
+	"""
+	Flatten provider output to plain OHLCV columns with a naive date index.
+	"""
+	if data is None or data.empty:
+			return pd.DataFrame()
+
+	if isinstance(data.columns, pd.MultiIndex):
+			data = data.copy()
+			data.columns = data.columns.get_level_values(0)
+
+	if data.index.tz is not None:
+			data = data.copy()
+			data.index = data.index.tz_localize(None)
+
+	columns = [col for col in OHLCV_COLUMNS if col in data.columns]
+	return data[columns].astype('float64')
+
+
+def period_start(period, end=None):
+	"""
+	Convert a yfinance-style period into the first date it covers.
+
+	Args:
+			period (str): Period such as '5d', '6mo', '1y' or 'max'
+			end (pd.Timestamp): Reference date, defaults to today
+
+	Returns:
+			pd.Timestamp: Start date, or None for 'max' / unknown periods
+	"""
+	match = re.fullmatch(r'(\d+)(d|wk|mo|y)', str(period))
+	if not match:
+			return None
+
+	amount, unit = int(match.group(1)), match.group(2)
+	offsets = {
+			'd': pd.DateOffset(days=amount),
+			'wk': pd.DateOffset(weeks=amount),
+			'mo': pd.DateOffset(months=amount),
+			'y': pd.DateOffset(years=amount)
+	}
+	end = pd.Timestamp.today() if end is None else pd.Timestamp(end)
+	return end.normalize() - offsets[unit]
+
+
+class MarketDataProvider:
+	"""
+	Source of OHLCV bars used by DataCollector.
+
+	Subclasses implement ``history``; ``remote`` tells the collector whether the
+	bars are worth keeping in the local MarketDataStore.
+	"""
+
+	name = 'base'
+	remote = False
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			"""
+			Get bars for a symbol.
+
+			Args:
+					symbol (str): Market symbol (e.g. 'PETR4.SA')
+					period (str): History period, used when start is not given
+					start (pd.Timestamp): First date to return (inclusive)
+					interval (str): Bar interval
+					timeout (float): Seconds allowed for the request
+
+			Returns:
+					pd.DataFrame: OHLCV bars indexed by timestamp
+			"""
+			raise NotImplementedError
+
+	def latest_price(self, symbol):
+			data = self.history(symbol, period='5d')
+			if not data.empty:
+					return data['Close'].iloc[-1]
+			return None
+
+
+class YFinanceProvider(MarketDataProvider):
+	"""
+	Live bars from Yahoo Finance.
+
+	Uses the Ticker API, which is safe to call from several threads
+	(yf.download keeps module-level state between calls).
+	"""
+
+	name = 'yfinance'
+	remote = True
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			kwargs = {'interval': interval, 'raise_errors': True}
+			if timeout is not None:
+					kwargs['timeout'] = timeout
+			if start is not None:
+					kwargs['start'] = start
+			else:
+					kwargs['period'] = period or '1y'
+
+			return normalize_bars(yf.Ticker(symbol).history(**kwargs))
+
+	def latest_price(self, symbol):
+			data = yf.Ticker(symbol).history(period='1d')
+			if not data.empty:
+					return data['Close'].iloc[-1]
+			return None
+
+
+class ReplayProvider(MarketDataProvider):
+	"""
+	Replays bars recorded in local CSV or Parquet files.
+
+	Files are looked up as ``<data_dir>/<symbol>.csv`` (or ``.parquet``); intraday
+	intervals use ``<symbol>_<interval>``. Periods are measured back from the last
+	recorded bar, so old recordings still produce full windows.
+	"""
+
+	name = 'replay'
+
+	def __init__(self, data_dir=os.path.join('data', 'replay')):
+			self.data_dir = data_dir
+			self._frames = {}
+
+	def _load(self, symbol, interval):
+			key = (symbol, interval)
+			if key not in self._frames:
+					base_name = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol)
+					if interval != '1d':
+							base_name = f"{base_name}_{interval}"
+
+					path = os.path.join(self.data_dir, base_name)
+					if os.path.exists(f"{path}.parquet"):
+							data = pd.read_parquet(f"{path}.parquet")
+					elif os.path.exists(f"{path}.csv"):
+							data = pd.read_csv(f"{path}.csv", index_col=0, parse_dates=True)
+					else:
+							raise FileNotFoundError(f"No replay file for {symbol} ({interval}) in {self.data_dir}")
+
+					self._frames[key] = normalize_bars(data.sort_index())
+
+			return self._frames[key]
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			data = self._load(symbol, interval)
+			if data.empty:
+					return data
+
+			if start is None:
+					start = period_start(period or '1y', end=data.index.max())
+
+			return data[data.index >= start] if start is not None else data
+
+
+class SyntheticProvider(MarketDataProvider):
+	"""
+	Deterministic random-walk bars for any number of years.
+
+	Every symbol follows a geometric Brownian motion driven partly by a shared
+	market factor, so the cross-asset features still carry signal. The same
+	seed always yields the same bars.
+	"""
+
+	name = 'synthetic'
+
+	def __init__(self, years=6, seed=42, end=None):
+			self.years = years
+			self.seed = seed
+			self.end = pd.Timestamp.today().normalize() if end is None else pd.Timestamp(end).normalize()
+			self._index = pd.bdate_range(end=self.end, periods=int(years * 252))
+			self._market = np.random.default_rng(seed).normal(0, 0.01, len(self._index))
+			self._frames = {}
+
+	def _generate(self, symbol):
+			if symbol not in self._frames:
+					rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+					n = len(self._index)
+
+					beta = rng.uniform(0.3, 1.2)
+					returns = 0.0002 + beta * self._market + rng.normal(0, 0.012, n)
+					close = rng.uniform(20, 120) * np.exp(np.cumsum(returns))
+
+					open_ = close * (1 + rng.normal(0, 0.004, n))
+					spread = np.abs(rng.normal(0, 0.008, n))
+					high = np.maximum(open_, close) * (1 + spread)
+					low = np.minimum(open_, close) * (1 - spread)
+					volume = rng.lognormal(17, 0.4, n).round()
+
+					self._frames[symbol] = pd.DataFrame({
+							'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume
+					}, index=self._index)
+
+			return self._frames[symbol]
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			if interval != '1d':
+					raise ValueError(f"SyntheticProvider only generates daily bars, got {interval}")
+
+			data = self._generate(symbol)
+			if start is None:
+					start = period_start(period or '1y', end=self.end)
+
+			return data[data.index >= start] if start is not None else data
+
+
+PROVIDERS = {
+	'yfinance': YFinanceProvider,
+	'replay': ReplayProvider,
+	'synthetic': SyntheticProvider
+}
+
+
+def create_provider(name='yfinance', **options):
+	"""
+	Build a market data provider by name.
+
+	Args:
+			name (str): One of 'yfinance', 'replay' or 'synthetic'
+			**options: Constructor arguments for the provider
+
+	Returns:
+			MarketDataProvider: Configured provider
+	"""
+	if name not in PROVIDERS:
+			raise ValueError(f"Unknown market data provider: {name}")
+	return PROVIDERS[name](**options)
+
+
+def create_provider_from_env():
+	"""
+	Build the provider selected by MARKET_DATA_PROVIDER and its settings.
+	"""
+	name = os.environ.get('MARKET_DATA_PROVIDER', 'yfinance')
+	if name == 'replay':
+			return create_provider(name, data_dir=os.environ.get('MARKET_DATA_REPLAY_DIR', os.path.join('data', 'replay')))
+	if name == 'synthetic':
+			return create_provider(name, years=float(os.environ.get('SYNTHETIC_DATA_YEARS', 6)))
+	return create_provider(name)
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import pandas as pd
+
+try:
+	import pyarrow  # noqa: F401
+	PARQUET_AVAILABLE = True
+except ImportError:
+	PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataStore:
+	"""
+	Local columnar store for daily OHLCV bars.
+
+	Each symbol is kept in its own file under ``base_dir``, indexed by date, so
+	collectors only need to download the bars after the last stored one. Files
+	are Parquet when pyarrow is installed and pandas pickles otherwise. A small
+	JSON sidecar records how far back each history is complete, which can be
+	later than the first stored bar's period start for recently listed symbols.
+	"""
+
+	def __init__(self, base_dir=os.path.join('data', 'market')):
+			self.base_dir = base_dir
+			self.file_format = 'parquet' if PARQUET_AVAILABLE else 'pkl'
+			os.makedirs(self.base_dir, exist_ok=True)
+
+	def _path(self, symbol):
+			safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol)
+			return os.path.join(self.base_dir, f"{safe_name}.{self.file_format}")
+
+	def _coverage_path(self, symbol):
+			return f"{os.path.splitext(self._path(symbol))[0]}.coverage.json"
+
+	def _read(self, path):
+			return pd.read_parquet(path) if self.file_format == 'parquet' else pd.read_pickle(path)
+
+	def _write(self, df, path):
+			if self.file_format == 'parquet':
+					df.to_parquet(path)
+			else:
+					df.to_pickle(path)
+
+	def load(self, symbol):
+			"""
+			Load every stored bar for a symbol.
+
+			Args:
+					symbol (str): Market symbol (e.g. 'PETR4.SA')
+
+			Returns:
+					pd.DataFrame: Stored bars, or None if nothing is stored
+			"""
+			path = self._path(symbol)
+			if not os.path.exists(path):
+					return None
+
+			try:
+					df = self._read(path)
+			except Exception as e:
+					logger.warning("Corrupted store file for %s: %s", symbol, e)
+					return None
+
+			return df if not df.empty else None
+
+	def last_date(self, symbol):
+			df = self.load(symbol)
+			return df.index.max() if df is not None else None
+
+	def age_seconds(self, symbol):
+			"""
+			Seconds since the symbol file was last written, or None if missing.
+			"""
+			path = self._path(symbol)
+			if not os.path.exists(path):
+					return None
+			return time.time() - os.path.getmtime(path)
+
+	def upsert(self, symbol, data):
+			"""
+			Merge new bars into the stored history. Bars already stored for the same
+			date are replaced, so a partial bar for the current session is refreshed.
+
+			Args:
+					symbol (str): Market symbol
+					data (pd.DataFrame): New OHLCV bars indexed by date
+
+			Returns:
+					pd.DataFrame: The merged history
+			"""
+			stored = self.load(symbol)
+
+			if data is None or data.empty:
+					if stored is not None:
+							self.touch(symbol)
+					return stored
+
+			merged = data if stored is None else pd.concat([stored, data])
+			merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+			path = self._path(symbol)
+			tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+			self._write(merged, tmp_path)
+			os.replace(tmp_path, path)
+
+			return merged
+
+	def covered_from(self, symbol):
+			"""
+			Date from which the stored history is complete.
+
+			Returns:
+					pd.Timestamp: Coverage start, pd.Timestamp.min when every bar the
+					provider has is stored, or None if unknown
+			"""
+			path = self._coverage_path(symbol)
+			if not os.path.exists(path):
+					return None
+
+			try:
+					with open(path) as f:
+							since = json.load(f)['complete_from']
+			except Exception as e:
+					logger.warning("Corrupted coverage file for %s: %s", symbol, e)
+					return None
+
+			return pd.Timestamp.min if since is None else pd.Timestamp(since)
+
+	def mark_covered(self, symbol, since):
+			"""
+			Record that the provider has no bars before since that are missing here.
+
+			Coverage only ever extends back: an earlier recorded start is kept.
+
+			Args:
+					symbol (str): Market symbol
+					since (pd.Timestamp): Start of the downloaded period, None for the
+							full history ('max')
+			"""
+			since = pd.Timestamp.min if since is None else pd.Timestamp(since)
+			current = self.covered_from(symbol)
+			if current is not None and current <= since:
+					return
+
+			path = self._coverage_path(symbol)
+			tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+			with open(tmp_path, 'w') as f:
+					json.dump({'complete_from': None if since == pd.Timestamp.min else since.isoformat()}, f)
+			os.replace(tmp_path, path)
+
+	def touch(self, symbol):
+			"""
+			Mark a symbol as freshly checked without rewriting its bars.
+			"""
+			path = self._path(symbol)
+			if os.path.exists(path):
+					os.utime(path, None)
@@ -0,0 +1,191 @@
+import math
+import time
+import threading
+from bisect import bisect_left
+
+
+# Upper bounds in seconds, from sub-millisecond model calls to slow downloads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value):
+	if value == math.inf:
+			return '+Inf'
+	return repr(float(value))
+
+
+def _escape(value):
+	return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+	pairs = list(zip(names, values)) + list(extra)
+	if not pairs:
+			return ''
+	return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Timer:
+	"""
+	Context manager observing the time spent in its block.
+	"""
+
+	__slots__ = ('histogram', 'labels', 'started')
+
+	def __init__(self, histogram, labels):
+			self.histogram = histogram
+			self.labels = labels
+
+	def __enter__(self):
+			self.started = time.perf_counter()
+			return self
+
+	def __exit__(self, exc_type, exc, tb):
+			self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+			return False
+
+
+class Histogram:
+	"""
+	Cumulative histogram of observations, one series per label combination.
+
+	An observation is one bisect and three additions under a lock, a couple
+	of microseconds, so the spans can stay on in production. Counts live in
+	the process: under a pre-forked server every worker reports its own.
+	"""
+
+	def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+			"""
+			Args:
+					name (str): Metric name, e.g. 'prediction_stage_seconds'
+					documentation (str): HELP text
+					labelnames (tuple): Label names, values are given to observe()
+					buckets (tuple): Increasing bucket upper bounds; +Inf is added
+			"""
+			self.name = name
+			self.documentation = documentation
+			self.labelnames = tuple(labelnames)
+			self.buckets = tuple(sorted(buckets)) + (math.inf,)
+			self._series = {}
+			self._lock = threading.Lock()
+
+	def observe(self, value, *labelvalues):
+			if len(labelvalues) != len(self.labelnames):
+					raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+
+			index = bisect_left(self.buckets, value)
+			with self._lock:
+					series = self._series.get(labelvalues)
+					if series is None:
+							series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+					series[0][index] += 1
+					series[1] += value
+					series[2] += 1
+
+	def time(self, *labelvalues):
+			"""
+			Context manager observing the duration of its block.
+			"""
+			return _Timer(self, labelvalues)
+
+	def snapshot(self):
+			"""
+			Returns:
+					dict: Label values -> {'buckets': cumulative counts, 'sum', 'count'}
+			"""
+			with self._lock:
+					series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+			result = {}
+			for labels, (counts, total, count) in series.items():
+					cumulative, running = [], 0
+					for c in counts:
+							running += c
+							cumulative.append(running)
+					result[labels] = {'buckets': cumulative, 'sum': total, 'count': count}
+			return result
+
+	def render(self):
+			"""
+			Returns:
+					list: Lines of the text exposition format
+			"""
+			lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+			for labels, series in sorted(self.snapshot().items()):
+					for bound, count in zip(self.buckets, series['buckets']):
+							label_text = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+							lines.append(f"{self.name}_bucket{label_text} {count}")
+					label_text = _format_labels(self.labelnames, labels)
+					lines.append(f"{self.name}_sum{label_text} {_format_value(series['sum'])}")
+					lines.append(f"{self.name}_count{label_text} {series['count']}")
+			return lines
+
+	def reset(self):
+			with self._lock:
+					self._series.clear()
+
+
+class MetricsRegistry:
+	"""
+	Named histograms rendered together for the /metrics endpoint.
+	"""
+
+	def __init__(self):
+			self._metrics = {}
+			self._lock = threading.Lock()
+
+	def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+			"""
+			Return the histogram registered under name, creating it on first use.
+			"""
+			with self._lock:
+					if name not in self._metrics:
+							self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+					return self._metrics[name]
+
+	def render(self):
+			"""
+			Returns:
+					str: Every metric in the text exposition format (version 0.0.4)
+			"""
+			with self._lock:
+					metrics = list(self._metrics.values())
+			return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+	def reset(self):
+			with self._lock:
+					metrics = list(self._metrics.values())
+			for metric in metrics:
+					metric.reset()
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+	'prediction_stage_seconds',
+	'Time spent in each stage of the prediction pipeline',
+	('stage',)
+)
+FETCH_SECONDS = REGISTRY.histogram(
+	'market_data_fetch_seconds',
+	'Time spent fetching the bars of one symbol (store reads and downloads)',
+	('symbol',)
+)
+FEATURE_FAMILY_SECONDS = REGISTRY.histogram(
+	'feature_family_seconds',
+	'Time spent computing each feature family in one create_features call',
+	('family',)
+)
+
+
+def timed(stage):
+	"""
+	Time a block as one prediction pipeline stage.
+
+	Example:
+			with timed('inference'):
+					prediction = model.predict(X)
+	"""
+	return STAGE_SECONDS.time(stage)
@@ -0,0 +1,125 @@
+"""
+Production Server Entry Point
+Serves the API with several gunicorn worker processes sharing preloaded models.
+"""
+
+import gc
+import os
+import sys
+import logging
+import argparse
+
+from dotenv import load_dotenv
+from joblib.externals.loky import get_reusable_executor
+
+from .logging_config import configure_logging
+
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    BaseApplication = object
+    GUNICORN_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+
+def preload_models(tickers=None, train_missing=True):
+    """
+    Build the app and load the models in the current (master) process.
+
+    The app module builds the model registry on import; loading the models
+    here, before the workers are forked, lets every worker share them
+    copy-on-write. Artifacts are memory-mapped, so their numpy payloads are
+    shared through the page cache as well. After preloading, workers never
+    start a training run of their own and answer retrain requests with 409.
+    A model trained out of band replaces the artifact file, and every worker
+    reloads it on its next request.
+
+    Args:
+        tickers (list): Tickers to preload, defaults to every registered one
+        train_missing (bool): Train, once, the models that have no artifact yet
+
+    Returns:
+        Flask: The configured application
+    """
+    from .main import create_app
+    from .api.routes import model_registry
+
+    app = create_app()
+    ready = model_registry.preload(tickers, train_missing=train_missing)
+    model_registry.set_train_on_demand(False)
+    logger.info("Preloaded models: %s", ', '.join(ready) or 'none')
+
+    # Training uses joblib's reusable process pool; shut it down so forked
+    # workers do not inherit handles to the master's pool processes
+    get_reusable_executor().shutdown(wait=True)
+
+    # Move everything allocated so far out of the collector's generations, so
+    # garbage collections in the workers do not write to (and copy) its pages
+    gc.freeze()
+    return app
+
+
+class PreforkServer(BaseApplication):
+    """
+    gunicorn application serving an already loaded Flask app.
+    """
+
+    def __init__(self, app, options):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the prediction API with pre-forked workers")
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 1)),
+                        help="Worker processes")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('SERVER_THREADS', 4)),
+                        help="Threads per worker")
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('SERVER_TIMEOUT', 120)),
+                        help="Seconds before a silent worker is restarted")
+    parser.add_argument('--tickers', default=os.environ.get('SERVER_PRELOAD_TICKERS'),
+                        help="Comma separated tickers to preload, defaults to all registered")
+    parser.add_argument('--no-train', action='store_true',
+                        help="Do not train models that have no artifact")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Main entry point for the production server.
+    """
+    load_dotenv()
+    configure_logging()
+    args = parse_args(argv)
+
+    if not GUNICORN_AVAILABLE:
+        raise SystemExit("gunicorn is required for the production server: poetry install -E server (or pip install gunicorn)")
+
+    tickers = [t.strip() for t in args.tickers.split(',') if t.strip()] if args.tickers else None
+    app = preload_models(tickers, train_missing=not args.no_train)
+
+    PreforkServer(app, {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'preload_app': True
+    }).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -32,6 +32,24 @@ class TestAPI(unittest.TestCase):
 			self.assertIn('health', data)
 			self.assertIn('timestamp', data)
 	
+	def test_metrics_endpoint(self):
+			response = self.client.get('/metrics')
+			self.assertEqual(response.status_code, 200)
+			self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+			self.assertIn('# TYPE prediction_stage_seconds histogram', response.get_data(as_text=True))
+	
+	def test_retrain_refused_without_training_on_demand(self):
+			from app.api.routes import model_registry
+			model_registry.set_train_on_demand(False)
+			self.addCleanup(model_registry.set_train_on_demand, True)
+			
+			response = self.client.post('/petr4/retrain', json={'period': '1y'})
+			self.assertEqual(response.status_code, 409)
+			self.assertEqual(json.loads(response.data)['error'], 'Retraining disabled')
+			
+			response = self.client.post('/petr4/predict', json={'retrain': True})
+			self.assertEqual(response.status_code, 409)
+	
 	def test_api_docs_endpoint(self):
 			response = self.client.get('/api/docs')
 			self.assertEqual(response.status_code, 200)
@@ -0,0 +1,98 @@
+import unittest
+import tempfile
+import asyncio
+import shutil
+import time
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.asgi import QUART_AVAILABLE, create_async_app
+from app.models.petr4.src.models.predictor import StockPredictor
+from app.models.petr4.src.services.model_registry import ModelRegistry, parse_tickers
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+class SlowProvider(SyntheticProvider):
+	"""
+	Synthetic provider with a fixed network latency per download.
+	"""
+
+	def __init__(self, latency=0.2, **kwargs):
+			super().__init__(**kwargs)
+			self.latency = latency
+			self.calls = 0
+			self._lock = threading.Lock()
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			with self._lock:
+					self.calls += 1
+			time.sleep(self.latency)
+			return super().history(symbol, period=period, start=start, interval=interval, timeout=timeout)
+
+
+@unittest.skipUnless(QUART_AVAILABLE, "quart is not installed")
+class TestAsyncAPI(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.model_dir = tempfile.mkdtemp()
+			cls.tickers = parse_tickers('PETR4')
+
+			predictor = StockPredictor('PETR4', 'PETR4.SA', provider=SyntheticProvider(years=4, end='2024-06-28'))
+			predictor.cv_config['max_splits'] = 3
+			assert predictor.train('3y') is not None
+			predictor.save_model(os.path.join(cls.model_dir, 'petr4_model.joblib'))
+
+	@classmethod
+	def tearDownClass(cls):
+			shutil.rmtree(cls.model_dir)
+
+	def setUp(self):
+			self.provider = SlowProvider(years=4, end='2024-06-28')
+			registry = ModelRegistry(provider=self.provider, tickers=self.tickers, model_dir=self.model_dir,
+															 train_on_demand=False)
+			self.app = create_async_app(registry, cpu_workers=2)
+
+	def tearDown(self):
+			self.app.config['CPU_EXECUTOR'].shutdown(wait=True)
+
+	def run_requests(self, *paths):
+			async def fetch_all():
+					client = self.app.test_client()
+					responses = await asyncio.gather(*(client.get(path) for path in paths))
+					return [(response.status_code, await response.get_json()) for response in responses]
+			return asyncio.run(fetch_all())
+
+	def test_concurrent_predictions_share_one_download(self):
+			started = time.perf_counter()
+			results = self.run_requests(*['/petr4/predict'] * 8)
+			elapsed = time.perf_counter() - started
+
+			for status_code, body in results:
+					self.assertEqual(status_code, 200)
+					self.assertEqual(body['status'], 'success')
+			self.assertEqual(len({body['prediction']['predicted_price'] for _, body in results}), 1)
+
+			# One collection for all eight requests, its symbols downloaded concurrently
+			symbols = len(self.app.config['MODEL_REGISTRY'].get('PETR4').predictor.data_collector.symbols)
+			self.assertEqual(self.provider.calls, symbols)
+			self.assertLess(elapsed, self.provider.latency * symbols)
+
+	def test_json_contracts_match_the_flask_api(self):
+			(health_code, health), (info_code, info), (missing_code, missing) = self.run_requests(
+					'/health', '/petr4/info', '/abcd3/predict'
+			)
+			self.assertEqual(health_code, 200)
+			self.assertEqual(health['status'], 'success')
+			self.assertEqual(info_code, 200)
+			self.assertEqual(info['status'], 'success')
+			self.assertIn('model', info)
+			self.assertEqual(missing_code, 404)
+			self.assertEqual(missing['error'], 'Unknown ticker')
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import time
+import sys
+import os
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.models.backtest import Backtester
+from app.models.petr4.src.models.predictor import StockPredictor, recommendation_signals, RECOMMENDATIONS
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+class TestBacktester(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.predictor = StockPredictor('PETR4', provider=SyntheticProvider(years=6, end='2024-06-28'))
+			cls.predictor.cv_config['max_splits'] = 3
+			cls.predictor.train('3y')
+			cls.df = cls.predictor.data_collector.collect_data('6y')
+			cls.backtester = Backtester(cls.predictor, cls.df)
+
+	def test_rule_matches_predict(self):
+			single = self.predictor.predict(self.df)
+			change_pct = single['change_percentage']
+
+			side, strength = recommendation_signals(change_pct, single['model_confidence'])
+			self.assertEqual(RECOMMENDATIONS[(int(side), int(strength))][0], single['recommendation'])
+
+			position = self.backtester.run()['series']['position'].iloc[-1]
+			expected = {'BUY': 1, 'SELL': -1}.get(single['recommendation'].split()[0], 0)
+			self.assertEqual(position, expected)
+
+	def test_pnl_matches_day_by_day_replay(self):
+			result = self.backtester.run(thresholds={'moderate_change': 0.3}, cost_bps=10)
+			series = result['series']
+
+			equity, peak, position, worst = 1.0, 1.0, 0.0, 0.0
+			for i in range(len(series) - 1):
+					new_position = series['position'].iloc[i]
+					day_return = series['price'].iloc[i + 1] / series['price'].iloc[i] - 1
+					equity *= 1 + new_position * day_return - abs(new_position - position) * 10 / 10000
+					peak = max(peak, equity)
+					worst = min(worst, equity / peak - 1)
+					position = new_position
+
+			self.assertAlmostEqual(result['summary']['total_return'], equity - 1, places=10)
+			self.assertAlmostEqual(result['summary']['max_drawdown'], worst, places=10)
+			self.assertIsNotNone(result['out_of_sample'])
+			self.assertLess(result['out_of_sample']['days'], result['summary']['days'])
+
+	def test_six_year_threshold_sweep_is_fast(self):
+			self.assertGreater(len(self.backtester.index), 5 * 252)
+
+			started = time.perf_counter()
+			returns = [
+					self.backtester.run(thresholds={'moderate_change': value})['summary']['total_return']
+					for value in np.linspace(0.1, 2.0, 20)
+			]
+			self.assertLess(time.perf_counter() - started, 1.0)
+			self.assertEqual(len(returns), 20)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,245 @@
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.utils.data_collector import DataCollector
+from app.models.petr4.src.utils.market_data_store import MarketDataStore
+from app.models.petr4.src.utils.market_data_provider import (
+	MarketDataProvider, ReplayProvider, SyntheticProvider, create_provider
+)
+
+
+def make_bars(start, periods):
+	index = pd.bdate_range(start=start, periods=periods)
+	close = np.linspace(30, 40, periods)
+	return pd.DataFrame({
+			'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000.0
+	}, index=index)
+
+
+class FakeProvider(MarketDataProvider):
+	"""
+	In-memory provider with configurable latency and transient failures.
+	"""
+
+	name = 'fake'
+	remote = True
+
+	def __init__(self, frames, delays=None, failures=None):
+			self.frames = frames
+			self.delays = delays or {}
+			self.failures = dict(failures or {})
+			self.calls = []
+
+	def history(self, symbol, period=None, start=None, interval='1d', timeout=None):
+			self.calls.append({'symbol': symbol, 'period': period, 'start': start})
+			time.sleep(self.delays.get(symbol, 0))
+
+			if self.failures.get(symbol, 0) > 0:
+					self.failures[symbol] -= 1
+					raise ConnectionError(f"{symbol} unavailable")
+
+			data = self.frames[symbol]
+			return data if start is None else data[data.index >= start]
+
+
+def make_collector(frames, delays=None, failures=None, **kwargs):
+	collector = DataCollector(provider=FakeProvider(frames, delays, failures), **kwargs)
+	collector.symbols = {symbol: symbol.split('.')[0] for symbol in frames}
+	return collector
+
+
+class TestMarketDataStore(unittest.TestCase):
+
+	def setUp(self):
+			self.tmp_dir = tempfile.mkdtemp()
+			self.store = MarketDataStore(self.tmp_dir)
+
+	def tearDown(self):
+			shutil.rmtree(self.tmp_dir)
+
+	def test_upsert_replaces_overlapping_bars(self):
+			bars = make_bars('2024-01-01', 10)
+			self.store.upsert('PETR4.SA', bars)
+
+			update = bars.iloc[-1:].copy()
+			update['Close'] = 99.0
+			merged = self.store.upsert('PETR4.SA', pd.concat([update, make_bars('2024-01-15', 2)]))
+
+			self.assertEqual(len(merged), 12)
+			self.assertEqual(self.store.load('PETR4.SA').loc[bars.index[-1], 'Close'], 99.0)
+			self.assertTrue(self.store.load('PETR4.SA').index.is_monotonic_increasing)
+
+	def test_coverage_only_extends_back(self):
+			self.assertIsNone(self.store.covered_from('PETR4.SA'))
+
+			self.store.mark_covered('PETR4.SA', pd.Timestamp('2022-01-03'))
+			self.store.mark_covered('PETR4.SA', pd.Timestamp('2023-01-02'))
+			self.assertEqual(self.store.covered_from('PETR4.SA'), pd.Timestamp('2022-01-03'))
+
+			self.store.mark_covered('PETR4.SA', None)
+			self.assertEqual(self.store.covered_from('PETR4.SA'), pd.Timestamp.min)
+
+
+class TestDataCollectorStore(unittest.TestCase):
+
+	def setUp(self):
+			self.tmp_dir = tempfile.mkdtemp()
+			start = pd.Timestamp.today().normalize() - pd.DateOffset(years=1)
+			self.history = make_bars(start, 250)
+			self.collector = make_collector({'PETR4.SA': self.history}, store=MarketDataStore(self.tmp_dir))
+
+	def tearDown(self):
+			shutil.rmtree(self.tmp_dir)
+
+	def test_second_collect_only_fetches_delta(self):
+			first = self.collector.collect_data(period='1y')
+			self.collector.collect_data(period='1y')
+			self.collector.refresh_interval = 0
+			second = self.collector.collect_data(period='1y')
+
+			calls = self.collector.provider.calls
+			self.assertEqual(len(calls), 2)
+			self.assertEqual(calls[0]['period'], '1y')
+			self.assertEqual(calls[1]['start'], self.history.index[-1])
+			pd.testing.assert_frame_equal(first, second, check_freq=False)
+
+	def test_max_period_and_late_listing_fetch_delta_after_first_download(self):
+			# Listed four months ago: the store can never reach back a full year
+			listed = pd.Timestamp.today().normalize() - pd.DateOffset(months=4)
+			self.collector.provider.frames['PETR4.SA'] = make_bars(listed, 80)
+			self.collector.refresh_interval = 0
+
+			for period in ['1y', '1y', 'max', 'max', '6mo']:
+					self.collector._get_daily_data('PETR4.SA', period)
+
+			periods = [call['period'] for call in self.collector.provider.calls]
+			self.assertEqual(periods, ['1y', None, 'max', None, None])
+			self.assertEqual(self.collector.store.covered_from('PETR4.SA'), pd.Timestamp.min)
+
+
+class TestParallelCollection(unittest.TestCase):
+
+	def setUp(self):
+			self.frames = {f'SYM{i}.SA': make_bars('2023-01-02', 300) for i in range(11)}
+			self.frames['PETR4.SA'] = make_bars('2023-01-02', 300)
+
+	def make_collector(self, delays=None, failures=None, **kwargs):
+			return make_collector(self.frames, delays, failures, use_store=False, retry_backoff=0.01, **kwargs)
+
+	def test_parallel_matches_sequential(self):
+			parallel = self.make_collector().collect_data(period='1y')
+			sequential = self.make_collector().collect_data(period='1y', parallel=False)
+
+			pd.testing.assert_frame_equal(parallel, sequential)
+			self.assertEqual(len(parallel.columns), 16)
+
+	def test_fetches_run_concurrently(self):
+			collector = self.make_collector(delays={symbol: 0.2 for symbol in self.frames}, max_workers=12)
+
+			started = time.perf_counter()
+			collector.collect_data(period='1y')
+			elapsed = time.perf_counter() - started
+
+			self.assertLess(elapsed, 1.0)
+
+	def test_retries_transient_failures(self):
+			collector = self.make_collector(failures={'SYM0.SA': 2})
+			df = collector.collect_data(period='1y')
+
+			self.assertIn('SYM0', df.columns)
+			self.assertEqual(sum(1 for call in collector.provider.calls if call['symbol'] == 'SYM0.SA'), 3)
+
+	def test_drops_slow_failing_and_short_symbols(self):
+			self.frames['SYM1.SA'] = make_bars('2023-01-02', 80)
+			collector = self.make_collector(
+					delays={'SYM2.SA': 1.0}, failures={'SYM3.SA': 10}, symbol_timeout=0.3
+			)
+			df = collector.collect_data(period='1y')
+
+			for name in ['SYM1', 'SYM2', 'SYM3']:
+					self.assertNotIn(name, df.columns)
+			self.assertIn('PETR4', df.columns)
+
+	def test_petr4_is_required(self):
+			collector = self.make_collector(failures={'PETR4.SA': 10})
+
+			with self.assertRaises(ValueError):
+					collector.collect_data(period='1y')
+
+
+class TestProviders(unittest.TestCase):
+
+	def test_synthetic_provider_is_deterministic(self):
+			first = SyntheticProvider(years=10, seed=7, end='2024-06-28')
+			second = create_provider('synthetic', years=10, seed=7, end='2024-06-28')
+
+			data = first.history('PETR4.SA', period='max')
+			self.assertEqual(len(data), 2520)
+			self.assertTrue((data['High'] >= data[['Open', 'Close']].max(axis=1)).all())
+			pd.testing.assert_frame_equal(data, second.history('PETR4.SA', period='max'))
+			self.assertFalse(data['Close'].equals(first.history('VALE3.SA', period='max')['Close']))
+
+	def test_replay_provider_reads_recorded_files(self):
+			tmp_dir = tempfile.mkdtemp()
+			try:
+					make_bars('2020-01-01', 600).to_csv(os.path.join(tmp_dir, 'PETR4.SA.csv'))
+					provider = ReplayProvider(tmp_dir)
+
+					data = provider.history('PETR4.SA', period='1y')
+					self.assertGreater(len(data), 250)
+					self.assertLess(len(data), 265)
+					self.assertEqual(list(data.columns), ['Open', 'High', 'Low', 'Close', 'Volume'])
+
+					with self.assertRaises(FileNotFoundError):
+							provider.history('VALE3.SA', period='1y')
+			finally:
+					shutil.rmtree(tmp_dir)
+
+	def test_intraday_sessions_replace_daily_bars(self):
+			tmp_dir = tempfile.mkdtemp()
+			try:
+					daily = make_bars('2022-01-03', 300)
+					last_day = daily.index[-1]
+					next_day = last_day + pd.offsets.BDay(1)
+					index = pd.DatetimeIndex(
+							list(pd.date_range(last_day + pd.Timedelta(hours=10), periods=4, freq='30min')) +
+							list(pd.date_range(next_day + pd.Timedelta(hours=10), periods=3, freq='30min'))
+					)
+					intraday = pd.DataFrame({
+							'Open': [50, 51, 52, 53, 60, 61, 62], 'High': [55, 56, 57, 58, 65, 66, 67],
+							'Low': [45, 46, 47, 48, 55, 56, 57], 'Close': [51, 52, 53, 54, 61, 62, 63],
+							'Volume': [10, 10, 10, 10, 20, 20, 20]
+					}, index=index, dtype=float)
+					daily.to_csv(os.path.join(tmp_dir, 'PETR4.SA.csv'))
+					intraday.to_csv(os.path.join(tmp_dir, 'PETR4.SA_30m.csv'))
+
+					collector = DataCollector(provider=ReplayProvider(tmp_dir))
+					data = collector._get_intraday_data('PETR4.SA', period='1y')
+
+					self.assertEqual(data.index[-1], next_day)
+					self.assertEqual(data.loc[last_day].tolist(), [50, 58, 45, 54, 40])
+					self.assertEqual(data.loc[next_day].tolist(), [60, 67, 55, 63, 60])
+					pd.testing.assert_frame_equal(data.iloc[:-2], daily.loc[data.index[0]:].iloc[:-1], check_freq=False)
+			finally:
+					shutil.rmtree(tmp_dir)
+
+	def test_collector_runs_offline_on_synthetic_data(self):
+			collector = DataCollector(provider=SyntheticProvider(years=2))
+			df = collector.collect_data(period='1y')
+
+			self.assertIsNone(collector.store)
+			self.assertEqual(len(df.columns), 16)
+			self.assertGreater(len(df), 240)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,280 @@
+import unittest
+import time
+import sys
+import os
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.utils.data_collector import DataCollector
+from app.models.petr4.src.utils.feature_engineer import FeatureEngineer
+from app.models.petr4.src.utils.feature_pipeline import FeaturePipeline, FeatureNode
+from app.models.petr4.src.utils import indicator_kernels as kernels
+from app.models.petr4.src.utils.incremental_features import IncrementalFeatureState
+from app.models.petr4.src.utils.intraday_pipeline import DailyResampler, IntradayPipeline
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+def make_market_data(period='2y'):
+	collector = DataCollector(provider=SyntheticProvider(years=3, end='2024-06-28'))
+	return collector.collect_data(period=period)
+
+
+class TestIncrementalFeatures(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.df = make_market_data()
+			cls.batch = FeatureEngineer().create_features(cls.df, include_latest=True)
+			cls.columns = [col for col in cls.batch.columns if col != 'target']
+
+	def assert_matches_batch(self, state, timestamp):
+			expected = self.batch.loc[timestamp, self.columns].values.astype(float)
+			actual = state.latest_frame(self.columns).values[0].astype(float)
+			np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12, err_msg=str(timestamp))
+
+	def test_every_bar_matches_batch_path(self):
+			state = IncrementalFeatureState()
+
+			for timestamp, row in self.df.iterrows():
+					state.update(timestamp, row, revisable=False)
+					if timestamp in self.batch.index:
+							self.assertTrue(state.supports(self.columns))
+							self.assert_matches_batch(state, timestamp)
+
+	def test_update_frame_only_consumes_new_bars(self):
+			state = IncrementalFeatureState().update_frame(self.df.iloc[:-5])
+			state.update_frame(self.df)
+
+			self.assertEqual(state.bars, len(self.df))
+			self.assertEqual(state.last_timestamp, self.df.index[-1])
+			self.assert_matches_batch(state, self.df.index[-1])
+
+	def test_latest_bar_can_be_revised(self):
+			partial = self.df.copy()
+			partial.iloc[-1, partial.columns.get_loc('PETR4')] *= 1.05
+
+			state = IncrementalFeatureState().update_frame(partial)
+			state.update_frame(self.df)
+
+			self.assertEqual(state.bars, len(self.df))
+			self.assert_matches_batch(state, self.df.index[-1])
+
+	def test_older_bars_are_rejected(self):
+			state = IncrementalFeatureState().update_frame(self.df)
+
+			with self.assertRaises(ValueError):
+					state.update(self.df.index[-3], self.df.iloc[-3])
+
+
+def make_intraday_bars(day, periods=14, price=30.0, seed=0):
+	rng = np.random.default_rng(seed)
+	index = pd.date_range(pd.Timestamp(day) + pd.Timedelta(hours=10), periods=periods, freq='30min')
+	close = price * np.exp(np.cumsum(rng.normal(0, 0.003, periods)))
+	open_ = np.append(price, close[:-1])
+	return pd.DataFrame({
+			'Open': open_,
+			'High': np.maximum(open_, close) * 1.001,
+			'Low': np.minimum(open_, close) * 0.999,
+			'Close': close,
+			'Volume': rng.integers(1000, 5000, periods).astype(float)
+	}, index=index)
+
+
+class TestIntradayPipeline(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.df = make_market_data()
+			cls.next_day = cls.df.index[-1] + pd.offsets.BDay(1)
+			cls.bars = make_intraday_bars(cls.next_day, price=cls.df['PETR4'].iloc[-1])
+
+	def test_resampler_matches_pandas(self):
+			bars = pd.concat([make_intraday_bars('2024-07-01'), make_intraday_bars('2024-07-02', seed=1)])
+			resampler = DailyResampler()
+			closed = []
+
+			for timestamp, bar in bars.iterrows():
+					_, _, finished = resampler.push(timestamp, bar.to_dict())
+					if finished:
+							closed.append(finished[0])
+			# A revised last bar replaces the one pushed before
+			revised = dict(bars.iloc[-1].to_dict(), Close=99.0, High=99.5)
+			resampler.push(bars.index[-1], revised)
+			bars.iloc[-1, bars.columns.get_loc('Close')] = 99.0
+			bars.iloc[-1, bars.columns.get_loc('High')] = 99.5
+
+			expected = bars.resample('D').agg({
+					'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+			})
+			pd.testing.assert_frame_equal(resampler.to_frame(), expected, check_freq=False)
+			self.assertEqual(closed, [pd.Timestamp('2024-07-01')])
+
+	def test_state_follows_the_running_session(self):
+			state = IncrementalFeatureState().update_frame(self.df)
+			pipeline = IntradayPipeline(state, self.df.iloc[-1].to_dict())
+
+			sessions = list(pipeline.process(self.bars.iterrows()))
+			self.assertEqual(set(sessions), {self.next_day})
+			self.assertEqual(state.bars, len(self.df) + 1)
+
+			session = pipeline.resampler.current()
+			extended = pd.concat([self.df, self.df.iloc[[-1]]])
+			extended.index = list(self.df.index) + [self.next_day]
+			extended.loc[self.next_day, ['PETR4', 'PETR4_Open', 'PETR4_High', 'PETR4_Low', 'PETR4_Volume']] = [
+					session['Close'], session['Open'], session['High'], session['Low'], session['Volume']
+			]
+
+			batch = FeatureEngineer().create_features(extended, include_latest=True)
+			columns = [col for col in batch.columns if col != 'target']
+			np.testing.assert_allclose(
+					state.latest_frame(columns).values[0].astype(float),
+					batch.loc[self.next_day, columns].values.astype(float),
+					rtol=1e-9, atol=1e-12
+			)
+
+
+class TestFeaturePipeline(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.df = make_market_data()
+
+	def test_shared_intermediates_are_computed_once(self):
+			engineer = FeatureEngineer()
+			calls = []
+			returns = engineer.pipeline.nodes['returns']
+			compute = returns.compute
+			returns.compute = lambda *args, **kwargs: calls.append(1) or compute(*args, **kwargs)
+
+			features = engineer.create_features(self.df, include_latest=True)
+			self.assertEqual(len(calls), 1)
+			self.assertIn('volatility_20', features.columns)
+			self.assertIn('ibov_corr', features.columns)
+			self.assertNotIn('returns', features.columns)
+			self.assertIn('returns', engineer.pipeline.run(self.df, 'PETR4').timings)
+
+	def test_extra_nodes_extend_the_feature_set(self):
+			spread = FeatureNode('brent_spread', lambda price, brent: price / brent, ('price', 'brent_price'))
+			engineer = FeatureEngineer(extra_nodes=[spread])
+			features = engineer.create_features(self.df, include_latest=True)
+
+			self.assertEqual(engineer.feature_columns[-1], 'brent_spread')
+			base = FeatureEngineer().create_features(self.df, include_latest=True)
+			pd.testing.assert_frame_equal(features.drop(columns='brent_spread'), base)
+
+	def test_only_runs_the_requested_nodes_and_their_dependencies(self):
+			pipeline = FeatureEngineer().pipeline
+			run = pipeline.run(self.df, 'PETR4', only=['atr_14'])
+
+			self.assertEqual(list(run.features), ['atr_14'])
+			self.assertEqual(set(run.timings), {'price', 'high', 'low', 'true_range', 'atr_14'})
+			self.assertEqual(set(run.family_timings()), {'returns', 'range'})
+
+	def test_concurrent_runs_keep_their_own_state(self):
+			pipeline = FeatureEngineer().pipeline
+			partial = self.df.drop(columns=['PETR4_High'])
+			expected = {
+					True: set(pipeline.run(self.df, 'PETR4').features),
+					False: set(pipeline.run(partial, 'PETR4').features)
+			}
+			self.assertNotEqual(expected[True], expected[False])
+
+			def run(complete):
+					return complete, pipeline.run(self.df if complete else partial, 'PETR4')
+
+			with ThreadPoolExecutor(max_workers=4) as executor:
+					results = list(executor.map(run, [i % 2 == 0 for i in range(16)]))
+
+			for complete, result in results:
+					self.assertEqual(set(result.features), expected[complete])
+					self.assertEqual(bool(result.skipped), not complete)
+
+	def test_unknown_dependency_is_rejected(self):
+			with self.assertRaises(ValueError):
+					FeaturePipeline([FeatureNode('ratio', lambda a, b: a / b, ('price', 'volume'))])
+
+
+class TestIndicatorKernels(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			rng = np.random.default_rng(3)
+			cls.price = pd.Series(30 * np.exp(np.cumsum(rng.normal(0, 0.02, 600))))
+			cls.price.iloc[[5, 100, 101]] = np.nan
+			cls.returns = cls.price.pct_change()
+			cls.other = pd.Series(rng.normal(size=600))
+			cls.other.iloc[50:60] = np.nan
+
+	def assert_matches(self, actual, expected):
+			np.testing.assert_allclose(actual, expected.to_numpy(), rtol=1e-9, atol=1e-12)
+
+	def test_kernels_match_pandas(self):
+			self.assert_matches(kernels.rolling_mean(self.price, 20, 10), self.price.rolling(20, min_periods=10).mean())
+			self.assert_matches(kernels.rolling_std(self.returns, 20, 10), self.returns.rolling(20, min_periods=10).std())
+			self.assert_matches(
+					kernels.rolling_corr(self.returns, self.other, 20, 10),
+					self.returns.rolling(20, min_periods=10).corr(self.other)
+			)
+			self.assert_matches(kernels.rsi(self.price, 14), FeatureEngineer()._calculate_rsi(self.price, 14))
+			self.assert_matches(kernels.roc(self.price, 10), (self.price - self.price.shift(10)) / self.price.shift(10) * 100)
+
+	def test_single_pass_loops_match_numpy_fallback(self):
+			price, returns, other = (kernels._as_array(s) for s in (self.price, self.returns, self.other))
+			np.testing.assert_allclose(
+					kernels._rolling_moments_loop(returns, 10, 5, True),
+					kernels._numpy_rolling_moments(returns, 10, 5, True), rtol=1e-9, atol=1e-12
+			)
+			np.testing.assert_allclose(
+					kernels._rolling_corr_loop(returns, other, 20, 10),
+					kernels._numpy_rolling_corr(returns, other, 20, 10), rtol=1e-9, atol=1e-12
+			)
+			np.testing.assert_allclose(
+					kernels._rsi_loop(price, 14, 7), kernels._numpy_rsi(price, 14, 7), rtol=1e-9, atol=1e-12
+			)
+
+
+class TestFeatureSelection(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			rng = np.random.default_rng(7)
+			base = rng.normal(size=(1500, 300))
+			values = np.hstack([base, base[:, :200] + 0.05 * rng.normal(size=(1500, 200)), rng.normal(size=(1500, 700))])
+			cls.features_df = pd.DataFrame(values, columns=[f'f{i}' for i in range(values.shape[1])])
+			cls.features_df['target'] = base[:, :5].sum(axis=1) + rng.normal(size=1500)
+
+	def test_greedy_pruning_keeps_first_of_each_correlated_pair(self):
+			corr = self.features_df.drop('target', axis=1).corr().abs().values
+			kept = []
+			for i in range(corr.shape[0]):
+					if all(corr[i, j] <= 0.9 for j in kept):
+							kept.append(i)
+
+			selected = FeatureEngineer()._select_columns(self.features_df, max_features=100, corr_threshold=0.9)
+			positions = [int(name[1:]) for name in selected]
+			self.assertEqual(len(selected), 100)
+			self.assertEqual(positions, sorted(positions))
+			self.assertTrue(set(positions) <= set(kept))
+			self.assertFalse(any(position in range(300, 500) for position in positions))
+
+	def test_selection_is_fast_and_cached(self):
+			engineer = FeatureEngineer()
+			with mock.patch.object(engineer, '_select_columns', wraps=engineer._select_columns) as select:
+					started = time.perf_counter()
+					first = engineer.select_features(self.features_df)
+					self.assertLess(time.perf_counter() - started, 1.0)
+					second = engineer.select_features(self.features_df.copy())
+
+			self.assertEqual(select.call_count, 1)
+			self.assertEqual(list(first.columns), list(second.columns))
+			self.assertEqual(len(engineer.feature_columns), 30)
+			self.assertTrue({'f0', 'f1', 'f2', 'f3', 'f4'} <= set(engineer.feature_columns))
+
+
+if __name__ == '__main__':
+	unittest.main()
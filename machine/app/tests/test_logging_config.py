@@ -0,0 +1,80 @@
+import unittest
+import logging
+import threading
+import time
+import sys
+import os
+from logging.handlers import QueueHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import logging_config
+from app.logging_config import configure_logging, parse_levels, stop_logging
+
+
+class SlowHandler(logging.Handler):
+	"""
+	Handler taking a while per record, like a congested stream.
+	"""
+
+	def __init__(self, delay):
+			super().__init__()
+			self.delay = delay
+			self.records = []
+
+	def emit(self, record):
+			time.sleep(self.delay)
+			self.records.append(record)
+
+
+class TestLoggingConfig(unittest.TestCase):
+
+	def setUp(self):
+			self.listener = configure_logging(module_levels={})
+			self.output = SlowHandler(0.05)
+			self.listener.handlers = self.listener.handlers + (self.output,)
+			self.logger = logging.getLogger('app.tests.sample')
+
+	def tearDown(self):
+			stop_logging()
+			self.logger.setLevel(logging.NOTSET)
+			configure_logging(module_levels={})
+
+	def test_records_are_written_by_the_listener_thread(self):
+			root = logging.getLogger()
+			self.assertEqual(sum(isinstance(h, QueueHandler) for h in root.handlers), 1)
+			self.assertIs(configure_logging(module_levels={}), self.listener)
+
+			started = time.perf_counter()
+			for i in range(5):
+					self.logger.warning("record %d of %s", i, 'five')
+			self.assertLess(time.perf_counter() - started, self.output.delay * 2)
+
+			stop_logging()
+			self.assertEqual([r.getMessage() for r in self.output.records], [f"record {i} of five" for i in range(5)])
+			self.assertEqual({r.threadName for r in self.output.records}, {threading.current_thread().name})
+
+	def test_module_levels(self):
+			configure_logging(module_levels=parse_levels('app.tests.sample=debug'))
+			self.logger.debug("split %d", 1)
+			logging.getLogger('app.tests.other').debug("hidden")
+
+			stop_logging()
+			self.assertEqual([r.getMessage() for r in self.output.records], ["split 1"])
+
+	def test_parse_levels(self):
+			self.assertEqual(parse_levels(' a.b=debug, c=WARNING ,'), {'a.b': 'DEBUG', 'c': 'WARNING'})
+			self.assertEqual(parse_levels(None), {})
+			for spec in ('a.b', 'a=LOUD', '=INFO'):
+					with self.assertRaises(ValueError):
+							parse_levels(spec)
+
+	def test_forked_child_gets_its_own_listener(self):
+			parent_listener = logging_config._listener
+			logging_config._restart_after_fork()
+			self.assertIsNot(logging_config._listener, parent_listener)
+			parent_listener.stop()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.utils.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram(unittest.TestCase):
+
+	def test_buckets_are_cumulative_per_label(self):
+			histogram = Histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.01, 0.1, 1.0))
+			for value in (0.005, 0.05, 0.05, 5.0):
+					histogram.observe(value, 'fetch')
+			histogram.observe(0.2, 'model')
+
+			snapshot = histogram.snapshot()
+			self.assertEqual(snapshot[('fetch',)]['buckets'], [1, 3, 3, 4])
+			self.assertEqual(snapshot[('fetch',)]['count'], 4)
+			self.assertAlmostEqual(snapshot[('fetch',)]['sum'], 5.105)
+			self.assertEqual(snapshot[('model',)]['buckets'], [0, 0, 1, 1])
+
+			with self.assertRaises(ValueError):
+					histogram.observe(0.1)
+
+	def test_text_exposition_format(self):
+			registry = MetricsRegistry()
+			histogram = registry.histogram('stage_seconds', 'Stage latency', ('stage',), buckets=(0.1,))
+			self.assertIs(registry.histogram('stage_seconds', 'Stage latency', ('stage',)), histogram)
+
+			histogram.observe(0.05, 'a"b')
+
+			self.assertEqual(registry.render().splitlines(), [
+					'# HELP stage_seconds Stage latency',
+					'# TYPE stage_seconds histogram',
+					'stage_seconds_bucket{stage="a\\"b",le="0.1"} 1',
+					'stage_seconds_bucket{stage="a\\"b",le="+Inf"} 1',
+					'stage_seconds_sum{stage="a\\"b"} 0.05',
+					'stage_seconds_count{stage="a\\"b"} 1'
+			])
+
+	def test_timing_overhead_is_small(self):
+			histogram = Histogram('stage_seconds', 'Stage latency', ('stage',))
+			started = time.perf_counter()
+			for _ in range(10000):
+					with histogram.time('inference'):
+							pass
+			per_span = (time.perf_counter() - started) / 10000
+			self.assertLess(per_span, 50e-6)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+import joblib
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.models.predictor import StockPredictor
+from app.models.petr4.src.services.model_registry import ModelRegistry, parse_tickers
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+class TestModelRegistry(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.model_dir = tempfile.mkdtemp()
+			cls.provider = SyntheticProvider(years=4, end='2024-06-28')
+			cls.tickers = parse_tickers('PETR4,VALE3')
+
+			for ticker, symbol in cls.tickers.items():
+					predictor = StockPredictor(ticker, symbol, provider=cls.provider)
+					predictor.cv_config['max_splits'] = 3
+					assert predictor.train('3y') is not None
+					predictor.save_model(os.path.join(cls.model_dir, f'{ticker.lower()}_model.joblib'))
+
+	@classmethod
+	def tearDownClass(cls):
+			shutil.rmtree(cls.model_dir)
+
+	def make_registry(self, memory_budget_mb=512):
+			return ModelRegistry(
+					provider=self.provider, tickers=self.tickers,
+					model_dir=self.model_dir, memory_budget_mb=memory_budget_mb
+			)
+
+	def test_models_are_loaded_lazily_per_ticker(self):
+			registry = self.make_registry()
+			self.assertEqual(registry.loaded_tickers(), [])
+
+			service = registry.get('vale3')
+			self.assertEqual(registry.loaded_tickers(), ['VALE3'])
+			self.assertIs(registry.get('VALE3'), service)
+
+			prediction = service.get_prediction()
+			self.assertEqual(prediction['status'], 'success')
+			self.assertEqual(service.predictor.ticker, 'VALE3')
+			self.assertIn('VALE3_Volume', service.predictor.data_collector.collect_data('1y').columns)
+
+	def test_least_recently_used_model_is_evicted(self):
+			artifact_mb = os.path.getsize(os.path.join(self.model_dir, 'petr4_model.joblib')) / 1024 / 1024
+			registry = self.make_registry(memory_budget_mb=artifact_mb * 1.5)
+
+			petr4 = registry.get('PETR4')
+			registry.get('VALE3')
+			self.assertEqual(registry.loaded_tickers(), ['VALE3'])
+			self.assertEqual(registry.stats['evictions'], 1)
+
+			self.assertIsNot(registry.get('PETR4'), petr4)
+			self.assertEqual(registry.loaded_tickers(), ['PETR4'])
+			self.assertEqual(registry.stats['loads'], 3)
+
+	def test_preload_reports_only_models_that_fit(self):
+			artifact_mb = os.path.getsize(os.path.join(self.model_dir, 'petr4_model.joblib')) / 1024 / 1024
+			registry = self.make_registry(memory_budget_mb=artifact_mb * 1.5)
+
+			with self.assertLogs('app.models.petr4.src.services.model_registry', 'WARNING') as logs:
+					self.assertEqual(registry.preload(), ['VALE3'])
+			self.assertIn('evicted: PETR4', logs.output[0])
+
+	def test_health_check_does_not_load_models(self):
+			registry = self.make_registry()
+			with mock.patch.object(registry.data_monitor, 'snapshot', return_value={'data_access': 'available'}):
+					health = registry.health_check()
+					self.assertEqual(registry.loaded_tickers(), [])
+					self.assertEqual(registry.stats['loads'], 0)
+					self.assertEqual(health['health']['model_status'], 'not_resident')
+					self.assertEqual(health['health']['overall'], 'healthy')
+
+					registry.get('PETR4')
+					registry.get('VALE3')
+					health = registry.health_check()
+			self.assertEqual(registry.loaded_tickers(), ['PETR4', 'VALE3'])
+			self.assertEqual(health['health']['model_status'], 'loaded')
+			self.assertTrue(health['health']['default_model_resident'])
+
+	def test_unknown_ticker_is_rejected(self):
+			registry = self.make_registry()
+			self.assertIsNone(registry.normalize('ABCD3'))
+			with self.assertRaises(KeyError):
+					registry.get('ABCD3')
+
+	def test_preload_then_workers_never_train(self):
+			registry = self.make_registry()
+			self.assertEqual(registry.preload(), ['PETR4', 'VALE3'])
+			registry.set_train_on_demand(False)
+			self.assertFalse(any(registry.get(t).train_on_demand for t in registry.loaded_tickers()))
+
+			empty_dir = tempfile.mkdtemp()
+			try:
+					registry = ModelRegistry(provider=self.provider, tickers=self.tickers, model_dir=empty_dir,
+																	 train_on_demand=False)
+					with mock.patch.object(StockPredictor, 'train') as train:
+							result = registry.get('PETR4').get_prediction()
+					train.assert_not_called()
+					self.assertIn('error', result)
+
+					# An artifact written later (e.g. by the master) is picked up
+					shutil.copy(os.path.join(self.model_dir, 'petr4_model.joblib'), empty_dir)
+					self.assertEqual(registry.get('PETR4').get_prediction()['status'], 'success')
+			finally:
+					shutil.rmtree(empty_dir)
+
+	def test_worker_reloads_replaced_artifact_and_refuses_retrain(self):
+			worker_dir = tempfile.mkdtemp()
+			try:
+					path = os.path.join(worker_dir, 'petr4_model.joblib')
+					shutil.copy(os.path.join(self.model_dir, 'petr4_model.joblib'), path)
+					registry = ModelRegistry(provider=self.provider, tickers=self.tickers, model_dir=worker_dir,
+																	 train_on_demand=False)
+					service = registry.get('PETR4')
+					self.assertTrue(service.model_loaded)
+					with self.assertRaises(RuntimeError):
+							service.start_retrain('3y')
+
+					# A model trained out of band replaces the file, as save_model does
+					artifact = joblib.load(path)
+					artifact['model_version'] = 'retrained'
+					joblib.dump(artifact, f'{path}.tmp')
+					os.replace(f'{path}.tmp', path)
+
+					self.assertTrue(service.artifact_changed())
+					self.assertEqual(service.get_prediction()['status'], 'success')
+					self.assertEqual(service.predictor.model_version, 'retrained')
+					self.assertFalse(service.artifact_changed())
+			finally:
+					shutil.rmtree(worker_dir)
+
+	def test_artifact_for_another_ticker_is_rejected(self):
+			predictor = StockPredictor('VALE3', provider=self.provider)
+			self.assertFalse(predictor.load_model(os.path.join(self.model_dir, 'petr4_model.joblib')))
+
+
+if __name__ == '__main__':
+	unittest.main()
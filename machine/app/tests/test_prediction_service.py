@@ -0,0 +1,225 @@
+import unittest
+import tempfile
+import shutil
+import threading
+import sys
+import os
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.models.predictor import StockPredictor
+from app.models.petr4.src.services.prediction_service import PredictionService
+from app.models.petr4.src.services.data_source_monitor import DataSourceMonitor
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+from app.models.petr4.src.utils import metrics
+
+
+class TestPredictionService(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.tmp_dir = tempfile.mkdtemp()
+			cls.model_path = os.path.join(cls.tmp_dir, 'model.joblib')
+			cls.provider = SyntheticProvider(years=4, end='2024-06-28')
+
+			service = PredictionService(provider=cls.provider, model_path=cls.model_path)
+			assert service.ensure_model_trained()
+
+	@classmethod
+	def tearDownClass(cls):
+			shutil.rmtree(cls.tmp_dir)
+
+	def setUp(self):
+			self.service = PredictionService(provider=self.provider, model_path=self.model_path)
+
+	def wait_for_job(self, job_id):
+			self.service._retrain_executor.submit(lambda: None).result(timeout=120)
+			return self.service.get_retrain_status(job_id)
+
+	def test_existing_model_is_loaded_at_startup(self):
+			self.assertTrue(self.service.model_loaded)
+			self.assertEqual(self.service.get_prediction()['status'], 'success')
+
+	def test_prediction_stages_are_timed(self):
+			metrics.REGISTRY.reset()
+			self.assertEqual(self.service.get_prediction()['status'], 'success')
+
+			stages = {labels[0] for labels in metrics.STAGE_SECONDS.snapshot()}
+			self.assertLessEqual({'prediction', 'collect_data', 'features', 'scaling', 'inference', 'format'}, stages)
+			fetched = {labels[0] for labels in metrics.FETCH_SECONDS.snapshot()}
+			self.assertEqual(fetched, set(self.service.predictor.data_collector.symbols.values()))
+			self.assertIn('prediction_stage_seconds_count{stage="inference"} 1', metrics.REGISTRY.render())
+
+	def test_retrain_runs_in_background_and_swaps_atomically(self):
+			original_train = StockPredictor.train
+			training_started = threading.Event()
+			release_training = threading.Event()
+
+			def gated_train(predictor, period, include_intraday=False):
+					training_started.set()
+					release_training.wait(30)
+					return original_train(predictor, period, include_intraday)
+
+			old_predictor = self.service.predictor
+
+			with mock.patch.object(StockPredictor, 'train', gated_train):
+					job = self.service.start_retrain('3y')
+					self.assertTrue(training_started.wait(10))
+
+					# Predictions keep being served by the old model while training runs
+					self.assertEqual(self.service.get_retrain_status(job['job_id'])['status'], 'running')
+					self.assertIs(self.service.predictor, old_predictor)
+					self.assertEqual(self.service.get_prediction()['status'], 'success')
+					self.assertEqual(self.service.start_retrain('3y')['job_id'], job['job_id'])
+
+					release_training.set()
+					finished = self.wait_for_job(job['job_id'])
+
+			self.assertEqual(finished['status'], 'completed')
+			self.assertIsNot(self.service.predictor, old_predictor)
+			self.assertIsNotNone(self.service.predictor.best_model)
+
+	def test_failed_retrain_keeps_current_model(self):
+			old_predictor = self.service.predictor
+
+			with mock.patch.object(StockPredictor, 'train', return_value=None):
+					job = self.service.start_retrain('3y')
+					finished = self.wait_for_job(job['job_id'])
+
+			self.assertEqual(finished['status'], 'failed')
+			self.assertIs(self.service.predictor, old_predictor)
+			self.assertIsNone(self.service.get_retrain_status('unknown'))
+
+	def test_retrain_after_close_uses_new_executor(self):
+			# An evicted service closes its executor while requests may still hold it
+			self.service.close()
+
+			with mock.patch.object(StockPredictor, 'train', return_value=None):
+					job = self.service.start_retrain('3y')
+					finished = self.wait_for_job(job['job_id'])
+
+			self.assertEqual(finished['status'], 'failed')
+			self.service.close()
+
+
+class TestPredictionCache(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.tmp_dir = tempfile.mkdtemp()
+			cls.model_path = os.path.join(cls.tmp_dir, 'model.joblib')
+			cls.provider = SyntheticProvider(years=4, end='2024-06-28')
+
+			service = PredictionService(provider=cls.provider, model_path=cls.model_path)
+			assert service.ensure_model_trained()
+
+	@classmethod
+	def tearDownClass(cls):
+			shutil.rmtree(cls.tmp_dir)
+
+	def setUp(self):
+			self.service = PredictionService(provider=self.provider, model_path=self.model_path)
+			self.predictor = self.service.predictor
+			self.predict = mock.patch.object(self.predictor, 'predict', wraps=self.predictor.predict).start()
+			self.collect = mock.patch.object(
+					self.predictor.data_collector, 'collect_data', wraps=self.predictor.data_collector.collect_data
+			).start()
+			self.addCleanup(mock.patch.stopall)
+
+	def test_concurrent_requests_share_one_computation(self):
+			barrier = threading.Barrier(8)
+			results = []
+
+			def request():
+					barrier.wait()
+					results.append(self.service.get_prediction())
+
+			threads = [threading.Thread(target=request) for _ in range(8)]
+			for thread in threads:
+					thread.start()
+			for thread in threads:
+					thread.join()
+
+			self.assertEqual(self.predict.call_count, 1)
+			self.assertEqual(len(results), 8)
+			self.assertTrue(all(result == results[0] for result in results))
+
+	def test_fresh_result_skips_market_data(self):
+			first = self.service.get_prediction()
+			second = self.service.get_prediction()
+
+			self.assertEqual(first, second)
+			self.assertEqual(self.collect.call_count, 1)
+			self.assertEqual(self.predict.call_count, 1)
+
+	def test_expired_result_is_reused_while_bar_is_unchanged(self):
+			self.service.prediction_cache.ttl = 0
+			first = self.service.get_prediction()
+			second = self.service.get_prediction()
+
+			self.assertEqual(first, second)
+			self.assertEqual(self.collect.call_count, 2)
+			self.assertEqual(self.predict.call_count, 1)
+
+	def test_new_model_version_recomputes(self):
+			self.service.get_prediction()
+			self.predictor.model_version = 'other'
+			self.service.get_prediction()
+
+			self.assertEqual(self.predict.call_count, 2)
+
+
+class TestDataSourceMonitor(unittest.TestCase):
+
+	def test_snapshot_does_not_wait_for_check(self):
+			release = threading.Event()
+			monitor = DataSourceMonitor(lambda: release.wait(10) and 42.0, interval=60)
+			self.addCleanup(release.set)
+			self.addCleanup(monitor.stop)
+
+			snapshot = monitor.snapshot()
+			self.assertEqual(snapshot['data_access'], 'pending')
+			self.assertIsNone(snapshot['last_successful_fetch'])
+
+			release.set()
+			monitor.refresh()
+			snapshot = monitor.snapshot()
+			self.assertEqual(snapshot['data_access'], 'available')
+			self.assertIsNotNone(snapshot['last_successful_fetch'])
+			self.assertLess(snapshot['cache_age_seconds'], 1.0)
+
+	def test_failures_keep_last_success_and_go_stale(self):
+			responses = [10.0, RuntimeError('offline')]
+
+			def check():
+					response = responses.pop(0)
+					if isinstance(response, Exception):
+							raise response
+					return response
+
+			monitor = DataSourceMonitor(check, interval=60, stale_after=0)
+			monitor.refresh()
+			last_success = monitor._last_success_at
+			monitor.refresh()
+
+			with mock.patch.object(monitor, 'start'):
+					snapshot = monitor.snapshot()
+			self.assertEqual(snapshot['data_access'], 'stale')
+			self.assertEqual(snapshot['error'], 'offline')
+			self.assertEqual(snapshot['last_successful_fetch'], last_success)
+
+	def test_service_check_reports_provider_errors(self):
+			provider = SyntheticProvider(years=1, end='2024-06-28')
+			service = PredictionService(provider=provider, model_path=os.path.join(tempfile.gettempdir(), 'missing.joblib'))
+
+			with mock.patch.object(provider, 'latest_price', side_effect=ConnectionError('rate limited')):
+					service.data_monitor.refresh()
+			with mock.patch.object(service.data_monitor, 'start'):
+					snapshot = service.data_monitor.snapshot()
+			self.assertEqual(snapshot['data_access'], 'error')
+			self.assertEqual(snapshot['error'], 'rate limited')
+
+
+if __name__ == '__main__':
+	unittest.main()
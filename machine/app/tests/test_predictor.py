@@ -0,0 +1,230 @@
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+from unittest import mock
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import Ridge
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import RobustScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.models.predictor import PETR4Predictor
+from app.models.petr4.src.utils.feature_matrix import FeatureMatrix
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+def make_predictor():
+	predictor = PETR4Predictor(provider=SyntheticProvider(years=4, end='2024-06-28'))
+	predictor.cv_config['max_splits'] = 3
+	return predictor
+
+
+class TestModelPersistence(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.predictor = make_predictor()
+			cls.results = cls.predictor.train('3y')
+
+	def setUp(self):
+			self.tmp_dir = tempfile.mkdtemp()
+			self.path = os.path.join(self.tmp_dir, 'model.joblib')
+
+	def tearDown(self):
+			shutil.rmtree(self.tmp_dir)
+
+	def test_round_trip_restores_predictions(self):
+			self.assertIsNotNone(self.results)
+			self.predictor.save_model(self.path)
+
+			loaded = make_predictor()
+			started = time.perf_counter()
+			self.assertTrue(loaded.load_model(self.path))
+			self.assertLess(time.perf_counter() - started, 1.0)
+
+			self.assertEqual(loaded.best_model_name, self.predictor.best_model_name)
+			self.assertEqual(loaded.feature_columns, self.predictor.feature_columns)
+			self.assertEqual(loaded.adaptive_weights, self.predictor.adaptive_weights)
+
+			expected = self.predictor.predict()
+			actual = loaded.predict()
+			self.assertAlmostEqual(actual['prediction'], expected['prediction'], places=8)
+			self.assertEqual(actual['recommendation'], expected['recommendation'])
+			for loaded_step, step in zip(actual['forecast_path'], expected['forecast_path']):
+					self.assertAlmostEqual(loaded_step['prediction'], step['prediction'], places=8)
+			self.assertEqual(len(actual['forecast_path']), 3)
+
+	def test_conformal_intervals_are_calibrated_and_persisted(self):
+			quantiles = self.predictor.interval_quantiles
+			self.assertLess(0, quantiles['68%'])
+			self.assertLessEqual(quantiles['68%'], quantiles['95%'])
+			
+			calibration = self.predictor.interval_calibration
+			self.assertGreater(calibration['calibration_size'], 0)
+			self.assertTrue(0 <= calibration['95%']['test_coverage'] <= 1)
+			
+			result = self.predictor.predict()
+			interval = result['confidence_intervals']['95%']
+			self.assertAlmostEqual(interval['upper'] - result['prediction'], result['prediction'] * quantiles['95%'], places=8)
+			
+			self.predictor.save_model(self.path)
+			loaded = make_predictor()
+			self.assertTrue(loaded.load_model(self.path))
+			self.assertEqual(loaded.interval_quantiles, quantiles)
+			self.assertEqual(loaded.get_model_info()['interval_calibration'], calibration)
+
+	def test_forecast_path_covers_every_horizon_from_one_fetch(self):
+			collect = self.predictor.data_collector.collect_data
+			with mock.patch.object(self.predictor.data_collector, 'collect_data', wraps=collect) as collect_data:
+					result = self.predictor.predict()
+
+			self.assertEqual(collect_data.call_count, 1)
+			path = result['forecast_path']
+			self.assertEqual([step['horizon'] for step in path], [1, 5, 21])
+			self.assertEqual(path[0]['prediction'], result['prediction'])
+			self.assertEqual(path[1]['date'], '2024-07-05')
+			for step in path:
+					intervals = step['confidence_intervals']
+					self.assertLess(intervals['95%']['lower'], intervals['68%']['lower'])
+					self.assertLess(intervals['68%']['lower'], step['prediction'])
+					self.assertLess(step['prediction'], intervals['68%']['upper'])
+			self.assertGreater(self.predictor.horizon_errors[21], self.predictor.horizon_errors[1])
+
+	def test_incompatible_artifact_is_rejected(self):
+			self.predictor.save_model(self.path)
+			artifact = joblib.load(self.path)
+			artifact['format_version'] = -1
+			joblib.dump(artifact, self.path)
+
+			self.assertFalse(make_predictor().load_model(self.path))
+
+	def test_missing_artifact_is_rejected(self):
+			self.assertFalse(make_predictor().load_model(os.path.join(self.tmp_dir, 'missing.joblib')))
+
+
+class TestBatchPrediction(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(cls):
+			cls.predictor = make_predictor()
+			cls.predictor.train('3y')
+			cls.df = cls.predictor.data_collector.collect_data('1y')
+
+	def test_rows_are_predicted_in_one_call(self):
+			dates = [self.df.index[-1], '2024-06-15', self.df.index[-30], '1990-01-01']
+
+			with mock.patch.object(self.predictor.best_model, 'predict', wraps=self.predictor.best_model.predict) as predict:
+					results = self.predictor.predict_batch(dates, self.df)
+
+			self.assertEqual(predict.call_count, 1)
+			self.assertEqual(len(predict.call_args[0][0]), 3)
+			self.assertEqual([result['as_of'] for result in results[:3]], [
+					self.df.index[-1].strftime('%Y-%m-%d'), '2024-06-14', self.df.index[-30].strftime('%Y-%m-%d')
+			])
+			self.assertIn('error', results[3])
+
+	def test_latest_row_matches_single_prediction(self):
+			batch = self.predictor.predict_batch([self.df.index[-1]], self.df)[0]
+			single = self.predictor.predict(self.df)
+
+			self.assertAlmostEqual(batch['prediction'], single['prediction'], places=8)
+			self.assertEqual(batch['recommendation'], single['recommendation'])
+
+	def test_intraday_bars_refresh_prediction_without_fetching(self):
+			predictor = self.predictor
+			pipeline = predictor.start_intraday_pipeline(self.df)
+			self.assertAlmostEqual(predictor.predict_from_state()['prediction'], predictor.predict(self.df)['prediction'])
+
+			session = self.df.index[-1] + pd.offsets.BDay(1)
+			price = self.df['PETR4'].iloc[-1]
+			with mock.patch.object(predictor.data_collector, 'collect_data') as collect_data:
+					for i, close in enumerate([price * 1.01, price * 1.03]):
+							pipeline.push(session + pd.Timedelta(hours=10, minutes=30 * i), {
+									'Open': price, 'High': close, 'Low': price, 'Close': close, 'Volume': 1000.0
+							})
+							result = predictor.predict_from_state()
+							self.assertAlmostEqual(result['current_price'], close)
+			collect_data.assert_not_called()
+			self.assertEqual(result['next_date'], (session + pd.offsets.BDay(1)).strftime('%Y-%m-%d'))
+
+
+class TestWalkForwardCV(unittest.TestCase):
+
+	def setUp(self):
+			self.predictor = make_predictor()
+			df = self.predictor.data_collector.collect_data('3y')
+			features_df = self.predictor.feature_engineer.create_features(df)
+			self.X, self.y = features_df.drop('target', axis=1), features_df['target']
+
+	def test_split_preprocessing_is_shared_and_matches_pandas(self):
+			X, y = self.X.copy(), self.y
+			X.iloc[3, 0] = np.nan
+			X.iloc[5, 1] = np.inf
+			splits = self.predictor._walk_forward_splits(len(X))
+
+			prepared = self.predictor._prepare_splits(X, y, splits, {None, 'robust'})
+			self.assertIs(self.predictor._prepare_splits(X, y, splits, {'robust'}), prepared)
+
+			train_start, train_end, test_start, test_end = splits[0]
+			X_train = X.iloc[train_start:train_end]
+			X_test = X.iloc[test_start:test_end]
+			train_filled = X_train.fillna(X_train.mean()).fillna(0).replace([np.inf, -np.inf], 0)
+			test_filled = X_test.fillna(X_train.mean()).fillna(0).replace([np.inf, -np.inf], 0)
+			scaler = RobustScaler().fit(train_filled)
+
+			np.testing.assert_allclose(prepared[0]['X_train'][None], train_filled.values)
+			np.testing.assert_allclose(prepared[0]['X_test']['robust'], scaler.transform(test_filled))
+			self.assertTrue(prepared[0]['X_train']['robust'].flags['C_CONTIGUOUS'])
+
+	def test_float32_matrix_feeds_models_without_copies(self):
+			predictor = make_predictor()
+			predictor.feature_dtype = np.dtype('float32')
+			matrix = FeatureMatrix.from_frame(self.X, dtype=np.float32)
+			self.assertEqual(matrix.nbytes * 2, FeatureMatrix.from_frame(self.X, dtype=np.float64).nbytes)
+			
+			splits = predictor._walk_forward_splits(len(matrix))
+			prepared = predictor._prepare_splits(matrix, self.y, splits, {None, 'robust'})
+			
+			# Finite features: unscaled blocks are views, only the scaler copies
+			self.assertTrue(np.shares_memory(prepared[0]['X_train'][None], matrix.values))
+			self.assertEqual(predictor.matrix_stats['copies_per_split'], [2] * len(splits))
+			self.assertEqual(prepared[0]['X_test']['robust'].dtype, np.float32)
+			
+			results = predictor._train_with_cv(self.y.to_frame('target'), matrix)
+			self.assertEqual(predictor.matrix_stats['dtype'], 'float32')
+			self.assertEqual(predictor._transform(self.X.iloc[-1:]).dtype, np.float32)
+			self.assertGreater(results['final_metrics']['r2'], 0)
+			# Scaled splits are released once the model is chosen
+			self.assertIsNone(predictor._split_cache)
+
+	def test_results_do_not_depend_on_worker_count(self):
+			predictor, X, y = self.predictor, self.X, self.y
+
+			specs = {
+					'Ridge': (Ridge(alpha=5.5), 'robust'),
+					'RandomForest': (RandomForestRegressor(n_estimators=10, random_state=42, n_jobs=1), None)
+			}
+
+			predictor.n_jobs = 1
+			serial = predictor._walk_forward_cv_grid(X, y, specs)
+			predictor.n_jobs = 2
+			parallel = predictor._walk_forward_cv_grid(X, y, specs)
+
+			for name in specs:
+					np.testing.assert_array_equal(serial[name]['cv_scores'], parallel[name]['cv_scores'])
+					self.assertEqual(
+							serial[name]['detailed_results']['predictions'],
+							parallel[name]['detailed_results']['predictions']
+					)
+					self.assertEqual(len(serial[name]['cv_scores']), 3)
+
+
+if __name__ == '__main__':
+	unittest.main()
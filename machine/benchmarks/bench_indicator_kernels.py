@@ -0,0 +1,100 @@
+"""
+Indicator Kernel Benchmark
+Times the rolling indicator kernels against the pandas Series chains they
+replaced, on 6 and 30 years of synthetic daily bars.
+
+Usage (from the machine directory):
+    python benchmarks/bench_indicator_kernels.py [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.utils import indicator_kernels as kernels
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider
+
+
+def pandas_indicators(bars, other):
+    """
+    The indicator chains as FeatureEngineer built them with pandas.
+    """
+    price, high, low = bars['Close'], bars['High'], bars['Low']
+    returns = price.pct_change()
+
+    delta = price.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=14, min_periods=7).mean()
+    avg_loss = loss.rolling(window=14, min_periods=7).mean()
+    rsi = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - price.shift(1)), np.abs(low - price.shift(1))))
+    atr = true_range.rolling(14, min_periods=7).mean()
+
+    volatility = [returns.rolling(p, min_periods=max(1, p // 2)).std() for p in (5, 10, 20)]
+    corr = returns.rolling(20, min_periods=10).corr(other.pct_change())
+    roc = [((price - price.shift(p)) / price.shift(p)) * 100 for p in (10, 20)]
+    return [rsi, atr, corr] + volatility + roc
+
+
+def kernel_indicators(bars, other):
+    """
+    The same indicators from indicator_kernels.
+    """
+    price = bars['Close'].to_numpy()
+    returns = bars['Close'].pct_change().to_numpy()
+
+    rsi = kernels.rsi(price, 14)
+    atr = kernels.rolling_mean(kernels.true_range(bars['High'].to_numpy(), bars['Low'].to_numpy(), price), 14, 7)
+
+    volatility = [kernels.rolling_std(returns, p, max(1, p // 2)) for p in (5, 10, 20)]
+    corr = kernels.rolling_corr(returns, other.pct_change().to_numpy(), 20, 10)
+    roc = [kernels.roc(price, p) for p in (10, 20)]
+    return [rsi, atr, corr] + volatility + roc
+
+
+def best_time(function, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rolling indicator kernels")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement, the best one is reported")
+    args = parser.parse_args(argv)
+
+    backend = 'numba' if kernels.NUMBA_AVAILABLE else 'numpy'
+    print(f"Kernel backend: {backend}")
+    print(f"{'history':>8} {'bars':>6} {'pandas ms':>10} {'kernels ms':>11} {'speedup':>8} {'max rel diff':>13}")
+
+    for years in (6, 30):
+        provider = SyntheticProvider(years=years, end='2024-06-28')
+        bars = provider.history('PETR4.SA', period=f'{years}y')
+        other = provider.history('^BVSP', period=f'{years}y')['Close']
+
+        # Also compiles the numba kernels before timing
+        expected = pandas_indicators(bars, other)
+        actual = kernel_indicators(bars, other)
+        difference = max(
+            np.nanmax(np.abs(np.asarray(a) - np.asarray(e)) / np.maximum(np.abs(np.asarray(e)), 1e-12))
+            for a, e in zip(actual, expected)
+        )
+
+        pandas_time = best_time(pandas_indicators, args.repeat, bars, other)
+        kernel_time = best_time(kernel_indicators, args.repeat, bars, other)
+        print(f"{years:>7}y {len(bars):>6} {pandas_time * 1000:>10.2f} {kernel_time * 1000:>11.2f} "
+              f"{pandas_time / kernel_time:>7.1f}x {difference:>13.2e}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Pipeline Benchmark
+Times the training and prediction pipeline stages on an offline dataset and
+writes the results as JSON, so runs can be compared between commits.
+
+Stages, for every (history length, symbol count) case:
+    collect_data             DataCollector.collect_data
+    create_features          FeatureEngineer.create_features
+    select_features          FeatureEngineer.select_features (cache cleared)
+    prepare_splits           walk-forward split preprocessing (cache cleared)
+    walk_forward_cv/<model>  each candidate model's _walk_forward_cv
+    train                    StockPredictor.train, end to end
+    predict                  StockPredictor.predict from collected data
+
+The data comes from SyntheticProvider (deterministic) or from recorded
+files through ReplayProvider, so no run touches the network.
+
+Usage (from the machine directory):
+    python benchmarks/bench_pipeline.py [--years 2,6] [--symbols 4,12] [--repeat 3]
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<baseline>.json
+
+With --compare, every stage whose median got slower than the baseline by
+more than --tolerance is reported and the exit status is 1.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.petr4.src.models.predictor import StockPredictor
+from app.models.petr4.src.utils import indicator_kernels
+from app.models.petr4.src.utils.feature_matrix import FeatureMatrix
+from app.models.petr4.src.utils.market_data_provider import SyntheticProvider, ReplayProvider
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Fixed end date, so synthetic runs see the same bars on every machine and day
+SYNTHETIC_END = '2024-06-28'
+
+
+def parse_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def make_provider(args, years):
+    if args.provider == 'replay':
+        return ReplayProvider(args.replay_dir)
+    # One spare year so the requested period is always fully covered
+    return SyntheticProvider(years=years + 1, seed=args.seed, end=SYNTHETIC_END)
+
+
+def make_predictor(args, years, symbols):
+    """
+    Fresh predictor whose collector fetches the target plus symbols - 1 context symbols.
+    """
+    predictor = StockPredictor(provider=make_provider(args, years), n_jobs=args.n_jobs, feature_dtype=args.feature_dtype)
+    predictor.cv_config['max_splits'] = args.max_splits
+    collector = predictor.data_collector
+    collector.symbols = dict(list(collector.symbols.items())[:symbols])
+    return predictor
+
+
+def measure(function, repeat, setup=None):
+    """
+    Run function repeat times and return the wall time of every run.
+
+    setup (untimed) is called before each run and its result passed to
+    function.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        function(state) if setup else function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(stage, years, symbols, rows, timings):
+    return {
+        'stage': stage,
+        'years': years,
+        'symbols': symbols,
+        'rows': rows,
+        'runs': [round(t, 6) for t in timings],
+        'best_s': round(min(timings), 6),
+        'median_s': round(statistics.median(timings), 6)
+    }
+
+
+def bench_case(args, years, symbols):
+    """
+    Time every stage for one history length and symbol count.
+
+    Returns:
+        list: One result dict per stage
+    """
+    period = f'{years}y'
+    results = []
+    # Counts are validated in main(); record what the collector really fetches
+    symbols = len(make_predictor(args, years, symbols).data_collector.symbols)
+
+    def record(stage, rows, timings):
+        result = summarize(stage, years, symbols, rows, timings)
+        results.append(result)
+        print(f"{years:>6}y {symbols:>8} {stage:<30} {rows:>6} {result['median_s'] * 1000:>11.1f} {result['best_s'] * 1000:>9.1f}")
+
+    # Data collection, cold: a new provider and collector every run
+    timings = measure(
+        lambda predictor: predictor.data_collector.collect_data(period),
+        args.repeat, setup=lambda: make_predictor(args, years, symbols)
+    )
+    predictor = make_predictor(args, years, symbols)
+    df = predictor.data_collector.collect_data(period)
+    record('collect_data', len(df), timings)
+
+    engineer = predictor.feature_engineer
+    record('create_features', len(df), measure(lambda: engineer.create_features(df), args.repeat))
+
+    features_df = engineer.create_features(df)
+    record('select_features', len(features_df), measure(
+        lambda _: engineer.select_features(features_df, max_features=30),
+        args.repeat, setup=engineer._selection_cache.clear
+    ))
+
+    # Walk-forward CV on the training slice of the selected features, as train() does
+    selected = engineer.select_features(features_df, max_features=30)
+    matrix = FeatureMatrix.from_frame(selected, columns=engineer.feature_columns, dtype=predictor.feature_dtype)
+    train_end = int(0.7 * len(selected))
+    X_train, y_train = matrix.rows(0, train_end), selected['target'].iloc[:train_end]
+    candidates = predictor._candidate_models()
+    scaler_types = {config['scaler'] for config in candidates.values()}
+    splits = predictor._walk_forward_splits(train_end)
+
+    def reset_splits():
+        predictor._split_cache_key = None
+
+    record('prepare_splits', train_end, measure(
+        lambda _: predictor._prepare_splits(X_train, y_train, splits, scaler_types),
+        args.repeat, setup=reset_splits
+    ))
+
+    # Splits stay cached from here on, so each model is timed on its fits alone
+    predictor._prepare_splits(X_train, y_train, splits, scaler_types)
+    for name, config in candidates.items():
+        record(f'walk_forward_cv/{name}', train_end, measure(
+            lambda: predictor._walk_forward_cv(X_train, y_train, config['model'], config['scaler']),
+            args.repeat
+        ))
+
+    # End to end training, cold, then prediction with the last trained model
+    trained = []
+
+    def train(fresh):
+        fresh.train(period)
+        trained.append(fresh)
+
+    record('train', len(df), measure(train, args.repeat, setup=lambda: make_predictor(args, years, symbols)))
+
+    model = trained[-1]
+    if model.best_model is None:
+        print(f"{years:>6}y {symbols:>8} {'predict':<30} skipped, training failed")
+        return results
+
+    def reset_feature_state():
+        model.feature_state = None
+
+    record('predict', len(df), measure(lambda _: model.predict(df), args.repeat, setup=reset_feature_state))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(args):
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'libraries': StockPredictor._library_versions(),
+        'kernel_backend': 'numba' if indicator_kernels.NUMBA_AVAILABLE else 'numpy',
+        'settings': {
+            'provider': args.provider,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'n_jobs': args.n_jobs,
+            'max_splits': args.max_splits,
+            'feature_dtype': args.feature_dtype
+        }
+    }
+
+
+def compare(results, meta, baseline_path, tolerance):
+    """
+    Print the median change of every stage against a baseline run.
+
+    Returns:
+        list: The (stage, years, symbols) keys that regressed beyond tolerance
+    """
+    with open(baseline_path) as f:
+        recorded = json.load(f)
+    baseline = {(r['stage'], r['years'], r['symbols']): r for r in recorded['results']}
+
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%}):")
+    for name in ('settings', 'libraries', 'cpu_count'):
+        if recorded['environment'].get(name) != meta[name]:
+            print(f"  WARNING: {name} differ from the baseline run, timings may not be comparable")
+    regressions = []
+    for result in results:
+        key = (result['stage'], result['years'], result['symbols'])
+        if key not in baseline:
+            continue
+        ratio = result['median_s'] / max(baseline[key]['median_s'], 1e-9)
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ''
+        if flag:
+            regressions.append(key)
+        print(f"{key[1]:>6}y {key[2]:>8} {key[0]:<30} {baseline[key]['median_s'] * 1000:>9.1f} -> "
+              f"{result['median_s'] * 1000:>9.1f} ms {ratio:>6.2f}x {flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the training and prediction pipelines")
+    parser.add_argument('--years', default='2,6', help="Comma separated history lengths in years")
+    parser.add_argument('--symbols', default='4,12', help="Comma separated symbol counts, target included")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage")
+    parser.add_argument('--provider', choices=('synthetic', 'replay'), default='synthetic')
+    parser.add_argument('--replay-dir', default=os.path.join('data', 'replay'), help="Recorded bars for --provider replay")
+    parser.add_argument('--seed', type=int, default=42, help="Synthetic data seed")
+    parser.add_argument('--n-jobs', type=int, default=1, help="Walk-forward CV workers; 1 keeps runs comparable")
+    parser.add_argument('--max-splits', type=int, default=20, help="Walk-forward splits per model")
+    parser.add_argument('--feature-dtype', default='float64')
+    parser.add_argument('--output', help="Result file, defaults to benchmarks/results/<timestamp>-<commit>.json")
+    parser.add_argument('--compare', help="Baseline result file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed median slowdown, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    available = len(StockPredictor().data_collector.symbols)
+    for symbols in parse_list(args.symbols):
+        if not 1 <= symbols <= available:
+            parser.error(f"--symbols counts must be between 1 and {available}, the symbols the collector knows")
+
+    meta = environment(args)
+    print(f"Commit {meta['commit']}, Python {meta['python']}, {meta['cpu_count']} CPUs, "
+          f"{args.provider} data, kernels: {meta['kernel_backend']}")
+    print(f"{'history':>7} {'symbols':>8} {'stage':<30} {'rows':>6} {'median ms':>11} {'best ms':>9}")
+
+    results = []
+    for years in parse_list(args.years):
+        for symbols in parse_list(args.symbols):
+            results.extend(bench_case(args, years, symbols))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{meta['commit'] or 'nogit'}.json")
+    with open(output, 'w') as f:
+        json.dump({'environment': meta, 'results': results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare(results, meta, args.compare, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())